@@ -79,42 +79,46 @@ class DataFetcher:
             self.logger.error("Not connected to API")
             return
         
-        for asset in self.monitored_assets:
-            if self.stop_event.is_set():
-                break
+        # closed markets have no new candles, don't request them; unknown
+        # or unavailable schedules count as open
+        try:
+            schedules = self.api.get_schedules("forex", timeout=10)
+            assets = [asset for asset in self.monitored_assets
+                      if schedules.is_open("forex", asset) is not False]
+        except Exception as e:
+            self.logger.warning(f"Trading schedules unavailable: {e}")
+            assets = list(self.monitored_assets)
+        if len(assets) < len(self.monitored_assets):
+            self.logger.debug(f"Skipping closed assets: "
+                              f"{sorted(set(self.monitored_assets) - set(assets))}")
+        
+        # all series are requested at once, replies come back by request id
+        series = [(asset, timeframe * 60, 1, time.time())
+                  for asset in assets
+                  for timeframe in self.timeframes]
+        
+        # candles of all series are written in one transaction
+        fetched = []
+        try:
+            for (asset, size, _, _), candles in self.api.get_candles_many(series, timeout=30):
+                if self.stop_event.is_set():
+                    break
                 
-            for timeframe in self.timeframes:
-                try:
-                    # Get candle data
-                    candles = self.api.get_candles(asset, timeframe * 60, 1, time.time())
-                    
-                    if candles and len(candles) > 0:
-                        candle = candles[0]
-                        
-                        # Prepare data for database
-                        price_data = {
-                            'time': candle['from'],
-                            'open': candle['open'],
-                            'max': candle['max'],
-                            'min': candle['min'],
-                            'close': candle['close'],
-                            'volume': candle.get('volume', 0)
-                        }
-                        
-                        # Save to database
-                        success = self.db.save_price_data(asset, price_data, timeframe)
-                        
-                        if success:
-                            self.logger.debug(f"Saved {asset} M{timeframe}: {candle['close']:.5f}")
-                        else:
-                            self.logger.error(f"Failed to save {asset} M{timeframe}")
-                    
-                    # Small delay between requests
-                    time.sleep(0.2)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error fetching {asset} M{timeframe}: {e}")
-                    continue
+                timeframe = size // 60
+                if candles and len(candles) > 0:
+                    fetched.append((asset, timeframe, candles[:1]))
+                else:
+                    self.logger.warning(f"No candles for {asset} M{timeframe}")
+        except Exception as e:
+            self.logger.error(f"Error fetching candles: {e}")
+        
+        if fetched:
+            saved = self.db.save_candles_bulk_many(fetched)
+            if saved['inserted'] + saved['updated'] == len(fetched):
+                self.logger.debug(f"Saved {len(fetched)} candles "
+                                  f"({saved['inserted']} new, {saved['updated']} updated)")
+            else:
+                self.logger.error(f"Failed to save candles of {len(fetched)} series")
 
     def start_fetching(self, interval=30):
         """Start continuous data fetching"""
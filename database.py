@@ -1,17 +1,268 @@
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+# Accepted column names of candle input, first match wins
+CANDLE_COLUMNS = {
+    'timestamp': ('timestamp', 'from', 'time'),
+    'open': ('open',),
+    'high': ('high', 'max'),
+    'low': ('low', 'min'),
+    'close': ('close',),
+    'volume': ('volume',),
+}
+
+# Row layout of the columnar read path
+PRICE_DTYPE = np.dtype([
+    ('timestamp', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8'),
+])
+
+# Statements are module constants so every call hits the per-connection
+# prepared statement cache of sqlite3
+INSERT_PRICE_SQL = '''
+    INSERT OR REPLACE INTO price_data 
+    (asset, timeframe, timestamp, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPSERT_PRICE_SQL = '''
+    INSERT INTO price_data 
+    (asset, timeframe, timestamp, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(asset, timeframe, timestamp) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+'''
+
+COUNT_RANGE_SQL = '''
+    SELECT COUNT(*) FROM price_data 
+    WHERE asset = ? AND timeframe = ? AND timestamp BETWEEN ? AND ?
+'''
+
+# The latest rows, newest first, as PRICE_DTYPE columns
+LATEST_PRICES_ROWS_SQL = '''
+    SELECT timestamp, open, high, low, close,
+           CAST(COALESCE(volume, 0) AS INTEGER)
+    FROM price_data 
+    WHERE asset = ? AND timeframe = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+LATEST_PRICES_SQL = '''
+    SELECT timestamp, open, high, low, close, volume
+    FROM price_data 
+    WHERE asset = ? AND timeframe = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections for one database file
+    
+    One writer connection shared behind a lock, and one read connection per
+    thread. The database runs in WAL mode, so readers (e.g. main.py) never
+    block the writer (app.py) and the other way round.
+    """
+    
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000,
+                 synchronous: str = "NORMAL", cache_size_kb: int = 16000,
+                 cached_statements: int = 256):
+        """
+        Args:
+            db_path: Path of the SQLite database file
+            busy_timeout_ms: How long a statement waits for a lock held by
+                another process before failing
+            synchronous: PRAGMA synchronous, NORMAL is safe with WAL
+            cache_size_kb: Page cache size of each connection
+            cached_statements: Prepared statements kept per connection
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        self._write_lock = threading.RLock()
+        self._readers_lock = threading.Lock()
+        self._readers = {}  # thread ident -> connection
+        self._local = threading.local()
+        self._writer = self._connect()
+        self._writer.execute('PRAGMA journal_mode=WAL')
+    
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit, transactions are opened explicitly by write()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    @contextmanager
+    def write(self):
+        """
+        Run statements in one write transaction on the writer connection
+        
+        Writes may nest: an inner write() joins the transaction of the
+        outer one, which alone commits or rolls back.
+        
+        Yields:
+            The writer connection; committed on exit, rolled back on error
+        """
+        with self._write_lock:
+            conn = self._writer
+            if conn.in_transaction:
+                # only the thread holding the lock gets here
+                yield conn
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+    
+    def read(self) -> sqlite3.Connection:
+        """
+        Get the read connection of the calling thread
+        
+        Returns:
+            A connection with sqlite3.Row rows, created on first use
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._readers_lock:
+                # close the connections of threads that have ended
+                alive = {thread.ident for thread in threading.enumerate()}
+                for ident in [i for i in self._readers if i not in alive]:
+                    self._readers.pop(ident).close()
+                self._readers[threading.get_ident()] = conn
+        return conn
+    
+    @contextmanager
+    def snapshot(self):
+        """
+        Run reads in one read transaction on the calling thread's connection
+        
+        Snapshots may nest, an inner one reads in the outer transaction.
+        
+        Yields:
+            The read connection; every query sees the same database state
+        """
+        conn = self.read()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            conn.execute('COMMIT')
+    
+    def close(self):
+        """Close the writer and every read connection"""
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+        with self._write_lock:
+            self._writer.close()
+
+
+def _column(candle: Dict, name: str):
+    for key in CANDLE_COLUMNS[name]:
+        if key in candle:
+            return candle[key]
+    if name == 'volume':
+        return None
+    raise KeyError(name)
+
+
+def candle_rows(asset: str, timeframe: int, candles) -> List[Tuple]:
+    """
+    Convert candles to price_data rows
+    
+    Args:
+        asset: Asset symbol
+        timeframe: Timeframe in minutes
+        candles: A list of dicts as get_candles returns ('from', 'open',
+            'max', 'min', 'close', 'volume'), or columnar data: a dict of
+            equal length lists / numpy arrays with the same keys
+            ('timestamp'/'time', 'high', 'low' are accepted too)
+        
+    Returns:
+        List of (asset, timeframe, timestamp, open, high, low, close, volume)
+    """
+    if isinstance(candles, dict):
+        columns = []
+        for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume'):
+            values = _column(candles, name)
+            if values is None:
+                values = [0] * len(columns[0])
+            elif hasattr(values, 'tolist'):
+                # numpy arrays, tolist() gives python ints/floats
+                values = values.tolist()
+            columns.append(values)
+        timestamps = [int(t) for t in columns[0]]
+        return [(asset, timeframe) + row
+                for row in zip(timestamps, *columns[1:])]
+    
+    rows = []
+    for candle in candles:
+        volume = _column(candle, 'volume')
+        rows.append((
+            asset,
+            timeframe,
+            int(_column(candle, 'timestamp')),
+            _column(candle, 'open'),
+            _column(candle, 'high'),
+            _column(candle, 'low'),
+            _column(candle, 'close'),
+            0 if volume is None else volume
+        ))
+    return rows
+
 
 class PriceDatabase:
     def __init__(self, db_path: str = "price_data.db"):
         self.db_path = db_path
+        self._db = ConnectionManager(db_path)
         self._init_database()
         logging.info("Database initialized successfully")
     
+    def close(self):
+        """Close the pooled connections"""
+        self._db.close()
+    
     def _init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db.write() as conn:
             cursor = conn.cursor()
             
             # Create price data table
@@ -41,8 +292,6 @@ class PriceDatabase:
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
                 ON price_data(timestamp)
             ''')
-            
-            conn.commit()
     
     def save_price_data(self, asset: str, price_data: Dict, timeframe: int) -> bool:
         """
@@ -57,14 +306,8 @@ class PriceDatabase:
             bool: True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO price_data 
-                    (asset, timeframe, timestamp, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+            with self._db.write() as conn:
+                conn.execute(INSERT_PRICE_SQL, (
                     asset,
                     timeframe,
                     price_data['time'],
@@ -74,8 +317,6 @@ class PriceDatabase:
                     price_data['close'],
                     price_data.get('volume', 0)
                 ))
-                
-                conn.commit()
                 return True
                 
         except Exception as e:
@@ -89,6 +330,69 @@ class PriceDatabase:
         """
         return self.save_price_data(asset, candle_data, timeframe)
     
+    def save_candles_bulk(self, asset: str, timeframe: int, candles) -> Dict:
+        """
+        Save many candles of one series in a single transaction
+        
+        Existing candles (same asset, timeframe and timestamp) are updated
+        in place.
+        
+        Args:
+            asset: Asset symbol (e.g., 'EURUSD')
+            timeframe: Timeframe in minutes
+            candles: List of candle dicts or columnar dict, see candle_rows
+            
+        Returns:
+            Dictionary with the number of rows 'inserted' and 'updated'
+        """
+        return self.save_candles_bulk_many([(asset, timeframe, candles)])
+    
+    def save_candles_bulk_many(self, series: Iterable[Tuple[str, int, object]]) -> Dict:
+        """
+        Save the candles of many series in a single transaction
+        
+        Args:
+            series: Iterable of (asset, timeframe, candles), candles as in
+                save_candles_bulk
+            
+        Returns:
+            Dictionary with the total rows 'inserted' and 'updated', and
+            'series': {(asset, timeframe): {'inserted', 'updated'}}
+        """
+        result = {'inserted': 0, 'updated': 0, 'series': {}}
+        try:
+            batches = [(asset, timeframe, candle_rows(asset, timeframe, candles))
+                       for asset, timeframe, candles in series]
+            
+            with self._db.write() as conn:
+                for asset, timeframe, rows in batches:
+                    if not rows:
+                        continue
+                    # only inserts change the row count of the range
+                    bounds = (asset, timeframe,
+                              min(row[2] for row in rows),
+                              max(row[2] for row in rows))
+                    before = conn.execute(COUNT_RANGE_SQL, bounds).fetchone()[0]
+                    conn.executemany(UPSERT_PRICE_SQL, rows)
+                    after = conn.execute(COUNT_RANGE_SQL, bounds).fetchone()[0]
+                    
+                    counts = {'inserted': after - before,
+                              'updated': len(rows) - (after - before)}
+                    key = (asset, timeframe)
+                    if key in result['series']:
+                        for name in counts:
+                            result['series'][key][name] += counts[name]
+                    else:
+                        result['series'][key] = counts
+                    result['inserted'] += counts['inserted']
+                    result['updated'] += counts['updated']
+            
+            return result
+            
+        except Exception as e:
+            logging.error(f"Error saving candles in bulk: {e}")
+            return {'inserted': 0, 'updated': 0, 'series': {}}
+    
     def get_latest_prices(self, asset: str, timeframe: int, limit: int = 100) -> List[Dict]:
         """
         Get latest price data for a specific asset and timeframe
@@ -102,36 +406,186 @@ class PriceDatabase:
             List of price data dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM price_data 
-                    WHERE asset = ? AND timeframe = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (asset, timeframe, limit))
-                
-                rows = cursor.fetchall()
-                result = []
+            conn = self._db.read()
+            rows = conn.execute(LATEST_PRICES_SQL, (asset, timeframe, limit)).fetchall()
+            result = []
+            
+            for row in rows:
+                result.append({
+                    'timestamp': row['timestamp'],
+                    'open': row['open'],
+                    'high': row['high'],
+                    'low': row['low'],
+                    'close': row['close'],
+                    'volume': row['volume']
+                })
+            
+            return result
                 
-                for row in rows:
-                    result.append({
+        except Exception as e:
+            logging.error(f"Error getting latest prices for {asset}: {e}")
+            return []
+    
+    def _fetch_arrays(self, query: str, params, reverse: bool = False) -> Dict[str, np.ndarray]:
+        cursor = self._db.read().cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        # one structured array filled straight from the cursor
+        rows = np.fromiter(cursor, dtype=PRICE_DTYPE)
+        if reverse:
+            # the columns are copied below anyway, reversing is free
+            rows = rows[::-1]
+        return {name: np.ascontiguousarray(rows[name]) for name in PRICE_DTYPE.names}
+    
+    def get_latest_prices_arrays(self, asset: str, timeframe: int, limit: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Get latest price data as NumPy arrays, oldest first
+        
+        Args:
+            asset: Asset symbol
+            timeframe: Timeframe in minutes
+            limit: Number of records to return
+            
+        Returns:
+            Dictionary of 'timestamp', 'open', 'high', 'low', 'close' and
+            'volume' arrays (empty on error)
+        """
+        try:
+            return self._fetch_arrays(LATEST_PRICES_ROWS_SQL, (asset, timeframe, limit), reverse=True)
+        except Exception as e:
+            logging.error(f"Error getting latest prices for {asset}: {e}")
+            return {name: np.empty(0, PRICE_DTYPE[name]) for name in PRICE_DTYPE.names}
+    
+    def get_price_data_arrays(self, asset: str, timeframe: int, start_time: int = None, end_time: int = None) -> Dict[str, np.ndarray]:
+        """
+        Get price data within a time range as NumPy arrays, oldest first
+        
+        Args:
+            asset: Asset symbol
+            timeframe: Timeframe in minutes
+            start_time: Start timestamp (optional)
+            end_time: End timestamp (optional)
+            
+        Returns:
+            Dictionary of arrays as get_latest_prices_arrays
+        """
+        query = '''
+            SELECT timestamp, open, high, low, close,
+                   CAST(COALESCE(volume, 0) AS INTEGER)
+            FROM price_data 
+            WHERE asset = ? AND timeframe = ?
+        '''
+        params = [asset, timeframe]
+        
+        if start_time:
+            query += ' AND timestamp >= ?'
+            params.append(start_time)
+        
+        if end_time:
+            query += ' AND timestamp <= ?'
+            params.append(end_time)
+        
+        query += ' ORDER BY timestamp ASC'
+        
+        try:
+            return self._fetch_arrays(query, params)
+        except Exception as e:
+            logging.error(f"Error getting price data for {asset}: {e}")
+            return {name: np.empty(0, PRICE_DTYPE[name]) for name in PRICE_DTYPE.names}
+    
+    def get_latest_prices_df(self, asset: str, timeframe: int, limit: int = 100):
+        """
+        Get latest price data as a pandas DataFrame, oldest first
+        
+        Built from the arrays of get_latest_prices_arrays, without per-row
+        dicts. pandas is only imported here.
+        
+        Returns:
+            DataFrame with open, high, low, close and volume columns indexed
+            by a 'timestamp' DatetimeIndex (empty if there is no data)
+        """
+        return self._arrays_to_df(self.get_latest_prices_arrays(asset, timeframe, limit))
+    
+    @staticmethod
+    def _arrays_to_df(arrays: Dict[str, np.ndarray]):
+        import pandas as pd
+        
+        if len(arrays['timestamp']) == 0:
+            return pd.DataFrame()
+        index = pd.DatetimeIndex(pd.to_datetime(arrays['timestamp'], unit='s'), name='timestamp')
+        return pd.DataFrame(
+            {name: arrays[name] for name in ('open', 'high', 'low', 'close', 'volume')},
+            index=index
+        )
+    
+    def get_latest_prices_many(self, pairs: Iterable[Tuple[str, int]], limit: int = 100) -> Dict[Tuple[str, int], List[Dict]]:
+        """
+        Get latest price data of many series from one consistent snapshot
+        
+        All series are read in a single read transaction, each with the
+        indexed query of get_latest_prices.
+        
+        Args:
+            pairs: Iterable of (asset, timeframe)
+            limit: Number of records per series
+            
+        Returns:
+            Dictionary (asset, timeframe) -> list as get_latest_prices
+            returns (empty lists on error)
+        """
+        pairs = list(pairs)
+        try:
+            result = {}
+            with self._db.snapshot() as conn:
+                for asset, timeframe in pairs:
+                    rows = conn.execute(LATEST_PRICES_SQL, (asset, timeframe, limit)).fetchall()
+                    result[(asset, timeframe)] = [{
                         'timestamp': row['timestamp'],
                         'open': row['open'],
                         'high': row['high'],
                         'low': row['low'],
                         'close': row['close'],
                         'volume': row['volume']
-                    })
-                
-                return result
-                
+                    } for row in rows]
+            return result
+            
         except Exception as e:
-            logging.error(f"Error getting latest prices for {asset}: {e}")
-            return []
+            logging.error(f"Error getting latest prices of {len(pairs)} series: {e}")
+            return {pair: [] for pair in pairs}
+    
+    def get_latest_prices_many_arrays(self, pairs: Iterable[Tuple[str, int]], limit: int = 100) -> Dict[Tuple[str, int], Dict[str, np.ndarray]]:
+        """
+        Get latest price data of many series as NumPy arrays, from one
+        consistent snapshot
+        
+        Returns:
+            Dictionary (asset, timeframe) -> arrays as
+            get_latest_prices_arrays returns
+        """
+        pairs = list(pairs)
+        try:
+            with self._db.snapshot():
+                return {
+                    (asset, timeframe): self._fetch_arrays(
+                        LATEST_PRICES_ROWS_SQL, (asset, timeframe, limit), reverse=True)
+                    for asset, timeframe in pairs
+                }
+        except Exception as e:
+            logging.error(f"Error getting latest prices of {len(pairs)} series: {e}")
+            return {pair: {name: np.empty(0, PRICE_DTYPE[name]) for name in PRICE_DTYPE.names}
+                    for pair in pairs}
+    
+    def get_latest_prices_many_df(self, pairs: Iterable[Tuple[str, int]], limit: int = 100) -> Dict:
+        """
+        Get latest price data of many series as DataFrames, from one
+        consistent snapshot
+        
+        Returns:
+            Dictionary (asset, timeframe) -> DataFrame as
+            get_latest_prices_df returns
+        """
+        return {pair: self._arrays_to_df(arrays)
+                for pair, arrays in self.get_latest_prices_many_arrays(pairs, limit).items()}
     
     def get_price_data(self, asset: str, timeframe: int, start_time: int = None, end_time: int = None) -> List[Dict]:
         """
@@ -147,43 +601,41 @@ class PriceDatabase:
             List of price data dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                query = '''
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM price_data 
-                    WHERE asset = ? AND timeframe = ?
-                '''
-                params = [asset, timeframe]
-                
-                if start_time:
-                    query += ' AND timestamp >= ?'
-                    params.append(start_time)
-                
-                if end_time:
-                    query += ' AND timestamp <= ?'
-                    params.append(end_time)
-                
-                query += ' ORDER BY timestamp ASC'
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                result = []
-                for row in rows:
-                    result.append({
-                        'timestamp': row['timestamp'],
-                        'open': row['open'],
-                        'high': row['high'],
-                        'low': row['low'],
-                        'close': row['close'],
-                        'volume': row['volume']
-                    })
-                
-                return result
-                
+            cursor = self._db.read().cursor()
+            
+            query = '''
+                SELECT timestamp, open, high, low, close, volume
+                FROM price_data 
+                WHERE asset = ? AND timeframe = ?
+            '''
+            params = [asset, timeframe]
+            
+            if start_time:
+                query += ' AND timestamp >= ?'
+                params.append(start_time)
+            
+            if end_time:
+                query += ' AND timestamp <= ?'
+                params.append(end_time)
+            
+            query += ' ORDER BY timestamp ASC'
+            
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            result = []
+            for row in rows:
+                result.append({
+                    'timestamp': row['timestamp'],
+                    'open': row['open'],
+                    'high': row['high'],
+                    'low': row['low'],
+                    'close': row['close'],
+                    'volume': row['volume']
+                })
+            
+            return result
+
         except Exception as e:
             logging.error(f"Error getting price data for {asset}: {e}")
             return []
@@ -196,38 +648,37 @@ class PriceDatabase:
             Dictionary with database statistics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Total records
-                cursor.execute('SELECT COUNT(*) FROM price_data')
-                total_records = cursor.fetchone()[0]
-                
-                # Unique assets
-                cursor.execute('SELECT COUNT(DISTINCT asset) FROM price_data')
-                unique_assets = cursor.fetchone()[0]
-                
-                # Date range
-                cursor.execute('SELECT MIN(timestamp), MAX(timestamp) FROM price_data')
-                min_max = cursor.fetchone()
-                date_range = (min_max[0], min_max[1])
-                
-                # Asset counts
-                cursor.execute('''
-                    SELECT asset, COUNT(*) as count 
-                    FROM price_data 
-                    GROUP BY asset 
-                    ORDER BY count DESC
-                ''')
-                asset_counts = [{'asset': row[0], 'count': row[1]} for row in cursor.fetchall()]
-                
-                return {
-                    'total_records': total_records,
-                    'unique_assets': unique_assets,
-                    'date_range': date_range,
-                    'asset_counts': asset_counts
-                }
-                
+            cursor = self._db.read().cursor()
+            
+            # Total records
+            cursor.execute('SELECT COUNT(*) FROM price_data')
+            total_records = cursor.fetchone()[0]
+            
+            # Unique assets
+            cursor.execute('SELECT COUNT(DISTINCT asset) FROM price_data')
+            unique_assets = cursor.fetchone()[0]
+            
+            # Date range
+            cursor.execute('SELECT MIN(timestamp), MAX(timestamp) FROM price_data')
+            min_max = cursor.fetchone()
+            date_range = (min_max[0], min_max[1])
+            
+            # Asset counts
+            cursor.execute('''
+                SELECT asset, COUNT(*) as count 
+                FROM price_data 
+                GROUP BY asset 
+                ORDER BY count DESC
+            ''')
+            asset_counts = [{'asset': row[0], 'count': row[1]} for row in cursor.fetchall()]
+            
+            return {
+                'total_records': total_records,
+                'unique_assets': unique_assets,
+                'date_range': date_range,
+                'asset_counts': asset_counts
+            }
+
         except Exception as e:
             logging.error(f"Error getting database stats: {e}")
             return {
@@ -250,7 +701,7 @@ class PriceDatabase:
         try:
             cutoff_time = int(datetime.now().timestamp()) - (older_than_days * 24 * 60 * 60)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._db.write() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -259,7 +710,6 @@ class PriceDatabase:
                 ''', (cutoff_time,))
                 
                 deleted_count = cursor.rowcount
-                conn.commit()
                 
                 logging.info(f"Cleaned up {deleted_count} records older than {older_than_days} days")
                 return deleted_count
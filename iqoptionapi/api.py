@@ -7,6 +7,7 @@ import threading
 import requests
 import ssl
 import atexit
+from websocket import WebSocketConnectionClosedException
 from collections import deque
 from iqoptionapi.http.login import Login
 from iqoptionapi.http.loginv2 import Loginv2
@@ -23,6 +24,15 @@ from iqoptionapi.http.buyback import Buyback
 from iqoptionapi.http.changebalance import Changebalance
 from iqoptionapi.http.events import Events
 from iqoptionapi.ws.client import WebsocketClient
+from iqoptionapi.ws.writer import WebsocketWriter
+from iqoptionapi.ws.pending import PendingRequests
+from iqoptionapi.ws.callback_pool import CallbackPool
+from iqoptionapi.ws.outcomes import OutcomeTracker
+from iqoptionapi.ws.orders import OrderPipeline
+from iqoptionapi.ws.market_data import MarketData
+from iqoptionapi.ws.strikes import StrikeCache
+from iqoptionapi.ws.quotes import QuoteStore
+from iqoptionapi.ws.portfolio import DigitalPortfolio
 from iqoptionapi.ws.chanels.get_balances import *
 
 from iqoptionapi.ws.chanels.ssid import Ssid
@@ -66,7 +76,7 @@ from iqoptionapi.ws.objects.profile import Profile
 from iqoptionapi.ws.objects.candles import Candles
 from iqoptionapi.ws.objects.listinfodata import ListInfoData
 from iqoptionapi.ws.objects.betinfo import Game_betinfo_data
-import iqoptionapi.global_value as global_value
+from iqoptionapi.ws.objects.realtime_candles import RealtimeCandles
 from collections import defaultdict
 
 
@@ -87,82 +97,44 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
     """Class for communication with IQ Option API."""
 
     # pylint: disable=too-many-public-methods
-    socket_option_opened = {}
-    socket_option_closed = {}
-    timesync = TimeSync()
-    profile = Profile()
-    candles = Candles()
-    listinfodata = ListInfoData()
-    api_option_init_all_result = []
-    api_option_init_all_result_v2 = []
-    # for digital
-    underlying_list_data = None
-    position_changed = None
-    instrument_quites_generated_data = nested_dict(2, dict)
-    instrument_quotes_generated_raw_data = nested_dict(2, dict)
-    instrument_quites_generated_timestamp = nested_dict(2, dict)
-    strike_list = None
-    leaderboard_deals_client = None
-    #position_changed_data = nested_dict(2, dict)
-    # microserviceName_binary_options_name_option=nested_dict(2,dict)
-    order_async = nested_dict(2, dict)
-    order_binary = {}
-    game_betinfo = Game_betinfo_data()
-    instruments = None
-    financial_information = None
-    buy_id = None
-    buy_order_id = None
-    traders_mood = {}  # get hight(put) %
-    technical_indicators = {}
-    order_data = None
-    positions = None
-    position = None
-    deferred_orders = None
-    position_history = None
-    position_history_v2 = None
-    available_leverages = None
-    order_canceled = None
-    close_position_data = None
-    overnight_fee = None
-    # ---for real time
-    digital_option_placed_id = {}
-    live_deal_data = nested_dict(3, deque)
-
-    subscribe_commission_changed_data = nested_dict(2, dict)
-    real_time_candles = nested_dict(3, dict)
-    real_time_candles_maxdict_table = nested_dict(2, dict)
-    candle_generated_check = nested_dict(2, dict)
-    candle_generated_all_size_check = nested_dict(1, dict)
-    # ---for api_game_getoptions_result
-    api_game_getoptions_result = None
-    sold_options_respond = None
-    sold_digital_options_respond = None
-    tpsl_changed_respond = None
-    auto_margin_call_changed_respond = None
-    top_assets_updated_data = {}
-    get_options_v2_data = None
-    # --for binary option multi buy
-    buy_multi_result = None
-    buy_multi_option = {}
-    #
-    result = None
-    training_balance_reset_request = None
-    balances_raw = None
-    user_profile_client = None
-    leaderboard_userinfo_deals_client = None
-    users_availability = None
-    # ------------------
 
     def __init__(self, host, username, password, proxies=None):
         """
-        :param str host: The hostname or ip address of a IQ Option server.
+        :param str host: The hostname or ip address of a IQ Option server,
+            or a url like "http://127.0.0.1:8080" of a server without TLS
+            such as :class:`LocalServer
+            <iqoptionapi.local_server.LocalServer>`.
         :param str username: The username of a IQ Option server.
         :param str password: The password of a IQ Option server.
         :param dict proxies: (optional) The http request proxies.
         """
-        self.https_url = "https://{host}/api".format(host=host)
-        self.wss_url = "wss://{host}/echo/websocket".format(host=host)
+        self.init_state()
+        if "://" in host:
+            scheme, host = host.split("://", 1)
+            ws_scheme = "wss" if scheme == "https" else "ws"
+            self.https_url = "{scheme}://{host}/api".format(
+                scheme=scheme, host=host)
+            self.wss_url = "{scheme}://{host}/echo/websocket".format(
+                scheme=ws_scheme, host=host)
+            self.auth_url = self.https_url
+            self.event_url = self.https_url
+        else:
+            self.https_url = "https://{host}/api".format(host=host)
+            self.wss_url = "wss://{host}/echo/websocket".format(host=host)
+            self.auth_url = "https://auth.{host}/api".format(host=host)
+            self.event_url = "https://event.{host}/api".format(host=host)
         self.websocket_client = None
+        self.websocket_writer = None
+        # bounded outbound queue, senders block while it is full
+        self.websocket_send_queue_size = 1024
+        # write identical frames queued back-to-back only once
+        self.websocket_send_coalesce = False
+        # request_id -> future of the response
+        self.pending_requests = PendingRequests()
+        # live deal callbacks run here, not on the socket thread
+        self.binary_live_deal_cb = None
+        self.digital_live_deal_cb = None
+        self.live_deal_pool = CallbackPool()
         self.session = requests.Session()
         self.session.verify = False
         self.session.trust_env = False
@@ -177,6 +149,119 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         # If it is true, the last buy order was successful
         self.buy_successful = None
         self.__active_account_type = None
+        # message name -> handler, applied to every new WebsocketClient
+        self.message_handlers = {}
+        # message name -> [listener], called after the handler
+        self.message_listeners = {}
+        # futures of option/order results
+        self.outcomes = OutcomeTracker(self)
+        # binary option orders, acks matched by request_id
+        self.order_pipeline = OrderPipeline(self)
+        # init data, instruments and payouts, kept for a ttl
+        self.market_data = MarketData(self)
+        self.strikes = StrikeCache(self)
+        self.quotes = QuoteStore()
+        self.digital_portfolio = DigitalPortfolio(self)
+        # websocket status, set by WebsocketClient
+        self.check_websocket_if_connect = None
+        self.check_websocket_if_error = False
+        self.websocket_error_reason = None
+
+    def init_state(self):
+        """Create the state filled by websocket messages.
+
+        It lives on the instance so that several clients in one process
+        do not overwrite each other.
+        """
+        self.socket_option_opened = {}
+        self.socket_option_closed = {}
+        self.timesync = TimeSync()
+        self.profile = Profile()
+        self.candles = Candles()
+        self.listinfodata = ListInfoData()
+        self.api_option_init_all_result = []
+        self.api_option_init_all_result_v2 = []
+        # for digital
+        self.underlying_list_data = None
+        self.position_changed = None
+        self.instrument_quites_generated_data = nested_dict(2, dict)
+        self.instrument_quites_generated_timestamp = nested_dict(2, dict)
+        self.strike_list = None
+        self.leaderboard_deals_client = None
+        #position_changed_data = nested_dict(2, dict)
+        # microserviceName_binary_options_name_option=nested_dict(2,dict)
+        self.order_async = nested_dict(2, dict)
+        self.order_binary = {}
+        self.game_betinfo = Game_betinfo_data()
+        self.instruments = None
+        self.financial_information = None
+        self.buy_id = None
+        self.buy_order_id = None
+        self.traders_mood = {}  # get hight(put) %
+        self.technical_indicators = {}
+        self.order_data = None
+        self.positions = None
+        self.position = None
+        self.deferred_orders = None
+        self.position_history = None
+        self.position_history_v2 = None
+        self.available_leverages = None
+        self.order_canceled = None
+        self.close_position_data = None
+        self.overnight_fee = None
+        # ---for real time
+        self.digital_option_placed_id = {}
+        self.live_deal_data = nested_dict(3, deque)
+        self.subscribe_commission_changed_data = nested_dict(2, dict)
+        self.real_time_candles = RealtimeCandles()
+        self.real_time_candles_maxdict_table = nested_dict(2, dict)
+        self.candle_generated_check = nested_dict(2, dict)
+        self.candle_generated_all_size_check = nested_dict(1, dict)
+        # ---for api_game_getoptions_result
+        self.api_game_getoptions_result = None
+        self.sold_options_respond = None
+        self.sold_digital_options_respond = None
+        self.tpsl_changed_respond = None
+        self.auto_margin_call_changed_respond = None
+        self.top_assets_updated_data = {}
+        self.get_options_v2_data = None
+        # --for binary option multi buy
+        self.buy_multi_result = None
+        self.buy_multi_option = {}
+        #
+        self.result = None
+        self.training_balance_reset_request = None
+        self.balances_raw = None
+        self.user_profile_client = None
+        self.leaderboard_userinfo_deals_client = None
+        self.users_availability = None
+        # --session of this account
+        self.SSID = None
+        self.balance_id = None
+        # set once the profile gave the default balance_id
+        self.balance_id_ready = threading.Event()
+
+    def take_state(self, api):
+        """Carry the state of a previous instance over, e.g. on reconnect.
+
+        :param api: The instance of :class:`IQOptionAPI` to take it from.
+        """
+        names = IQOptionAPI.__new__(IQOptionAPI)
+        names.init_state()
+        for name in list(vars(names)) + ["message_handlers",
+                                         "message_listeners",
+                                         "outcomes",
+                                         "order_pipeline",
+                                         "market_data",
+                                         "strikes",
+                                         "quotes",
+                                         "digital_portfolio",
+                                         "binary_live_deal_cb",
+                                         "digital_live_deal_cb",
+                                         "live_deal_pool"]:
+            setattr(self, name, getattr(api, name))
+        self.order_pipeline.api = self
+        self.digital_portfolio.api = self
 
     def prepare_http_url(self, resource):
         """Construct http url from resource url.
@@ -261,21 +346,86 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
     def send_websocket_request(self, name, msg, request_id="", no_force_send=True):
         """Send websocket request to IQ Option server.
 
+        The frame is queued for the writer thread, this does not wait for
+        the socket write.
+
         :param str name: The websocket request name.
         :param dict msg: The websocket request msg.
-        """
-
-        logger = logging.getLogger(__name__)
+        :param no_force_send: Unused, kept for backward compatibility.
 
+        :returns: The instance of :class:`SendHandle
+            <iqoptionapi.ws.writer.SendHandle>`.
+        """
         data = json.dumps(dict(name=name,
                                msg=msg, request_id=request_id))
+        handle = self.websocket_writer.send(data)
+        if request_id != "":
+            handle.add_done_callback(self.__on_frame_done)
+        return handle
 
-        while (global_value.ssl_Mutual_exclusion or global_value.ssl_Mutual_exclusion_write) and no_force_send:
-            pass
-        global_value.ssl_Mutual_exclusion_write = True
-        self.websocket.send(data)
-        logger.debug(data)
-        global_value.ssl_Mutual_exclusion_write = False
+    def __on_frame_done(self, handle):
+        # writer thread: a frame that never left fails its request at once
+        if handle.exception is not None:
+            self.pending_requests.fail(
+                json.loads(handle.data)["request_id"], handle.exception)
+
+    def send_request(self, channel, *args, response_names=None, **kwargs):
+        """Send a chanel request and get a future of its response.
+
+        The response is matched by the request_id the server echoes, so
+        any number of requests of the same kind can be in flight.
+
+        :param channel: The chanel instance, e.g. ``self.get_order``.
+        :param response_names: (optional) The message names accepted as
+            the response.
+
+        :returns: The instance of :class:`RequestFuture
+            <iqoptionapi.ws.pending.RequestFuture>`.
+        """
+        future = self.pending_requests.create(names=response_names)
+        channel.request_id = future.request_id
+        try:
+            channel(*args, **kwargs)
+        except:
+            self.pending_requests.discard(future.request_id)
+            raise
+        return future
+
+    def register_message_handler(self, name, handler):
+        """Add or replace the handler of a websocket message.
+
+        :param str name: The websocket message name.
+        :param handler: Callable taking the decoded message dict.
+        """
+        self.message_handlers[name] = handler
+        if self.websocket_client is not None:
+            self.websocket_client.register_handler(name, handler)
+
+    def unregister_message_handler(self, name):
+        """Remove a handler added with register_message_handler."""
+        self.message_handlers.pop(name, None)
+        if self.websocket_client is not None:
+            self.websocket_client.unregister_handler(name)
+
+    def add_message_listener(self, name, listener):
+        """Call listener(message) for every message of this name.
+
+        Unlike a handler it does not replace the built-in handling, it runs
+        on the websocket thread after it.
+
+        :param str name: The websocket message name.
+        :param listener: Callable taking the decoded message dict.
+        """
+        listeners = self.message_listeners.setdefault(name, [])
+        if listener not in listeners:
+            listeners.append(listener)
+
+    def remove_message_listener(self, name, listener):
+        listeners = self.message_listeners.get(name, [])
+        if listener in listeners:
+            listeners.remove(listener)
+        if not listeners:
+            self.message_listeners.pop(name, None)
 
     @property
     def logout(self):
@@ -769,11 +919,18 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         requests.utils.add_dict_to_cookiejar(self.session.cookies, cookies)
 
     def start_websocket(self):
-        global_value.check_websocket_if_connect = None
-        global_value.check_websocket_if_error = False
-        global_value.websocket_error_reason = None
+        self.check_websocket_if_connect = None
+        self.check_websocket_if_error = False
+        self.websocket_error_reason = None
 
         self.websocket_client = WebsocketClient(self)
+        if self.websocket_writer is not None:
+            self.websocket_writer.stop()
+        self.websocket_writer = WebsocketWriter(
+            self.websocket.send, maxsize=self.websocket_send_queue_size,
+            coalesce=self.websocket_send_coalesce)
+        self.websocket_writer.start()
+        self.websocket_client.writer = self.websocket_writer
 
         self.websocket_thread = threading.Thread(target=self.websocket.run_forever, kwargs={'sslopt': {
                                                  "check_hostname": False, "cert_reqs": ssl.CERT_NONE, "ca_certs": "cacert.pem"}})  # for fix pyinstall error: cafile, capath and cadata cannot be all omitted
@@ -781,11 +938,11 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         self.websocket_thread.start()
         while True:
             try:
-                if global_value.check_websocket_if_error:
-                    return False, global_value.websocket_error_reason
-                if global_value.check_websocket_if_connect == 0:
+                if self.check_websocket_if_error:
+                    return False, self.websocket_error_reason
+                if self.check_websocket_if_connect == 0:
                     return False, "Websocket connection closed."
-                elif global_value.check_websocket_if_connect == 1:
+                elif self.check_websocket_if_connect == 1:
                     return True, None
             except:
                 pass
@@ -819,7 +976,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
 
     def send_ssid(self):
         self.profile.msg = None
-        self.ssid(global_value.SSID)  # pylint: disable=not-callable
+        self.ssid(self.SSID)  # pylint: disable=not-callable
         while self.profile.msg == None:
             pass
         if self.profile.msg == False:
@@ -828,21 +985,20 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
             return True
 
     def connect(self):
-
-        global_value.ssl_Mutual_exclusion = False
-        global_value.ssl_Mutual_exclusion_write = False
         """Method for connection to IQ Option API."""
         try:
             self.close()
         except:
             pass
+        # wait for a timeSync frame of this connection below
+        self.timesync.server_timestamp = None
         check_websocket, websocket_reason = self.start_websocket()
 
         if check_websocket == False:
             return check_websocket, websocket_reason
 
         # doing temp ssid reconnect for speed up
-        if global_value.SSID != None:
+        if self.SSID != None:
 
             check_ssid = self.send_ssid()
 
@@ -850,7 +1006,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
                 # ssdi time out need reget,if sent error ssid,the weksocket will close by iqoption server
                 response = self.get_ssid()
                 try:
-                    global_value.SSID = response.cookies["ssid"]
+                    self.SSID = response.cookies["ssid"]
                 except:
                     return False, response.text
                 atexit.register(self.logout)
@@ -861,7 +1017,7 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         else:
             response = self.get_ssid()
             try:
-                global_value.SSID = response.cookies["ssid"]
+                self.SSID = response.cookies["ssid"]
             except:
                 self.close()
                 return False, response.text
@@ -870,15 +1026,11 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
 
         # set ssis cookie
         requests.utils.add_dict_to_cookiejar(
-            self.session.cookies, {"ssid": global_value.SSID})
+            self.session.cookies, {"ssid": self.SSID})
 
-        self.timesync.server_timestamp = None
-        while True:
-            try:
-                if self.timesync.server_timestamp != None:
-                    break
-            except:
-                pass
+        while self.timesync.wait_first(1) is None:
+            if self.check_websocket_if_error:
+                return False, self.websocket_error_reason
         return True, None
 
     def connect2fa(self, sms_code):
@@ -894,6 +1046,10 @@ class IQOptionAPI(object):  # pylint: disable=too-many-instance-attributes
         return True, None
 
     def close(self):
+        if self.websocket_writer is not None:
+            self.websocket_writer.stop()
+        self.pending_requests.fail_all(
+            WebSocketConnectionClosedException("websocket closed"))
         self.websocket.close()
         self.websocket_thread.join()
 
@@ -0,0 +1,318 @@
+"""Module for IQ Option asyncio API."""
+
+import asyncio
+import logging
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.stable_api import IQ_Option
+from iqoptionapi.ws.client import LIVE_DEAL_KEYS
+
+
+class AsyncIQOption(object):
+    """asyncio front end of :class:`IQ_Option
+    <iqoptionapi.stable_api.IQ_Option>`.
+
+    Frames are still built by the chanel classes and written by the
+    websocket writer thread. Once connected, waits for responses and
+    stream messages are asyncio futures completed from the websocket
+    thread, so one event loop can drive any number of requests and
+    streams without a thread per wait. :meth:`connect`, :meth:`close` and
+    :meth:`stop_candles_stream` are the exception: they run the blocking
+    :class:`IQ_Option` calls in the default executor.
+    """
+
+    def __init__(self, email, password, active_account_type="PRACTICE",
+                 host="iqoption.com"):
+        """
+        :param str email: The username of a IQ Option server.
+        :param str password: The password of a IQ Option server.
+        :param str host: (optional) The host, see :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        """
+        self.iq = IQ_Option(email, password, active_account_type, host)
+        self.loop = None
+        # message name -> [(match, asyncio.Queue)]
+        self.subscribers = {}
+
+    @property
+    def api(self):
+        return self.iq.api
+
+    # ------------------------------------------------------------------
+    # bridge from the websocket thread to the event loop
+
+    def __on_message(self, message):
+        # websocket thread
+        self.loop.call_soon_threadsafe(self.__dispatch, message)
+
+    def __dispatch(self, message):
+        name = message.get("name")
+        for match, queue in list(self.subscribers.get(name, ())):
+            if match is not None and not match(message):
+                continue
+            if queue.full():
+                # slow consumer, drop the oldest message
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def __listen(self, name):
+        self.api.add_message_listener(name, self.__on_message)
+
+    def __subscribe(self, name, match=None, maxsize=1000):
+        entry = (match, asyncio.Queue(maxsize))
+        self.subscribers.setdefault(name, []).append(entry)
+        self.__listen(name)
+        return entry
+
+    def __unsubscribe(self, name, entry):
+        subscribers = self.subscribers.get(name, [])
+        if entry in subscribers:
+            subscribers.remove(entry)
+        if not subscribers:
+            self.subscribers.pop(name, None)
+            self.api.remove_message_listener(name, self.__on_message)
+
+    async def __result(self, future, timeout=None):
+        """Await a :class:`RequestFuture
+        <iqoptionapi.ws.pending.RequestFuture>`.
+
+        :raises asyncio.TimeoutError: if it is not done in time.
+        """
+        waiter = self.loop.create_future()
+
+        def copy(done):
+            if waiter.done():
+                return
+            if done.exception is not None:
+                waiter.set_exception(done.exception)
+            else:
+                waiter.set_result(done.message)
+
+        future.add_done_callback(
+            lambda done: self.loop.call_soon_threadsafe(copy, done))
+        return await asyncio.wait_for(waiter, timeout)
+
+    async def __wait(self, future, timeout=None):
+        """Await the response of a request.
+
+        :returns: The response message dict.
+        :raises asyncio.TimeoutError: if no response arrived in time.
+        """
+        try:
+            return await self.__result(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.api.pending_requests.discard(future.request_id)
+            raise
+
+    # ------------------------------------------------------------------
+
+    async def connect(self, sms_code=None):
+        """Log in and open the websocket.
+
+        The handshake itself still runs the blocking :meth:`IQ_Option.connect`
+        in the default executor, once.
+
+        :returns: (check, reason) as :meth:`IQ_Option.connect`.
+        """
+        self.loop = asyncio.get_running_loop()
+        return await self.loop.run_in_executor(
+            None, self.iq.connect, sms_code)
+
+    async def close(self):
+        await self.loop.run_in_executor(None, self.api.close)
+
+    def check_connect(self):
+        return self.iq.check_connect()
+
+    def get_server_timestamp(self):
+        return self.api.timesync.server_timestamp
+
+    async def wait_server_timestamp(self, timeout=None):
+        """:returns: The server timestamp after the next timeSync frame,
+            None on timeout."""
+        entry = self.__subscribe("timeSync", maxsize=1)
+        try:
+            await asyncio.wait_for(entry[1].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.__unsubscribe("timeSync", entry)
+        return self.api.timesync.server_timestamp
+
+    async def get_candles(self, ACTIVES, interval, count, endtime,
+                          timeout=None):
+        future = self.api.send_request(
+            self.api.getcandles, OP_code.ACTIVES[ACTIVES], interval, count,
+            endtime, response_names=("candles",))
+        try:
+            message = await self.__wait(future, timeout)
+        except asyncio.TimeoutError:
+            logging.error('**warning** get_candles late ' + str(timeout) + ' sec')
+            return None
+        return message["msg"]["candles"]
+
+    async def buy(self, price, ACTIVES, ACTION, expirations, timeout=5):
+        """:returns: (True, option id) or (False, error message or None)."""
+        future = self.api.pending_requests.create(names=("option",))
+        try:
+            self.api.buyv3(float(price), OP_code.ACTIVES[ACTIVES],
+                           str(ACTION), int(expirations), future.request_id)
+        except:
+            self.api.pending_requests.discard(future.request_id)
+            raise
+        try:
+            message = await self.__wait(future, timeout)
+        except asyncio.TimeoutError:
+            logging.error('**warning** buy late ' + str(timeout) + ' sec')
+            return False, None
+        finally:
+            self.api.buy_multi_option.pop(future.request_id, None)
+        if "message" in message["msg"]:
+            return False, message["msg"]["message"]
+        return True, message["msg"]["id"]
+
+    async def buy_digital_spot(self, active, amount, action, duration,
+                               timeout=None):
+        """:returns: (True, order id) or (False, error dict or None)."""
+        instrument_id = self.iq.get_digital_spot_instrument_id(
+            active, action, duration)
+        if instrument_id is None:
+            return -1, None
+        future = self.api.send_request(
+            self.api.place_digital_option, instrument_id, amount,
+            response_names=("digital-option-placed",))
+        try:
+            message = await self.__wait(future, timeout)
+        except asyncio.TimeoutError:
+            logging.error('**warning** buy_digital_spot late ' + str(timeout) + ' sec')
+            return False, None
+        finally:
+            self.api.digital_option_placed_id.pop(future.request_id, None)
+        if message["msg"].get("id") is not None:
+            return True, message["msg"]["id"]
+        return False, {"code": "error_place_digital_order",
+                       "message": message["msg"]["message"]}
+
+    async def check_win_v4(self, id_number, timeout=None):
+        """Wait for the option to close.
+
+        :returns: (win, profit) as :meth:`IQ_Option.check_win_v4`.
+        """
+        future = self.api.outcomes.future("socket-option-closed", id_number)
+        try:
+            message = await self.__result(future, timeout)
+        except asyncio.TimeoutError:
+            self.api.outcomes.discard("socket-option-closed", id_number, future)
+            return None, None
+        except asyncio.CancelledError:
+            self.api.outcomes.discard("socket-option-closed", id_number, future)
+            raise
+        msg = message['msg']
+        if msg['win'] == 'equal':
+            profit = 0
+        elif msg['win'] == 'loose':
+            profit = float(msg['sum']) * -1
+        else:
+            profit = float(msg['win_amount']) - float(msg['sum'])
+        return msg['win'], profit
+
+    async def start_candles_stream(self, ACTIVE, size, maxdict):
+        """Fill the real time candles of one size and subscribe to them.
+
+        :returns: True once the first candle arrived, False after 20 sec.
+        """
+        if size not in self.iq.size:
+            logging.error(
+                '**error** start_candles_stream please input right size')
+            return False
+        self.api.real_time_candles_maxdict_table[ACTIVE][size] = maxdict
+        candles = await self.get_candles(
+            ACTIVE, size, maxdict, self.api.timesync.server_timestamp)
+        ring = self.api.real_time_candles.ring(ACTIVE, size, maxdict)
+        for can in candles or []:
+            ring.add(can["from"], can)
+        if (ACTIVE + "," + str(size)) not in self.iq.subscribe_candle:
+            # resubscribed by IQ_Option on reconnect
+            self.iq.subscribe_candle.append(ACTIVE + "," + str(size))
+        active_id = OP_code.ACTIVES[ACTIVE]
+        entry = self.__subscribe(
+            "candle-generated", self.__candle_match(active_id, size), 1)
+        try:
+            for _ in range(20):
+                self.api.subscribe(active_id, size)
+                try:
+                    await asyncio.wait_for(entry[1].get(), 1)
+                    return True
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.__unsubscribe("candle-generated", entry)
+        logging.error('**error** start_candles_stream late for 20 sec')
+        return False
+
+    async def stop_candles_stream(self, ACTIVE, size):
+        await self.loop.run_in_executor(
+            None, self.iq.stop_candles_one_stream, ACTIVE, size)
+
+    def get_realtime_candles(self, ACTIVE, size, view=False):
+        return self.iq.get_realtime_candles(ACTIVE, size, view)
+
+    # ------------------------------------------------------------------
+    # streams
+
+    def messages(self, name, match=None, maxsize=1000):
+        """Iterate over websocket messages of one name as they arrive.
+
+        The listener is removed when the iterator is closed, e.g. by
+        ``aclose()`` or a break out of ``async for``.
+
+        :param str name: The websocket message name.
+        :param match: (optional) Callable filtering the message dicts.
+        :param int maxsize: The max number of messages buffered for a slow
+            consumer, the oldest ones are dropped past it.
+        """
+        return self.__stream(name, match, maxsize)
+
+    async def __stream(self, name, match, maxsize, body=False):
+        # the streams below return this generator itself rather than
+        # iterate it, so closing theirs unsubscribes at once instead of
+        # when an inner generator is collected
+        entry = self.__subscribe(name, match, maxsize)
+        try:
+            while True:
+                message = await entry[1].get()
+                yield message["msg"] if body else message
+        finally:
+            self.__unsubscribe(name, entry)
+
+    @staticmethod
+    def __candle_match(active_id, size):
+        def match(message):
+            msg = message["msg"]
+            return msg["active_id"] == active_id and int(msg["size"]) == int(size)
+        return match
+
+    def candles(self, ACTIVE, size, maxsize=1000):
+        """Iterate over the live candles of a started candles stream."""
+        match = self.__candle_match(OP_code.ACTIVES[ACTIVE], size)
+        return self.__stream("candle-generated", match, maxsize, body=True)
+
+    def live_deals(self, name, active=None, _type=None, maxsize=1000):
+        """Iterate over live deals, see :meth:`IQ_Option.subscribe_live_deal`.
+
+        :param str name: e.g. "live-deal-binary-option-placed".
+        """
+        active_id = None if active is None else OP_code.ACTIVES[active]
+        active_key, type_key = LIVE_DEAL_KEYS.get(
+            name, ("active_id", "option_type"))
+
+        def match(message):
+            msg = message["msg"]
+            if active_id is not None and msg.get(active_key) != active_id:
+                return False
+            return _type is None or msg.get(type_key) == _type
+        return self.__stream(name, match, maxsize, body=True)
+
+    def position_changes(self, maxsize=1000):
+        """Iterate over the position-changed messages of the balance."""
+        return self.__stream("position-changed", None, maxsize)
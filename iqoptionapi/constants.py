@@ -1,7 +1,106 @@
 ""
 "Module for IQ Option API constants."
-""#~~~need to update~~~
-ACTIVES = {
+""
+
+
+class ActivesDict(dict):
+    """dict name:active_id that keeps a reverse index active_id:name.
+
+    The reverse index answers with the first name (insertion order) that
+    maps to an active_id, the same name list(keys)[list(values).index(id)]
+    would give, in constant time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ActivesDict, self).__init__()
+        self.__names = {}
+        self.update(*args, **kwargs)
+
+    def __rescan(self, active_id):
+        for name, value in self.items():
+            if value == active_id:
+                self.__names[active_id] = name
+                return
+        self.__names.pop(active_id, None)
+
+    def __setitem__(self, name, active_id):
+        if name in self:
+            old_id = self[name]
+            super(ActivesDict, self).__setitem__(name, active_id)
+            if old_id != active_id:
+                # name keeps its old position, rebuild both ids
+                self.__rescan(old_id)
+                self.__rescan(active_id)
+        else:
+            super(ActivesDict, self).__setitem__(name, active_id)
+            if active_id not in self.__names:
+                self.__names[active_id] = name
+
+    def __delitem__(self, name):
+        active_id = self[name]
+        super(ActivesDict, self).__delitem__(name)
+        if self.__names.get(active_id) == name:
+            self.__rescan(active_id)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        for name, active_id in dict(*args, **kwargs).items():
+            self[name] = active_id
+
+    def setdefault(self, name, active_id=None):
+        if name not in self:
+            self[name] = active_id
+        return self[name]
+
+    def pop(self, name, *default):
+        if name not in self:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        active_id = self[name]
+        del self[name]
+        return active_id
+
+    def popitem(self):
+        name, active_id = super(ActivesDict, self).popitem()
+        if self.__names.get(active_id) == name:
+            self.__rescan(active_id)
+        return name, active_id
+
+    def clear(self):
+        super(ActivesDict, self).clear()
+        self.__names.clear()
+
+    def copy(self):
+        return ActivesDict(self)
+
+    def get_name(self, active_id):
+        """Get the asset name of an active_id.
+
+        :raises ValueError: if no asset has this active_id.
+        """
+        try:
+            return self.__names[active_id]
+        except KeyError:
+            raise ValueError("%r is not a known active_id" % (active_id,))
+
+
+def get_active_name(active_id):
+    """Get the asset name of an active_id from ACTIVES.
+
+    :raises ValueError: if no asset has this active_id.
+    """
+    global ACTIVES
+    if not isinstance(ACTIVES, ActivesDict):
+        # ACTIVES was replaced by a plain dict
+        ACTIVES = ActivesDict(ACTIVES)
+    return ACTIVES.get_name(active_id)
+
+#~~~need to update~~~
+ACTIVES = ActivesDict({
 	'EURUSD': 1,
 	'EURGBP': 2,
 	'GBPJPY': 3,
@@ -374,4 +473,4 @@ ACTIVES = {
 	'CAN': 1351,
 	'VIAC': 1352,
 	'TFC': 1353
-}
+})
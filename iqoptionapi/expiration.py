@@ -1,4 +1,5 @@
 # python
+import functools
 import time
 from datetime import datetime, timedelta
 
@@ -12,8 +13,39 @@ def date_to_timestamp(dt):
     return time.mktime(dt.timetuple())
 
 
-def get_expiration_time(timestamp, duration):
-    #
+def _expiration_slots(timestamp):
+    """The 5 one-minute and 50 quarter-hour expiration slots after timestamp.
+
+    Computed from epoch seconds and the local utc offset instead of
+    stepping a datetime minute by minute, see :func:`_minute_slots`.
+    """
+    offset = time.localtime(timestamp).tm_gmtoff
+    # start of the local minute of timestamp
+    minute = int(timestamp // 1) - (int(timestamp // 1) + offset) % 60
+    first = minute + 60 if minute + 60 - timestamp > 30 else minute + 120
+    return list(_minute_slots(minute, first, offset))
+
+
+@functools.lru_cache(maxsize=16)
+def _minute_slots(minute, first, offset):
+    # cached per server minute; the same slots as the stepping loop, which
+    # is still used when the utc offset changes (DST) near the slots
+    # first local quarter hour at least 6 minutes after the minute start
+    quarter = minute + 360
+    quarter += (-(quarter + offset)) % 900
+    slots = [float(first + 60 * i) for i in range(5)] + \
+        [float(quarter + 900 * i) for i in range(50)]
+    # local times repeated by a DST change up to 2 hours back are
+    # ambiguous for mktime, leave those to the loop as well
+    if offset % 60 != 0 or \
+            time.localtime(minute - 7200).tm_gmtoff != offset or \
+            time.localtime(slots[-1]).tm_gmtoff != offset:
+        # any timestamp of the minute on the same side of the 30 s rule
+        slots = _stepped_slots(minute if first == minute + 60 else minute + 59, 50)
+    return tuple(slots)
+
+
+def _stepped_slots(timestamp, idx):
     now_date = datetime.fromtimestamp(timestamp)
     exp_date = now_date.replace(second=0, microsecond=0)
     if (int(date_to_timestamp(exp_date+timedelta(minutes=1)))-timestamp) > 30:
@@ -26,7 +58,6 @@ def get_expiration_time(timestamp, duration):
         exp.append(date_to_timestamp(exp_date))
         exp_date = exp_date+timedelta(minutes=1)
 
-    idx = 50
     index = 0
     now_date = datetime.fromtimestamp(timestamp)
     exp_date = now_date.replace(second=0, microsecond=0)
@@ -35,39 +66,20 @@ def get_expiration_time(timestamp, duration):
             exp.append(date_to_timestamp(exp_date))
             index = index+1
         exp_date = exp_date+timedelta(minutes=1)
+    return exp
 
-    remaning = []
-
-    for t in exp:
-        remaning.append(int(t)-int(time.time()))
-
-    close = [abs(x-60*duration) for x in remaning]
 
-    return int(exp[close.index(min(close))]), int(close.index(min(close)))
+def get_expiration_time(timestamp, duration):
+    exp = _expiration_slots(timestamp)
+    now = int(time.time())
+    close = [abs(int(t)-now-60*duration) for t in exp]
+    index = close.index(min(close))
+    return int(exp[index]), int(index)
 
 
 def get_remaning_time(timestamp):
-    now_date = datetime.fromtimestamp(timestamp)
-    exp_date = now_date.replace(second=0, microsecond=0)
-    if (int(date_to_timestamp(exp_date+timedelta(minutes=1)))-timestamp) > 30:
-        exp_date = exp_date+timedelta(minutes=1)
-
-    else:
-        exp_date = exp_date+timedelta(minutes=2)
-    exp = []
-    for _ in range(5):
-        exp.append(date_to_timestamp(exp_date))
-        exp_date = exp_date+timedelta(minutes=1)
-    idx = 11
-    index = 0
-    now_date = datetime.fromtimestamp(timestamp)
-    exp_date = now_date.replace(second=0, microsecond=0)
-    while index < idx:
-        if int(exp_date.strftime("%M")) % 15 == 0 and (int(date_to_timestamp(exp_date))-int(timestamp)) > 60*5:
-            exp.append(date_to_timestamp(exp_date))
-            index = index+1
-        exp_date = exp_date+timedelta(minutes=1)
-
+    exp = _expiration_slots(timestamp)[:5+11]
+    now = int(time.time())
     remaning = []
 
     for idx, t in enumerate(exp):
@@ -75,6 +87,6 @@ def get_remaning_time(timestamp):
             dr = 15*(idx-4)
         else:
             dr = idx+1
-        remaning.append((dr, int(t)-int(time.time())))
+        remaning.append((dr, int(t)-now))
 
     return remaning
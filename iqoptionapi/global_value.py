@@ -1,14 +1,13 @@
 #python
+# kept for import compatibility only: SSID, balance_id and the websocket
+# flags now live on each IQOptionAPI instance, nothing here is updated
 check_websocket_if_connect=None
-# try fix ssl.SSLEOFError: EOF occurred in violation of protocol (_ssl.c:2361)
-ssl_Mutual_exclusion=False#mutex read write
-#if false websocket can sent self.websocket.send(data)
-#else can not sent self.websocket.send(data)
-ssl_Mutual_exclusion_write=False#if thread wirite 
+ssl_Mutual_exclusion=False
+ssl_Mutual_exclusion_write=False
 
 SSID=None
 
 check_websocket_if_error=False
 websocket_error_reason=None
 
-balance_id=None
\ No newline at end of file
+balance_id=None
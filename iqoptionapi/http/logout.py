@@ -14,7 +14,7 @@ class Logout(Resource):
 
         :returns: The instance of :class:`requests.Response`.
         """
-        return self.api.send_http_request_v2(method="POST", url="https://auth.iqoption.com/api/v1.0/logout",data=data, headers=headers)
+        return self.api.send_http_request_v2(method="POST", url=self.api.auth_url + "/v1.0/logout",data=data, headers=headers)
 
     def __call__(self):
        
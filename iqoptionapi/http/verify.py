@@ -15,7 +15,7 @@ class Verify(Resource):
 
         :returns: The instance of :class:`requests.Response`.
         """
-        return self.api.send_http_request_v2(method="POST", url="https://auth.iqoption.com/api/v2/verify/2fa",data=json.dumps(data), headers=headers)
+        return self.api.send_http_request_v2(method="POST", url=self.api.auth_url + "/v2/verify/2fa",data=json.dumps(data), headers=headers)
 
     def __call__(self, sms_received, token_sms):
         """Method to get IQ Option API verify http request.
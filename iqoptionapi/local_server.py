@@ -0,0 +1,515 @@
+"""Module for a local IQ Option stand-in server.
+
+It speaks the part of the protocol iqoptionapi uses, so hot paths can be
+benchmarked and regression tested without the real broker::
+
+    server = LocalServer(actives=10, tick_rate=50)
+    server.start()
+    iq = IQ_Option("user", "password", host=server.host)
+    iq.connect()
+
+or from a shell: ``python -m iqoptionapi.local_server --port 8080``.
+
+HTTP: login, 2fa verify and logout always succeed. Websocket: ssid, timeSync,
+heartbeat, get-candles, get-balances, candle-generated subscriptions,
+binary-options.open-option (option, position-changed, socket-option-closed)
+and digital-options.place-digital-option. Every sendMessage and anything
+else gets a successful "result" first.
+"""
+
+import argparse
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import iqoptionapi.constants as OP_code
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WEBSOCKET_PATH = "/echo/websocket"
+
+HTTP_REASONS = {200: "OK", 101: "Switching Protocols", 404: "Not Found"}
+
+
+class WebsocketConnection(object):
+    """Server side of one websocket, text frames only."""
+
+    def __init__(self, rfile, sock):
+        self.rfile = rfile
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __read(self, size):
+        data = self.rfile.read(size)
+        if len(data) < size:
+            raise EOFError
+        return data
+
+    def __frame(self):
+        head, length = struct.unpack("!BB", self.__read(2))
+        if length & 0x7f == 126:
+            size = struct.unpack("!H", self.__read(2))[0]
+        elif length & 0x7f == 127:
+            size = struct.unpack("!Q", self.__read(8))[0]
+        else:
+            size = length & 0x7f
+        mask = self.__read(4) if length & 0x80 else None
+        payload = self.__read(size)
+        if mask is not None:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return head & 0x80, head & 0x0f, payload
+
+    def recv(self):
+        """:returns: The next text message or None once closed."""
+        parts = []
+        while True:
+            try:
+                fin, opcode, payload = self.__frame()
+            except (EOFError, OSError, struct.error):
+                self.closed = True
+                return None
+            if opcode == 0x8:
+                self.write(0x8, payload[:2])
+                self.closed = True
+                return None
+            if opcode == 0x9:
+                self.write(0xa, payload)
+                continue
+            if opcode == 0xa:
+                continue
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    def write(self, opcode, payload):
+        size = len(payload)
+        if size < 126:
+            head = struct.pack("!BB", 0x80 | opcode, size)
+        elif size < 1 << 16:
+            head = struct.pack("!BBH", 0x80 | opcode, 126, size)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127, size)
+        with self.lock:
+            if self.closed:
+                return False
+            try:
+                self.sock.sendall(head + payload)
+            except OSError:
+                self.closed = True
+                return False
+        return True
+
+    def send(self, text):
+        return self.write(0x1, text.encode("utf-8"))
+
+
+class Session(object):
+    """One logged in websocket client."""
+
+    def __init__(self, server, connection):
+        self.server = server
+        self.connection = connection
+        # (active_id, size) of candle-generated subscriptions
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def send(self, name, msg, request_id=None, **extra):
+        message = {"name": name, "msg": msg}
+        if request_id is not None:
+            message["request_id"] = request_id
+            message["status"] = 2000
+        message.update(extra)
+        if self.connection.send(json.dumps(message)):
+            self.server.count("frames_out")
+
+    def run(self):
+        self.send("timeSync", self.server.now_ms())
+        while True:
+            text = self.connection.recv()
+            if text is None:
+                return
+            self.server.count("frames_in")
+            try:
+                self.handle(json.loads(text))
+            except Exception as e:  # pylint: disable=broad-except
+                logger = logging.getLogger(__name__)
+                logger.error("stand-in server: " + repr(e) + " " + text)
+
+    def handle(self, message):
+        name = message.get("name")
+        request_id = message.get("request_id")
+        msg = message.get("msg")
+        if name == "ssid":
+            self.send("profile", self.server.profile())
+            self.send("balances", self.server.balances())
+        elif name == "heartbeat":
+            pass
+        elif name == "subscribeMessage":
+            self.on_subscribe(msg, True)
+        elif name == "unsubscribeMessage":
+            self.on_subscribe(msg, False)
+        elif name == "sendMessage":
+            self.server.count("requests")
+            # acknowledged first, the answer if any follows
+            self.send("result", {"success": True}, request_id)
+            handler = self.requests.get(msg.get("name"))
+            if handler is not None:
+                handler(self, request_id, msg.get("body", {}))
+        else:
+            self.send("result", {"success": True}, request_id)
+
+    def on_subscribe(self, msg, subscribe):
+        if msg.get("name") != "candle-generated":
+            return
+        filters = msg["params"]["routingFilters"]
+        key = (int(filters["active_id"]), int(filters["size"]))
+        with self.lock:
+            if subscribe:
+                self.subscriptions.add(key)
+            else:
+                self.subscriptions.discard(key)
+
+    def on_get_candles(self, request_id, body):
+        candles = self.server.history(
+            int(body["active_id"]), int(body["size"]), int(body["to"]),
+            int(body["count"]))
+        self.send("candles", {"candles": candles}, request_id)
+
+    def on_get_balances(self, request_id, body):
+        self.send("balances", self.server.balances(), request_id)
+
+    def on_open_option(self, request_id, body):
+        option_id = next(self.server.ids)
+        now = int(self.server.now_ms() / 1000)
+        option = {"id": option_id, "active_id": body["active_id"],
+                  "price": body["price"], "direction": body["direction"],
+                  "exp": body["expired"], "created": now,
+                  "value": self.server.price(body["active_id"])}
+        self.send("option", option, request_id)
+        self.send("socket-option-opened", {"id": option_id})
+        self.send("position-changed",
+                  {"source": "binary-options", "external_id": option_id,
+                   "status": "open"},
+                  microserviceName="portfolio")
+        self.server.schedule(self.server.option_duration,
+                             self.close_option, option)
+
+    def close_option(self, option):
+        price = self.server.price(option["active_id"])
+        amount = float(option["price"])
+        up = price > option["value"]
+        if price == option["value"]:
+            win, win_amount = "equal", amount
+        elif up == (option["direction"] == "call"):
+            win, win_amount = "win", amount * (1 + self.server.profit)
+        else:
+            win, win_amount = "loose", 0
+        self.send("position-changed",
+                  {"source": "binary-options", "external_id": option["id"],
+                   "status": "closed", "close_reason": win,
+                   "close_profit": win_amount},
+                  microserviceName="portfolio")
+        self.send("socket-option-closed",
+                  {"id": option["id"], "win": win, "sum": amount,
+                   "win_amount": win_amount, "value": price})
+
+    def on_place_digital_option(self, request_id, body):
+        order_id = next(self.server.ids)
+        self.send("digital-option-placed", {"id": order_id}, request_id)
+        self.send("position-changed",
+                  {"source": "digital-options", "status": "open",
+                   "instrument_id": body["instrument_id"],
+                   "raw_event": {"order_ids": [order_id]}},
+                  microserviceName="portfolio")
+
+    requests = {
+        "get-candles": on_get_candles,
+        "get-balances": on_get_balances,
+        "binary-options.open-option": on_open_option,
+        "digital-options.place-digital-option": on_place_digital_option,
+    }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """HTTP and websocket upgrade on one port."""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline(65537).decode("latin-1")
+            if not line.strip():
+                return
+            method, path = line.split(" ")[:2]
+            headers = {}
+            while True:
+                header = self.rfile.readline(65537).decode("latin-1")
+                if header in ("\r\n", "\n", ""):
+                    break
+                key, value = header.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+            if headers.get("upgrade", "").lower() == "websocket":
+                self.upgrade(path, headers)
+                return
+            body = self.rfile.read(int(headers.get("content-length", 0)))
+            self.respond(*self.server.stand_in.http(method, path, body))
+            if headers.get("connection", "").lower() == "close":
+                return
+
+    def respond(self, status, data, headers=()):
+        body = json.dumps(data).encode("utf-8")
+        lines = ["HTTP/1.1 %d %s" % (status, HTTP_REASONS.get(status, "")),
+                 "Content-Type: application/json",
+                 "Content-Length: %d" % len(body)]
+        lines.extend(headers)
+        self.wfile.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") +
+                         body)
+
+    def upgrade(self, path, headers):
+        if path.split("?")[0] != WEBSOCKET_PATH:
+            self.respond(404, {"message": "not found"})
+            return
+        accept = base64.b64encode(hashlib.sha1(
+            (headers["sec-websocket-key"] + WEBSOCKET_GUID).encode("latin-1")
+        ).digest()).decode("latin-1")
+        self.wfile.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                          "Upgrade: websocket\r\n"
+                          "Connection: Upgrade\r\n"
+                          "Sec-WebSocket-Accept: " + accept + "\r\n\r\n"
+                          ).encode("latin-1"))
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = Session(self.server.stand_in,
+                          WebsocketConnection(self.rfile, self.request))
+        self.server.stand_in.add_session(session)
+        try:
+            session.run()
+        finally:
+            self.server.stand_in.remove_session(session)
+
+
+class ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalServer(object):
+    """Stand-in IQ Option server generating synthetic ticks."""
+
+    def __init__(self, address="127.0.0.1", port=0, actives=10, tick_rate=10,
+                 option_duration=1.0, profit=0.8, seed=None):
+        """
+        :param str address: The address to listen on.
+        :param int port: The port to listen on, 0 picks a free one.
+        :param int actives: The number of actives ticking, the first ones
+            of :data:`iqoptionapi.constants.ACTIVES`.
+        :param float tick_rate: Ticks per second of every active.
+        :param float option_duration: Seconds until a bought option closes.
+        :param float profit: The payout of a winning option.
+        """
+        self.address = address
+        self.port = port
+        self.active_ids = sorted(set(OP_code.ACTIVES.values()))[:actives]
+        self.tick_rate = tick_rate
+        self.option_duration = option_duration
+        self.profit = profit
+        self.random = random.Random(seed)
+        self.prices = {active_id: 1.0 + self.random.random()
+                       for active_id in self.active_ids}
+        # (active_id, size) -> current candle
+        self.candles = {}
+        self.sessions = []
+        # heap of (time, seq, callback, argument) run by the tick thread
+        self.timers = []
+        self.ids = itertools.count(1000000)
+        self.stats = {"connections": 0, "frames_in": 0, "frames_out": 0,
+                      "requests": 0, "ticks": 0}
+        self.lock = threading.Lock()
+        self.server = None
+        self.running = False
+
+    @property
+    def host(self):
+        """The host argument of IQ_Option/IQOptionAPI for this server."""
+        return "http://%s:%d" % (self.address, self.port)
+
+    def start(self):
+        self.server = ThreadingServer((self.address, self.port),
+                                      RequestHandler)
+        self.server.stand_in = self
+        self.port = self.server.server_address[1]
+        self.running = True
+        for target in (self.server.serve_forever, self.__tick_loop):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.stats[name] += value
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def add_session(self, session):
+        with self.lock:
+            self.sessions.append(session)
+            self.stats["connections"] += 1
+
+    def remove_session(self, session):
+        with self.lock:
+            self.sessions.remove(session)
+
+    def schedule(self, delay, callback, argument):
+        with self.lock:
+            heapq.heappush(self.timers, (time.time() + delay,
+                                         next(self.ids), callback, argument))
+
+    def __run_timers(self, now):
+        while True:
+            with self.lock:
+                if not self.timers or self.timers[0][0] > now:
+                    return
+                _, _, callback, argument = heapq.heappop(self.timers)
+            callback(argument)
+
+    @staticmethod
+    def now_ms():
+        return int(time.time() * 1000)
+
+    # --------------------------------------------------------- http
+
+    def http(self, method, path, body):
+        """:returns: (status, json data, extra header lines)."""
+        path = path.split("?")[0]
+        if path.endswith("/login"):
+            ssid = "%032x" % self.random.getrandbits(128)
+            return 200, {"code": "success", "ssid": ssid}, [
+                "Set-Cookie: ssid=" + ssid + "; Path=/"]
+        if path.endswith("/logout") or path.endswith("/events"):
+            return 200, {"code": "success"}, []
+        if path.endswith("/2fa"):
+            return 200, {"code": "success", "token": "stand-in"}, []
+        return 404, {"code": "not_found", "message": path}, []
+
+    # ------------------------------------------------------- market
+
+    def profile(self):
+        return {"user_id": 1, "name": "stand-in", "currency": "USD",
+                "balance": 10000, "balance_id": 2, "balance_type": 4,
+                "balances": self.balances()}
+
+    @staticmethod
+    def balances():
+        return [{"id": 1, "type": 1, "amount": 0, "currency": "USD"},
+                {"id": 2, "type": 4, "amount": 10000, "currency": "USD"}]
+
+    def price(self, active_id):
+        return self.prices.get(int(active_id), 1.0)
+
+    def history(self, active_id, size, to, count):
+        """Synthetic closed candles ending before to, stable per active."""
+        rnd = random.Random(active_id * 1000003 + size)
+        close = self.price(active_id)
+        end = to - to % size
+        candles = []
+        for i in range(count):
+            from_ = end - (i + 1) * size
+            open_ = close * (1 + rnd.uniform(-0.001, 0.001))
+            candles.append({"id": from_ // size, "from": from_,
+                            "to": from_ + size, "open": open_,
+                            "close": close, "min": min(open_, close),
+                            "max": max(open_, close), "volume": 0})
+            close = open_
+        candles.reverse()
+        return candles
+
+    def __tick(self, now):
+        at = int(now * 1e9)
+        with self.lock:
+            sessions = list(self.sessions)
+        wanted = {}
+        for session in sessions:
+            with session.lock:
+                for key in session.subscriptions:
+                    wanted.setdefault(key, []).append(session)
+        for active_id in self.active_ids:
+            self.prices[active_id] *= 1 + self.random.gauss(0, 0.0002)
+        for (active_id, size), subscribers in wanted.items():
+            price = self.price(active_id)
+            from_ = int(now) - int(now) % size
+            candle = self.candles.get((active_id, size))
+            if candle is None or candle["from"] != from_:
+                candle = {"active_id": active_id, "size": size,
+                          "id": from_ // size, "from": from_,
+                          "to": from_ + size, "open": price, "min": price,
+                          "max": price, "volume": 0}
+                self.candles[(active_id, size)] = candle
+            candle.update({"at": at, "close": price, "ask": price,
+                           "bid": price, "phase": "T",
+                           "min": min(candle["min"], price),
+                           "max": max(candle["max"], price)})
+            for session in subscribers:
+                session.send("candle-generated", candle)
+        self.count("ticks")
+
+    def __tick_loop(self):
+        interval = 1.0 / self.tick_rate
+        next_tick = time.time()
+        next_sync = next_tick
+        while self.running:
+            now = time.time()
+            if now >= next_sync:
+                with self.lock:
+                    sessions = list(self.sessions)
+                for session in sessions:
+                    session.send("timeSync", self.now_ms())
+                    session.send("heartbeat", self.now_ms())
+                next_sync = now + 1
+            self.__tick(now)
+            self.__run_timers(now)
+            next_tick += interval
+            delay = next_tick - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # running behind, don't try to catch up
+                next_tick = time.time()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local IQ Option stand-in server.")
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--actives", type=int, default=10)
+    parser.add_argument("--tick-rate", type=float, default=10)
+    parser.add_argument("--option-duration", type=float, default=1.0)
+    args = parser.parse_args()
+    server = LocalServer(args.address, args.port, args.actives,
+                         args.tick_rate, args.option_duration).start()
+    print("listening on " + server.host)
+    try:
+        while True:
+            time.sleep(10)
+            print(server.get_stats())
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
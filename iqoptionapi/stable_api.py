@@ -1,17 +1,17 @@
 # python
 from iqoptionapi.api import IQOptionAPI
+from iqoptionapi.ws.callback_pool import CallbackPool
 import iqoptionapi.constants as OP_code
 import iqoptionapi.country_id as Country
 import threading
 import time, json
 import logging
 import operator
-import iqoptionapi.global_value as global_value
+import queue
 from collections import defaultdict
 from collections import deque
 from iqoptionapi.expiration import get_expiration_time, get_remaning_time
 from datetime import datetime, timedelta
-from random import randint
 
 
 def nested_dict(n, type):
@@ -24,10 +24,11 @@ def nested_dict(n, type):
 class IQ_Option:
     __version__ = "6.8.9.1"
 
-    def __init__(self, email, password, active_account_type="PRACTICE"):
+    def __init__(self, email, password, active_account_type="PRACTICE", host="iqoption.com"):
         self.size = [1, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800,
                      3600, 7200, 14400, 28800, 43200, 86400, 604800, 2592000]
         self.email = email
+        self.host = host
         self.password = password
         self.suspend = 0.5
         self.thread = None
@@ -37,8 +38,6 @@ class IQ_Option:
         self.subscribe_indicators = []
         # for digit
         self.get_digital_spot_profit_after_sale_data = nested_dict(2, int)
-        self.get_realtime_strike_list_temp_data = {}
-        self.get_realtime_strike_list_temp_expiration = 0
         self.SESSION_HEADER = {
             "User-Agent": r"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/66.0.3359.139 Safari/537.36"}
         self.SESSION_COOKIE = {}
@@ -52,6 +51,35 @@ class IQ_Option:
     def get_server_timestamp(self):
         return self.api.timesync.server_timestamp
 
+    def wait_server_timestamp(self, timeout=None):
+        # server timestamp after the next timeSync frame, None on timeout
+        return self.api.timesync.wait(timeout)
+
+    def get_time_sync_stats(self):
+        # {"offset", "drift", "latency", "samples"} of the server clock model
+        return self.api.timesync.stats()
+
+    def get_message_stats(self):
+        # name:{"count":messages received,"time":seconds spent in handler}
+        try:
+            return self.api.websocket_client.get_message_stats()
+        except:
+            return {}
+
+    def get_frame_stats(self):
+        # frames/bytes dropped unparsed vs decoded
+        try:
+            return self.api.websocket_client.get_frame_stats()
+        except:
+            return {}
+
+    def register_message_handler(self, name, handler):
+        # handler(message) replaces the built-in handling of "name"
+        self.api.register_message_handler(name, handler)
+
+    def unregister_message_handler(self, name):
+        self.api.unregister_message_handler(name)
+
     def re_subscribe_stream(self):
         try:
             for ac in self.subscribe_candle:
@@ -77,6 +105,7 @@ class IQ_Option:
         self.SESSION_COOKIE = cookie
 
     def connect(self, sms_code=None):
+        old_api = getattr(self, "api", None)
         try:
             self.api.close()
         except:
@@ -84,7 +113,10 @@ class IQ_Option:
             # logging.error('**warning** self.api.close() fail')
 
         self.api = IQOptionAPI(
-            "iqoption.com", self.email, self.password)
+            self.host, self.email, self.password)
+        if old_api is not None:
+            # keep ssid, balance and stream state of this account
+            self.api.take_state(old_api)
         check = None
 
         # 2FA--
@@ -105,11 +137,12 @@ class IQ_Option:
             self.re_subscribe_stream()
 
             # ---------for async get name: "position-changed", microserviceName
-            while global_value.balance_id == None:
-                pass
+            if not self.api.balance_id_ready.wait(30):
+                logging.error('**warning** connect got no profile for 30 sec')
+                return False, "no profile received"
 
             self.position_change_all(
-                "subscribeMessage", global_value.balance_id)
+                "subscribeMessage", self.api.balance_id)
 
             self.order_changed_all("subscribeMessage")
             self.api.setOptions(1, True)
@@ -156,7 +189,7 @@ class IQ_Option:
     def check_connect(self):
         # True/False
 
-        if global_value.check_websocket_if_connect == 0:
+        if self.api.check_websocket_if_connect == 0:
             return False
         else:
             return True
@@ -171,24 +204,24 @@ class IQ_Option:
         self.get_ALL_Binary_ACTIVES_OPCODE()
         # crypto /dorex/cfd
         self.instruments_input_all_in_ACTIVES()
-        dicc = {}
-        for lis in sorted(OP_code.ACTIVES.items(), key=operator.itemgetter(1)):
-            dicc[lis[0]] = lis[1]
-        OP_code.ACTIVES = dicc
+        OP_code.ACTIVES = OP_code.ActivesDict(
+            sorted(OP_code.ACTIVES.items(), key=operator.itemgetter(1)))
 
     def get_name_by_activeId(self, activeId):
+        try:
+            return OP_code.get_active_name(activeId)
+        except ValueError:
+            pass
         info = self.get_financial_information(activeId)
         try:
             return info["msg"]["data"]["active"]["name"]
         except:
             return None
 
-    def get_financial_information(self, activeId):
-        self.api.financial_information = None
-        self.api.get_financial_information(activeId)
-        while self.api.financial_information == None:
-            pass
-        return self.api.financial_information
+    def get_financial_information(self, activeId, timeout=None):
+        return self.api.send_request(
+            self.api.get_financial_information, activeId,
+            response_names=("financial-information",)).result(timeout)
 
     def get_leader_board(self, country, from_position, to_position, near_traders_count, user_country_id=0, near_traders_country_count=0, top_country_count=0, top_count=0, top_type=2):
         self.api.leaderboard_deals_client = None
@@ -201,20 +234,30 @@ class IQ_Option:
             pass
         return self.api.leaderboard_deals_client
 
-    def get_instruments(self, type):
+    def get_instruments(self, type, timeout=None):
         # type="crypto"/"forex"/"cfd"
+        # timeout: max seconds to retry, None if not loaded in time
+        return self.api.market_data.get(
+            ("instruments", type), lambda: self.load_instruments(type, timeout))
+
+    def load_instruments(self, type, timeout=None):
         time.sleep(self.suspend)
-        self.api.instruments = None
-        while self.api.instruments == None:
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = 10 if deadline is None else min(10, deadline - time.time())
+            if wait <= 0:
+                logging.error('**warning** get_instruments late ' + str(timeout) + ' sec')
+                return None
             try:
-                self.api.get_instruments(type)
-                start = time.time()
-                while self.api.instruments == None and time.time() - start < 10:
-                    pass
+                future = self.api.send_request(
+                    self.api.get_instruments, type,
+                    response_names=("instruments",))
+                return future.result(wait)["msg"]
+            except TimeoutError:
+                self.api.pending_requests.discard(future.request_id)
             except:
                 logging.error('**error** api.get_instruments need reconnect')
                 self.connect()
-        return self.api.instruments
 
     def instruments_input_to_ACTIVES(self, type):
         instruments = self.get_instruments(type)
@@ -235,7 +278,9 @@ class IQ_Option:
 
     # _________________________self.api.get_api_option_init_all() wss______________________
     def get_all_init(self):
+        return self.api.market_data.get("init", self.load_all_init)
 
+    def load_all_init(self):
         while True:
             self.api.api_option_init_all_result = None
             while True:
@@ -263,6 +308,9 @@ class IQ_Option:
                 pass
 
     def get_all_init_v2(self):
+        return self.api.market_data.get("init_v2", self.load_all_init_v2)
+
+    def load_all_init_v2(self):
         self.api.api_option_init_all_result_v2 = None
 
         if self.check_connect() == False:
@@ -283,46 +331,17 @@ class IQ_Option:
     def get_all_open_time(self):
         # for binary option turbo and binary
         OPEN_TIME = nested_dict(3, dict)
-        binary_data = self.get_all_init_v2()
-        binary_list = ["binary", "turbo"]
-        for option in binary_list:
-            if option in binary_data:
-                for actives_id in binary_data[option]["actives"]:
-                    active = binary_data[option]["actives"][actives_id]
-                    name = str(active["name"]).split(".")[1]
-                    if active["enabled"] == True:
-                        if active["is_suspended"] == True:
-                            OPEN_TIME[option][name]["open"] = False
-                        else:
-                            OPEN_TIME[option][name]["open"] = True
-                    else:
-                        OPEN_TIME[option][name]["open"] = active["enabled"]
-
-        # for digital
-        digital_data = self.get_digital_underlying_list_data()["underlying"]
-        for digital in digital_data:
-            name = digital["underlying"]
-            schedule = digital["schedule"]
-            OPEN_TIME["digital"][name]["open"] = False
-            for schedule_time in schedule:
-                start = schedule_time["open"]
-                end = schedule_time["close"]
-                if start < time.time() < end:
-                    OPEN_TIME["digital"][name]["open"] = True
-
-        # for OTHER
-        instrument_list = ["cfd", "forex", "crypto"]
-        for instruments_type in instrument_list:
-            ins_data = self.get_instruments(instruments_type)["instruments"]
-            for detail in ins_data:
-                name = detail["name"]
-                schedule = detail["schedule"]
-                OPEN_TIME[instruments_type][name]["open"] = False
-                for schedule_time in schedule:
-                    start = schedule_time["open"]
-                    end = schedule_time["close"]
-                    if start < time.time() < end:
-                        OPEN_TIME[instruments_type][name]["open"] = True
+        self.get_all_init_v2()
+        for (option, name), is_open in list(self.api.market_data.opens.items()):
+            OPEN_TIME[option][name]["open"] = is_open
+
+        # for digital and OTHER, from the schedule index
+        self.get_digital_underlying_list_data()
+        for instruments_type in ["cfd", "forex", "crypto"]:
+            self.get_instruments(instruments_type)
+        open_map = self.api.market_data.schedules.open_map(at=time.time())
+        for (option, name), is_open in open_map.items():
+            OPEN_TIME[option][name]["open"] = is_open
 
         return OPEN_TIME
 
@@ -343,25 +362,64 @@ class IQ_Option:
         return detail
 
     def get_all_profit(self):
+        # payouts of the init data, kept current by commission-changed
+        self.get_all_init()
         all_profit = nested_dict(2, dict)
-        init_info = self.get_all_init()
-        for actives in init_info["result"]["turbo"]["actives"]:
-            name = init_info["result"]["turbo"]["actives"][actives]["name"]
-            name = name[name.index(".") + 1:len(name)]
-            all_profit[name]["turbo"] = (
-                100.0 -
-                init_info["result"]["turbo"]["actives"][actives]["option"]["profit"][
-                    "commission"]) / 100.0
-
-        for actives in init_info["result"]["binary"]["actives"]:
-            name = init_info["result"]["binary"]["actives"][actives]["name"]
-            name = name[name.index(".") + 1:len(name)]
-            all_profit[name]["binary"] = (
-                100.0 -
-                init_info["result"]["binary"]["actives"][actives]["option"]["profit"][
-                    "commission"]) / 100.0
+        for (option, name), profit in list(self.api.market_data.profits.items()):
+            if option in ("turbo", "binary"):
+                all_profit[name][option] = profit
         return all_profit
 
+    def get_profit(self, ACTIVES, option="turbo"):
+        # payout like 0.82 from the cache, None if unknown
+        if not self.api.market_data.fresh("init"):
+            self.get_all_init()
+        return self.api.market_data.get_profit(ACTIVES, option)
+
+    def is_asset_open(self, ACTIVES, option="turbo", at=None, timeout=None):
+        # binary/turbo open status from the cache, the schedule index for
+        # digital/cfd/forex/crypto, None if unknown
+        # timeout: max seconds to load cfd/forex/crypto instruments
+        if option in ("binary", "turbo"):
+            if not self.api.market_data.fresh("init_v2"):
+                self.get_all_init_v2()
+            return self.api.market_data.is_open(ACTIVES, option)
+        return self.get_schedules(option, timeout).is_open(option, ACTIVES, at)
+
+    def get_open_assets(self, option, at=None):
+        # names of the option type open at at (now by default)
+        if option in ("binary", "turbo"):
+            if not self.api.market_data.fresh("init_v2"):
+                self.get_all_init_v2()
+            opens = self.api.market_data.opens
+        else:
+            opens = self.get_schedules(option).open_map(option, at)
+        return [name for (opt, name), is_open in list(opens.items())
+                if opt == option and is_open]
+
+    def get_next_open_time(self, ACTIVES, option, at=None):
+        # timestamp the next session of a digital/cfd/forex/crypto opens
+        return self.get_schedules(option).next_open(option, ACTIVES, at)
+
+    def get_next_close_time(self, ACTIVES, option, at=None):
+        # timestamp the current (or next) session closes
+        return self.get_schedules(option).next_close(option, ACTIVES, at)
+
+    def get_schedules(self, option, timeout=None):
+        # the schedule index, with the payload of option loaded
+        # timeout: max seconds to load cfd/forex/crypto instruments, the
+        # index then answers None for the assets it does not know
+        if option == "digital":
+            if not self.api.market_data.fresh("underlying"):
+                self.get_digital_underlying_list_data()
+        elif not self.api.market_data.fresh(("instruments", option)):
+            self.get_instruments(option, timeout)
+        return self.api.market_data.schedules
+
+    def set_market_data_ttl(self, ttl):
+        # seconds init data/instruments are reused, 0 always refetches
+        self.api.market_data.ttl = ttl
+
     # ----------------------------------------
 
     # ______________________________________self.api.getprofile() https________________________________
@@ -387,11 +445,11 @@ class IQ_Option:
     def get_currency(self):
         balances_raw = self.get_balances()
         for balance in balances_raw["msg"]:
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.api.balance_id:
                 return balance["currency"]
 
     def get_balance_id(self):
-        return global_value.balance_id
+        return self.api.balance_id
 
     """ def get_balance(self):
         self.api.profile.balance = None
@@ -410,21 +468,19 @@ class IQ_Option:
 
         balances_raw = self.get_balances()
         for balance in balances_raw["msg"]:
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.api.balance_id:
                 return balance["amount"]
 
-    def get_balances(self):
-        self.api.balances_raw = None
-        self.api.get_balances()
-        while self.api.balances_raw == None:
-            pass
-        return self.api.balances_raw
+    def get_balances(self, timeout=None):
+        return self.api.send_request(
+            self.api.get_balances,
+            response_names=("balances",)).result(timeout)
 
     def get_balance_mode(self):
         # self.api.profile.balance_type=None
         profile = self.get_profile_ansyc()
         for balance in profile.get("balances"):
-            if balance["id"] == global_value.balance_id:
+            if balance["id"] == self.api.balance_id:
                 if balance["type"] == 1:
                     return "REAL"
                 elif balance["type"] == 4:
@@ -456,11 +512,11 @@ class IQ_Option:
 
     def change_balance(self, Balance_MODE):
         def set_id(b_id):
-            if global_value.balance_id != None:
+            if self.api.balance_id != None:
                 self.position_change_all(
-                    "unsubscribeMessage", global_value.balance_id)
+                    "unsubscribeMessage", self.api.balance_id)
 
-            global_value.balance_id = b_id
+            self.api.balance_id = b_id
 
             self.position_change_all("subscribeMessage", b_id)
 
@@ -494,21 +550,168 @@ class IQ_Option:
     # _______________________        CANDLE      _____________________________
     # ________________________self.api.getcandles() wss________________________
 
-    def get_candles(self, ACTIVES, interval, count, endtime):
-        self.api.candles.candles_data = None
+    def get_candles(self, ACTIVES, interval, count, endtime, timeout=None):
         while True:
             try:
-                self.api.getcandles(
-                    OP_code.ACTIVES[ACTIVES], interval, count, endtime)
-                while self.check_connect and self.api.candles.candles_data == None:
-                    pass
-                if self.api.candles.candles_data != None:
-                    break
+                future = self.api.send_request(
+                    self.api.getcandles, OP_code.ACTIVES[ACTIVES],
+                    interval, count, endtime, response_names=("candles",))
+                return future.result(timeout)["msg"]["candles"]
+            except TimeoutError:
+                self.api.pending_requests.discard(future.request_id)
+                logging.error('**warning** get_candles late ' + str(timeout) + ' sec')
+                return None
             except:
                 logging.error('**error** get_candles need reconnect')
                 self.connect()
 
-        return self.api.candles.candles_data
+    def get_candles_many(self, series, timeout=None):
+        """Request many candle series at once.
+
+        All requests are sent before any reply is awaited and the replies
+        are matched by request_id, so N series take about one round trip.
+
+        :param series: list of (ACTIVES, interval, count, endtime).
+        :param timeout: (optional) The max seconds to wait for all of them.
+
+        :returns: generator of (item of series, candles) in completion
+            order, candles is None for a failed or late request.
+
+        Like get_candles it reconnects when the socket is closed, and after
+        a call where no request got an answer.
+        """
+        series = list(series)
+        if not self.check_connect():
+            logging.error('**error** get_candles_many need reconnect')
+            self.connect()
+        done = queue.Queue()
+        pending = {}
+        answered = 0
+        try:
+            try:
+                self.__request_candles(series, done, pending)
+            except:
+                # the socket closed after the check, resend once
+                logging.error('**error** get_candles_many need reconnect')
+                for request_id in pending:
+                    self.api.pending_requests.discard(request_id)
+                pending.clear()
+                self.connect()
+                done = queue.Queue()
+                self.__request_candles(series, done, pending)
+            deadline = None if timeout is None else time.time() + timeout
+            while pending:
+                wait = None if deadline is None else max(0, deadline - time.time())
+                try:
+                    future = done.get(timeout=wait)
+                except queue.Empty:
+                    logging.error('**warning** get_candles_many late ' + str(timeout) + ' sec')
+                    break
+                item = pending.pop(future.request_id)
+                if future.exception is not None:
+                    yield item, None
+                else:
+                    answered += 1
+                    yield item, future.message["msg"]["candles"]
+            for request_id, item in list(pending.items()):
+                del pending[request_id]
+                self.api.pending_requests.discard(request_id)
+                yield item, None
+        finally:
+            # stopped early or send failed: forget what is still in flight
+            for request_id in pending:
+                self.api.pending_requests.discard(request_id)
+        if series and not answered:
+            # nothing came back, the connection is most likely dead
+            logging.error('**error** get_candles_many need reconnect')
+            self.connect()
+
+    def __request_candles(self, series, done, pending):
+        for item in series:
+            ACTIVES, interval, count, endtime = item
+            future = self.api.send_request(
+                self.api.getcandles, OP_code.ACTIVES[ACTIVES],
+                interval, count, endtime, response_names=("candles",))
+            pending[future.request_id] = item
+            future.add_done_callback(done.put)
+
+    def get_candles_range(self, ACTIVES, interval, start, end, consumer=None,
+                          page_size=1000, max_in_flight=4, timeout=30, retries=2):
+        """Backfill all candles of a time window, page by page.
+
+        The window is split into pages of page_size candles and up to
+        max_in_flight page requests are kept in flight. Candles repeated
+        on page boundaries are only delivered once.
+
+        :param ACTIVES: The active name.
+        :param int interval: The candle size in seconds.
+        :param start: The window start timestamp.
+        :param end: The window end timestamp.
+        :param consumer: (optional) Callable getting each page as a list
+            of new candles sorted by "from", in completion order, e.g. a
+            bulk database writer.
+        :param timeout: The max seconds to wait for one page.
+        :param retries: The number of times a failed page is resent.
+
+        :returns: The number of candles given to consumer, or all candles
+            sorted by "from" if there is no consumer.
+        """
+        span = page_size * interval
+        # page request endtimes, newest first
+        pages = deque((end - i * span, retries)
+                      for i in range(int((end - start) // span) + 1))
+        done = queue.Queue()
+        pending = {}
+        seen = set()
+        ans = []
+        total = 0
+        try:
+            while pages or pending:
+                while pages and len(pending) < max_in_flight:
+                    to, left = pages.popleft()
+                    count = min(page_size, int((to - start) // interval) + 1)
+                    future = self.api.send_request(
+                        self.api.getcandles, OP_code.ACTIVES[ACTIVES],
+                        interval, count, to, response_names=("candles",))
+                    pending[future.request_id] = (to, left)
+                    future.add_done_callback(done.put)
+                try:
+                    future = done.get(timeout=timeout)
+                except queue.Empty:
+                    future = None
+                if future is None or future.exception is not None:
+                    # resend every page still in flight
+                    for request_id, (to, left) in list(pending.items()):
+                        if future is not None and request_id != future.request_id:
+                            continue
+                        del pending[request_id]
+                        self.api.pending_requests.discard(request_id)
+                        if left > 0:
+                            pages.append((to, left - 1))
+                        else:
+                            logging.error('**error** get_candles_range lost page to ' + str(to))
+                    continue
+                pending.pop(future.request_id)
+                batch = []
+                for candle in future.message["msg"]["candles"]:
+                    if start <= candle["from"] <= end and candle["from"] not in seen:
+                        seen.add(candle["from"])
+                        batch.append(candle)
+                if not batch:
+                    continue
+                batch.sort(key=operator.itemgetter("from"))
+                total += len(batch)
+                if consumer is None:
+                    ans.extend(batch)
+                else:
+                    consumer(batch)
+        finally:
+            for request_id in pending:
+                self.api.pending_requests.discard(request_id)
+        if consumer is None:
+            ans.sort(key=operator.itemgetter("from"))
+            return ans
+        return total
 
     #######################################################
     # ______________________________________________________
@@ -541,17 +744,28 @@ class IQ_Option:
             logging.error(
                 '**error** start_candles_stream please input right size')
 
-    def get_realtime_candles(self, ACTIVE, size):
+    def get_realtime_candles(self, ACTIVE, size, view=False):
+        # view=False: a snapshot dict from:candle. Unlike older versions it
+        # is a copy, it does not fill up as candles arrive: call again to
+        # get new candles.
+        # view=True: numpy arrays timestamp/open/high/low/close/volume in
+        # time order, zero-copy views on the ring that are only valid
+        # until the next candle arrives
         if size == "all":
             try:
-                return self.api.real_time_candles[ACTIVE]
+                if view:
+                    return {s: self.api.real_time_candles.get(ACTIVE, s).view()
+                            for s in self.api.real_time_candles.sizes(ACTIVE)}
+                return self.api.real_time_candles.to_dict(ACTIVE)
             except:
                 logging.error(
                     '**error** get_realtime_candles() size="all" can not get candle')
                 return False
         elif size in self.size:
             try:
-                return self.api.real_time_candles[ACTIVE][size]
+                if view:
+                    return self.api.real_time_candles.get(ACTIVE, size).view()
+                return self.api.real_time_candles.to_dict(ACTIVE, size)
             except:
                 logging.error(
                     '**error** get_realtime_candles() size=' + str(size) + ' can not get candle')
@@ -561,7 +775,7 @@ class IQ_Option:
                 '**error** get_realtime_candles() please input right "size"')
 
     def get_all_realtime_candles(self):
-        return self.api.real_time_candles
+        return self.api.real_time_candles.to_dict()
 
     ################################################
     # ---------REAL TIME CANDLE Subset Function---------
@@ -571,9 +785,9 @@ class IQ_Option:
     def full_realtime_get_candle(self, ACTIVE, size, maxdict):
         candles = self.get_candles(
             ACTIVE, size, maxdict, self.api.timesync.server_timestamp)
+        ring = self.api.real_time_candles.ring(ACTIVE, size, maxdict)
         for can in candles:
-            self.api.real_time_candles[str(
-                ACTIVE)][int(size)][can["from"]] = can
+            ring.add(can["from"], can)
 
     # ------------------------Subscribe ONE SIZE-----------------------
     def start_candles_one_stream(self, ACTIVE, size):
@@ -710,35 +924,43 @@ class IQ_Option:
 
     # -----------------technical_indicators----------------------
 
-    def get_technical_indicators(self, ACTIVES):
-        request_id = self.api.get_Technical_indicators(
-            OP_code.ACTIVES[ACTIVES])
-        while self.api.technical_indicators.get(request_id) == None:
-            pass
-        return self.api.technical_indicators[request_id]
+    def get_technical_indicators(self, ACTIVES, timeout=None):
+        future = self.api.send_request(
+            self.api.get_Technical_indicators, OP_code.ACTIVES[ACTIVES],
+            response_names=("technical-indicators",))
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            self.api.pending_requests.discard(future.request_id)
+            logging.error('**warning** get_technical_indicators late ' + str(timeout) + ' sec')
+            return None
+        return self.api.technical_indicators.pop(future.request_id)
 
 ##############################################################################################
 
 
 ##############################################################################################
 
-    def check_binary_order(self, order_id):
-        while order_id not in self.api.order_binary:
-            pass
-        your_order = self.api.order_binary[order_id]
-        del self.api.order_binary[order_id]
+    def check_binary_order(self, order_id, timeout=None):
+        your_order = self.api.outcomes.wait("option-closed", order_id, timeout)
+        if your_order is None:
+            return None
+        self.api.order_binary.pop(order_id, None)
+        self.api.outcomes.forget("option-closed", order_id)
         return your_order
 
-    def check_win(self, id_number):
+    def check_win(self, id_number, timeout=None):
         # 'win':win money 'equal':no win no loose   'loose':loose money
-        while True:
-            try:
-                listinfodata_dict = self.api.listinfodata.get(id_number)
-                if listinfodata_dict["game_state"] == 1:
-                    break
-            except:
-                pass
-        self.api.listinfodata.delete(id_number)
+        listinfodata_dict = self.api.outcomes.wait(
+            "listInfoData", id_number, timeout,
+            until=self.outcome_closed("listInfoData"))
+        if listinfodata_dict is None:
+            return None
+        try:
+            self.api.listinfodata.delete(id_number)
+        except KeyError:
+            pass
+        self.api.outcomes.forget("listInfoData", id_number)
         return listinfodata_dict["win"]
 
     def check_win_v2(self, id_number, polling_time):
@@ -757,14 +979,10 @@ class IQ_Option:
         # Function by kkagill ( https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/196 | https://github.com/kkagill )
         # Function only work with Options!
 
-    def check_win_v4(self, id_number):
-        while True:
-            try:
-                if self.api.socket_option_closed[id_number] != None:
-                    break
-            except:
-                pass
-        x = self.api.socket_option_closed[id_number]
+    def check_win_v4(self, id_number, timeout=None):
+        x = self.api.outcomes.wait("socket-option-closed", id_number, timeout)
+        if x is None:
+            return None, None
         return x['msg']['win'], (0 if x['msg']['win'] == 'equal' else float(x['msg']['sum']) * -1 if x['msg']['win'] == 'loose' else float(x['msg']['win_amount']) - float(x['msg']['sum']))
 
     def check_win_v3(self, id_number):
@@ -801,47 +1019,48 @@ class IQ_Option:
                 return self.api.game_betinfo.isSuccessful, None
             time.sleep(self.suspend * 10)
 
-    def get_optioninfo(self, limit):
-        self.api.api_game_getoptions_result = None
-        self.api.get_options(limit)
-        while self.api.api_game_getoptions_result == None:
-            pass
-
-        return self.api.api_game_getoptions_result
-
-    def get_optioninfo_v2(self, limit):
-        self.api.get_options_v2_data = None
-        self.api.get_options_v2(limit, "binary,turbo")
-        while self.api.get_options_v2_data == None:
-            pass
+    def get_optioninfo(self, limit, timeout=None):
+        return self.api.send_request(
+            self.api.get_options, limit,
+            response_names=("api_game_getoptions_result",)).result(timeout)
 
-        return self.api.get_options_v2_data
+    def get_optioninfo_v2(self, limit, timeout=None):
+        return self.api.send_request(
+            self.api.get_options_v2, limit, "binary,turbo",
+            response_names=("options",)).result(timeout)
 
     # __________________________BUY__________________________
 
     # __________________FOR OPTION____________________________
 
-    def buy_multi(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
+    def buy_multi(self, price, ACTIVES, ACTION, expirations, timeout=5):
+        # all orders go out at once, ids in input order, None if failed
         if len(price) == len(ACTIVES) == len(ACTION) == len(expirations):
-            buy_len = len(price)
-            for idx in range(buy_len):
-                self.api.buyv3(
-                    price[idx], OP_code.ACTIVES[ACTIVES[idx]], ACTION[idx], expirations[idx], idx)
-            while len(self.api.buy_multi_option) < buy_len:
-                pass
+            handles = [self.buy_async(price[idx], ACTIVES[idx], ACTION[idx], expirations[idx])
+                       for idx in range(len(price))]
+            deadline = time.time() + timeout
             buy_id = []
-            for key in sorted(self.api.buy_multi_option.keys()):
-                try:
-                    value = self.api.buy_multi_option[str(key)]
-                    buy_id.append(value["id"])
-                except:
-                    buy_id.append(None)
-
+            for handle in handles:
+                check, id = handle.result(max(0, deadline - time.time()))
+                buy_id.append(id if check else None)
             return buy_id
         else:
             logging.error('buy_multi error please input all same len')
 
+    def buy_async(self, price, ACTIVES, ACTION, expirations):
+        # returns an OrderHandle at once, handle.result(timeout) -> (check,id)
+        return self.api.order_pipeline.submit(
+            self.api.buyv3, float(price), OP_code.ACTIVES[ACTIVES],
+            str(ACTION), int(expirations))
+
+    def set_order_window(self, window):
+        # max orders sent and not acked yet, more sends block
+        self.api.order_pipeline.set_window(window)
+
+    def get_order_stats(self):
+        # sent/acked counts and send to ack latency in seconds
+        return self.api.order_pipeline.stats()
+
     def get_remaning(self, duration):
         for remaning in get_remaning_time(self.api.timesync.server_timestamp):
             if remaning[0] == duration:
@@ -849,84 +1068,42 @@ class IQ_Option:
         logging.error('get_remaning(self,duration) ERROR duration')
         return "ERROR duration"
 
-    def buy_by_raw_expirations(self, price, active, direction, option, expired):
-
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        req_id = "buyraw"
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
-        self.api.buyv3_by_raw_expired(
-            price, OP_code.ACTIVES[active], direction, option, expired, request_id=req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    logging.error(
-                        '**warning** buy' + str(self.api.buy_multi_option[req_id]["message"]))
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
-
-    def buy(self, price, ACTIVES, ACTION, expirations):
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        # req_id = "buy"
-        req_id = str(randint(0, 10000))
-        try:
-            self.api.buy_multi_option[req_id]["id"] = None
-        except:
-            pass
-        self.api.buyv3(
-            float(price), OP_code.ACTIVES[ACTIVES], str(ACTION), int(expirations), req_id)
-        start_t = time.time()
-        id = None
-        self.api.result = None
-        while self.api.result == None or id == None:
-            try:
-                if "message" in self.api.buy_multi_option[req_id].keys():
-                    return False, self.api.buy_multi_option[req_id]["message"]
-            except:
-                pass
-            try:
-                id = self.api.buy_multi_option[req_id]["id"]
-            except:
-                pass
-            if time.time() - start_t >= 5:
-                logging.error('**warning** buy late 5 sec')
-                return False, None
-
-        return self.api.result, self.api.buy_multi_option[req_id]["id"]
-
-    def sell_option(self, options_ids):
-        self.api.sell_option(options_ids)
-        self.api.sold_options_respond = None
-        while self.api.sold_options_respond == None:
-            pass
-        return self.api.sold_options_respond
-
-    def sell_digital_option(self, options_ids):
-        self.api.sell_digital_option(options_ids)
-        self.api.sold_digital_options_respond = None
-        while self.api.sold_digital_options_respond == None:
-            pass
-        return self.api.sold_digital_options_respond
+    def buy_by_raw_expirations(self, price, active, direction, option, expired, timeout=5):
+        handle = self.api.order_pipeline.submit(
+            self.api.buyv3_by_raw_expired, price, OP_code.ACTIVES[active],
+            direction, option, expired)
+        check, id = handle.result(timeout)
+        if not check:
+            if id is None:
+                logging.error('**warning** buy late ' + str(timeout) + ' sec')
+            else:
+                logging.error('**warning** buy' + str(id))
+        return check, id
+
+    def buy(self, price, ACTIVES, ACTION, expirations, timeout=5):
+        check, id = self.buy_async(price, ACTIVES, ACTION, expirations).result(timeout)
+        if not check and id is None:
+            logging.error('**warning** buy late ' + str(timeout) + ' sec')
+        return check, id
+
+    def sell_option(self, options_ids, timeout=None):
+        # the sold-options message, None if late
+        return self.wait_response(self.api.send_request(
+            self.api.sell_option, options_ids,
+            response_names=("sold-options",)), timeout)
+
+    def sell_digital_option(self, options_ids, timeout=None):
+        # the position-closed message, None if late
+        return self.wait_response(self.api.send_request(
+            self.api.sell_digital_option, options_ids,
+            response_names=("position-closed",)), timeout)
 # __________________for Digital___________________
 
     def get_digital_underlying_list_data(self):
+        return self.api.market_data.get(
+            "underlying", self.load_digital_underlying_list_data)
+
+    def load_digital_underlying_list_data(self):
         self.api.underlying_list_data = None
         self.api.get_digital_underlying()
         start_t = time.time()
@@ -939,21 +1116,15 @@ class IQ_Option:
         return self.api.underlying_list_data
 
     def get_strike_list(self, ACTIVES, duration):
-        self.api.strike_list = None
-        self.api.get_strike_list(ACTIVES, duration)
-        ans = {}
-        while self.api.strike_list == None:
-            pass
+        strike_list = self.api.send_request(
+            self.api.get_strike_list, ACTIVES, duration,
+            response_names=("strike-list",)).result()
         try:
-            for data in self.api.strike_list["msg"]["strike"]:
-                temp = {}
-                temp["call"] = data["call"]["id"]
-                temp["put"] = data["put"]["id"]
-                ans[("%.6f" % (float(data["value"]) * 10e-7))] = temp
+            table = self.api.strikes.add(ACTIVES, duration, strike_list)
         except:
             logging.error('**error** get_strike_list read problem...')
-            return self.api.strike_list, None
-        return self.api.strike_list, ans
+            return strike_list, None
+        return strike_list, table.to_dict()
 
     def subscribe_strike_list(self, ACTIVE, expiration_period):
         self.api.subscribe_instrument_quites_generated(
@@ -961,53 +1132,82 @@ class IQ_Option:
 
     def unsubscribe_strike_list(self, ACTIVE, expiration_period):
         del self.api.instrument_quites_generated_data[ACTIVE]
+        self.api.strikes.forget(ACTIVE)
+        self.api.quotes.forget(ACTIVE)
         self.api.unsubscribe_instrument_quites_generated(
             ACTIVE, expiration_period)
 
-    def get_instrument_quites_generated_data(self, ACTIVE, duration):
-        while self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60] == {}:
-            pass
-        return self.api.instrument_quotes_generated_raw_data[ACTIVE][duration * 60]
+    def get_instrument_quites_generated_data(self, ACTIVE, duration, timeout=None):
+        # the latest raw quotes message, None if none came in time
+        return self.api.strikes.wait_raw_quotes(ACTIVE, duration, timeout)
+
+    def get_strike_table(self, ACTIVE, duration, timeout=None):
+        """
+        strike table of the current expiration, see StrikeTable
+        needs subscribe_strike_list(ACTIVE, duration) first
+        """
+        quotes = self.api.strikes.wait_quotes(ACTIVE, duration, timeout)
+        if quotes is None:
+            return None
+        table = self.api.strikes.get(ACTIVE, duration, quotes[1])
+        if table is None:
+            # fetched once per expiration
+            strike_list = self.api.send_request(
+                self.api.get_strike_list, ACTIVE, duration,
+                response_names=("strike-list",)).result(timeout)
+            table = self.api.strikes.add(ACTIVE, duration, strike_list)
+        return table
 
     def get_realtime_strike_list(self, ACTIVE, duration):
+        """
+        strike_list dict: price:{call:{profit,id},put:{profit,id}}
+        """
+        seen = 0
         while True:
-            if not self.api.instrument_quites_generated_data[ACTIVE][duration * 60]:
-                pass
-            else:
-                break
+            table = self.get_strike_table(ACTIVE, duration)
+            ans = table.to_dict(
+                self.api.instrument_quites_generated_data[ACTIVE][duration * 60])
+            if ans != {}:
+                return ans
+            # no profit for these strikes yet, wait for the next quotes
+            seen, _ = self.api.strikes.wait_quotes(ACTIVE, duration, seen=seen)
+
+    def get_nearest_strike(self, ACTIVE, duration, price, timeout=None):
         """
-        strike_list dict: price:{call:id,put:id}
+        strike closest to price:
+        {"price", "call":{"id", "profit"}, "put":{"id", "profit"}}
         """
-        ans = {}
-        now_timestamp = self.api.instrument_quites_generated_timestamp[ACTIVE][duration * 60]
-
-        while ans == {}:
-            if self.get_realtime_strike_list_temp_data == {} or now_timestamp != self.get_realtime_strike_list_temp_expiration:
-                raw_data, strike_list = self.get_strike_list(ACTIVE, duration)
-                self.get_realtime_strike_list_temp_expiration = raw_data["msg"]["expiration"]
-                self.get_realtime_strike_list_temp_data = strike_list
-            else:
-                strike_list = self.get_realtime_strike_list_temp_data
-
-            profit = self.api.instrument_quites_generated_data[ACTIVE][duration * 60]
-            for price_key in strike_list:
-                try:
-                    side_data = {}
-                    for side_key in strike_list[price_key]:
-                        detail_data = {}
-                        profit_d = profit[strike_list[price_key][side_key]]
-                        detail_data["profit"] = profit_d
-                        detail_data["id"] = strike_list[price_key][side_key]
-                        side_data[side_key] = detail_data
-                    ans[price_key] = side_data
-                except:
-                    pass
-
-        return ans
+        table = self.get_strike_table(ACTIVE, duration, timeout)
+        if table is None or len(table) == 0:
+            return None
+        return table.row(table.nearest(price),
+                         self.api.instrument_quites_generated_data[ACTIVE][duration * 60])
+
+    def get_strikes_between(self, ACTIVE, duration, low, high, timeout=None):
+        # strikes with low <= price <= high, in the get_nearest_strike format
+        table = self.get_strike_table(ACTIVE, duration, timeout)
+        if table is None:
+            return []
+        profits = self.api.instrument_quites_generated_data[ACTIVE][duration * 60]
+        return [table.row(idx, profits) for idx in table.between(low, high)]
+
+    def get_digital_quote(self, ACTIVE, duration, instrument_id):
+        # {"bid", "ask", "profit"} of one instrument, None if not quoted
+        return self.api.quotes.get(ACTIVE, duration * 60, instrument_id)
+
+    def add_digital_quote_callback(self, ACTIVE, duration, instrument_ids, callback):
+        # callback(instrument_id, quote) when one of instrument_ids changes
+        self.api.quotes.add_interest(
+            ACTIVE, duration * 60, instrument_ids, callback)
+
+    def remove_digital_quote_callback(self, ACTIVE, duration, instrument_ids, callback):
+        self.api.quotes.remove_interest(
+            ACTIVE, duration * 60, instrument_ids, callback)
 
     def get_digital_current_profit(self, ACTIVE, duration):
         profit = self.api.instrument_quites_generated_data[ACTIVE][duration * 60]
-        for key in profit:
+        # updated in place by the websocket thread
+        for key in list(profit):
             if key.find("SPT") != -1:
                 return profit[key]
         return False
@@ -1015,7 +1215,7 @@ class IQ_Option:
     # thank thiagottjv
     # https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/65#issuecomment-513998357
 
-    def buy_digital_spot(self, active, amount, action, duration):
+    def get_digital_spot_instrument_id(self, active, action, duration):
         # Expiration time need to be formatted like this: YYYYMMDDHHII
         # And need to be on GMT time
 
@@ -1027,7 +1227,7 @@ class IQ_Option:
             action = 'C'
         else:
             logging.error('buy_digital_spot active error')
-            return -1, None
+            return None
         # doEURUSD201907191250PT5MPSPT
         timestamp = int(self.api.timesync.server_timestamp)
         if duration == 1:
@@ -1043,47 +1243,32 @@ class IQ_Option:
 
         dateFormated = str(datetime.utcfromtimestamp(
             exp).strftime("%Y%m%d%H%M"))
-        instrument_id = "do" + active + dateFormated + \
-                        "PT" + str(duration) + "M" + action + "SPT"
-        # self.api.digital_option_placed_id = None
-
-        request_id = self.api.place_digital_option(instrument_id, amount)
-
-        while self.api.digital_option_placed_id.get(request_id) == None:
-            pass
-        digital_order_id = self.api.digital_option_placed_id.get(request_id)
-        if isinstance(digital_order_id, int):
-            return True, digital_order_id
-        else:
-            return False, digital_order_id
+        return "do" + active + dateFormated + \
+               "PT" + str(duration) + "M" + action + "SPT"
 
-        # while self.api.digital_option_placed_id == None:
-        #     pass
-        # if isinstance(self.api.digital_option_placed_id, int):
-        #     return True, self.api.digital_option_placed_id
-        # else:
-        #     return False, self.api.digital_option_placed_id
-
-    def get_digital_spot_profit_after_sale(self, position_id):
-        def get_instrument_id_to_bid(data, instrument_id):
-            for row in data["msg"]["quotes"]:
-                if row["symbols"][0] == instrument_id:
-                    return row["price"]["bid"]
-            return None
+    def buy_digital_spot(self, active, amount, action, duration, timeout=None):
+        instrument_id = self.get_digital_spot_instrument_id(
+            active, action, duration)
+        if instrument_id is None:
+            return -1, None
+        return self.buy_digital(amount, instrument_id, timeout)
 
+    def get_digital_spot_profit_after_sale(self, position_id, timeout=None):
         # Author:Lu-Yi-Hsun 2019/11/04
         # email:yihsun1992@gmail.com
         # Source code reference
         # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.27.0/sources/com/iqoption/dto/entity/position/Position.java#L564
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
+        position_changed = self.api.outcomes.wait(
+            "position-changed", position_id, timeout)
+        if position_changed is None:
+            return None
         # ___________________/*position*/_________________
-        position = self.get_async_order(position_id)["position-changed"]["msg"]
+        position = position_changed["msg"]
         # doEURUSD201911040628PT1MPSPT
         # z mean check if call or not
-        if position["instrument_id"].find("MPSPT"):
+        if "MPSPT" in position["instrument_id"]:
             z = False
-        elif position["instrument_id"].find("MCSPT"):
+        elif "MCSPT" in position["instrument_id"]:
             z = True
         else:
             logging.error(
@@ -1109,12 +1294,11 @@ class IQ_Option:
         getRate = position['raw_event']["currency_rate"]
 
         # ___________________/*position*/_________________
-        instrument_quites_generated_data = self.get_instrument_quites_generated_data(
-            ACTIVES, duration)
+        self.get_instrument_quites_generated_data(ACTIVES, duration)
+        book = self.api.quotes.book(ACTIVES, duration * 60)
 
         # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.5.1/sources/com/iqoption/dto/entity/position/Position.java#L493
-        f_tmp = get_instrument_id_to_bid(
-            instrument_quites_generated_data, aVar)
+        f_tmp = book.bids.get(aVar)
         # f is bidprice of lower_instrument_id ,f2 is bidprice of upper_instrument_id
         if f_tmp != None:
             self.get_digital_spot_profit_after_sale_data[position_id]["f"] = f_tmp
@@ -1122,8 +1306,7 @@ class IQ_Option:
         else:
             f = self.get_digital_spot_profit_after_sale_data[position_id]["f"]
 
-        f2_tmp = get_instrument_id_to_bid(
-            instrument_quites_generated_data, aVar2)
+        f2_tmp = book.bids.get(aVar2)
         if f2_tmp != None:
             self.get_digital_spot_profit_after_sale_data[position_id]["f2"] = f2_tmp
             f2 = f2_tmp
@@ -1163,26 +1346,49 @@ class IQ_Option:
         else:
             return None
 
-    def buy_digital(self, amount, instrument_id):
-        self.api.digital_option_placed_id = None
-        self.api.place_digital_option(instrument_id, amount)
-        start_t = time.time()
-        while self.api.digital_option_placed_id == None:
-            if time.time() - start_t > 30:
-                logging.error('buy_digital loss digital_option_placed_id')
-                return False, None
-        return True, self.api.digital_option_placed_id
+    def get_digital_spot_profit_after_sale_all(self):
+        # sell-back profit of every open digital position in one pass,
+        # dict order id:profit, None until its bids are quoted
+        return self.api.digital_portfolio.values()
 
-    def close_digital_option(self, position_id):
-        self.api.result = None
-        while self.get_async_order(position_id)["position-changed"] == {}:
-            pass
-        position_changed = self.get_async_order(
-            position_id)["position-changed"]["msg"]
-        self.api.close_digital_option(position_changed["external_id"])
-        while self.api.result == None:
-            pass
-        return self.api.result
+    def add_digital_portfolio_callback(self, callback):
+        # callback(dict order id:profit) after every quotes frame of a held active
+        self.api.digital_portfolio.add_callback(callback)
+
+    def remove_digital_portfolio_callback(self, callback):
+        self.api.digital_portfolio.remove_callback(callback)
+
+    def buy_digital(self, amount, instrument_id, timeout=30):
+        # (True, order id), (False, error dict) or (False, None) if late
+        future = self.api.send_request(
+            self.api.place_digital_option, instrument_id, amount,
+            response_names=("digital-option-placed",))
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            self.api.pending_requests.discard(future.request_id)
+            logging.error('**warning** buy_digital late ' + str(timeout) + ' sec')
+            return False, None
+        digital_order_id = self.api.digital_option_placed_id.pop(future.request_id)
+        if isinstance(digital_order_id, int):
+            return True, digital_order_id
+        else:
+            return False, digital_order_id
+
+    def close_digital_option(self, position_id, timeout=None):
+        position_changed = self.api.outcomes.wait(
+            "position-changed", position_id, timeout)
+        if position_changed is None:
+            return False
+        future = self.api.send_request(
+            self.api.close_digital_option,
+            position_changed["msg"]["external_id"],
+            response_names=("result",))
+        try:
+            return future.result(timeout)["msg"]["success"]
+        except TimeoutError:
+            self.api.pending_requests.discard(future.request_id)
+            return False
 
     def check_win_digital(self, buy_order_id, polling_time):
         while True:
@@ -1195,13 +1401,12 @@ class IQ_Option:
                 elif data["msg"]["position"]["close_reason"] == "expired":
                     return data["msg"]["position"]["pnl_realized"] - data["msg"]["position"]["buy_amount"]
 
-    def check_win_digital_v2(self, buy_order_id):
-
-        while self.get_async_order(buy_order_id)["position-changed"] == {}:
-            pass
-        order_data = self.get_async_order(
-            buy_order_id)["position-changed"]["msg"]
+    def check_win_digital_v2(self, buy_order_id, timeout=None):
+        # latest position-changed, (False,None) while still open
+        order_data = self.api.outcomes.wait(
+            "position-changed", buy_order_id, timeout)
         if order_data != None:
+            order_data = order_data["msg"]
             if order_data["status"] == "closed":
                 if order_data["close_reason"] == "expired":
                     return True, order_data["close_profit"] - order_data["invest"]
@@ -1224,232 +1429,220 @@ class IQ_Option:
                   take_profit_kind=None, take_profit_value=None,
 
                   use_trail_stop=False, auto_margin_call=False,
-                  use_token_for_commission=False):
+                  use_token_for_commission=False, timeout=None):
         self.api.buy_order_id = None
-        self.api.buy_order(
+        placed = self.wait_response(self.api.send_request(
+            self.api.buy_order,
             instrument_type=instrument_type, instrument_id=instrument_id,
             side=side, amount=amount, leverage=leverage,
             type=type, limit_price=limit_price, stop_price=stop_price,
             stop_lose_value=stop_lose_value, stop_lose_kind=stop_lose_kind,
             take_profit_value=take_profit_value, take_profit_kind=take_profit_kind,
             use_trail_stop=use_trail_stop, auto_margin_call=auto_margin_call,
-            use_token_for_commission=use_token_for_commission
-        )
-
-        while self.api.buy_order_id == None:
-            pass
-        check, data = self.get_order(self.api.buy_order_id)
-        while data["status"] == "pending_new":
-            check, data = self.get_order(self.api.buy_order_id)
+            use_token_for_commission=use_token_for_commission,
+            response_names=("order-placed-temp",)), timeout)
+        if placed is None:
+            return False, None
+        order_id = placed["msg"]["id"]
+        check, data = self.get_order(order_id, timeout)
+        while check and data["status"] == "pending_new":
             time.sleep(1)
+            check, data = self.get_order(order_id, timeout)
 
         if check:
             if data["status"] != "rejected":
-                return True, self.api.buy_order_id
+                return True, order_id
             else:
                 return False, data["reject_status"]
         else:
 
             return False, None
 
-    def change_auto_margin_call(self, ID_Name, ID, auto_margin_call):
-        self.api.auto_margin_call_changed_respond = None
-        self.api.change_auto_margin_call(ID_Name, ID, auto_margin_call)
-        while self.api.auto_margin_call_changed_respond == None:
-            pass
-        if self.api.auto_margin_call_changed_respond["status"] == 2000:
-            return True, self.api.auto_margin_call_changed_respond
+    def change_auto_margin_call(self, ID_Name, ID, auto_margin_call, timeout=None):
+        respond = self.wait_response(self.api.send_request(
+            self.api.change_auto_margin_call, ID_Name, ID, auto_margin_call,
+            response_names=("auto-margin-call-changed",)), timeout)
+        if respond is not None and respond["status"] == 2000:
+            return True, respond
         else:
-            return False, self.api.auto_margin_call_changed_respond
+            return False, respond
 
     def change_order(self, ID_Name, order_id,
                      stop_lose_kind, stop_lose_value,
                      take_profit_kind, take_profit_value,
-                     use_trail_stop, auto_margin_call):
+                     use_trail_stop, auto_margin_call, timeout=None):
         check = True
         if ID_Name == "position_id":
-            check, order_data = self.get_order(order_id)
-            position_id = order_data["position_id"]
-            ID = position_id
+            check, order_data = self.get_order(order_id, timeout)
+            if check:
+                ID = order_data["position_id"]
         elif ID_Name == "order_id":
             ID = order_id
         else:
             logging.error('change_order input error ID_Name')
 
         if check:
-            self.api.tpsl_changed_respond = None
-            self.api.change_order(
+            future = self.api.send_request(
+                self.api.change_order,
                 ID_Name=ID_Name, ID=ID,
                 stop_lose_kind=stop_lose_kind, stop_lose_value=stop_lose_value,
                 take_profit_kind=take_profit_kind, take_profit_value=take_profit_value,
-                use_trail_stop=use_trail_stop)
+                use_trail_stop=use_trail_stop,
+                response_names=("tpsl-changed",))
             self.change_auto_margin_call(
-                ID_Name=ID_Name, ID=ID, auto_margin_call=auto_margin_call)
-            while self.api.tpsl_changed_respond == None:
-                pass
-            if self.api.tpsl_changed_respond["status"] == 2000:
-                return True, self.api.tpsl_changed_respond["msg"]
+                ID_Name=ID_Name, ID=ID, auto_margin_call=auto_margin_call,
+                timeout=timeout)
+            respond = self.wait_response(future, timeout)
+            if respond is not None and respond["status"] == 2000:
+                return True, respond["msg"]
             else:
-                return False, self.api.tpsl_changed_respond
+                return False, respond
         else:
             logging.error('change_order fail to get position_id')
             return False, None
 
+    def wait_many(self, order_ids, timeout=None, name="socket-option-closed"):
+        # {id:closed message or None}, binary options by default,
+        # name="position-changed" with digital order ids
+        return self.api.outcomes.wait_many(
+            name, order_ids, timeout, self.outcome_closed(name))
+
+    def get_outcome_future(self, order_id, name="socket-option-closed"):
+        # future.add_done_callback(cb) to get called once it is closed
+        return self.api.outcomes.future(
+            name, order_id, self.outcome_closed(name))
+
+    @staticmethod
+    def outcome_closed(name):
+        if name == "position-changed":
+            return lambda message: message["msg"].get("status") == "closed"
+        if name == "listInfoData":
+            return lambda item: item["game_state"] == 1
+        return None
+
     def get_async_order(self, buy_order_id):
         # name': 'position-changed', 'microserviceName': "portfolio"/"digital-options"
         return self.api.order_async[buy_order_id]
 
-    def get_order(self, buy_order_id):
-        # self.api.order_data["status"]
+    def wait_response(self, future, timeout=None):
+        # the response message, None if late
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            self.api.pending_requests.discard(future.request_id)
+            logging.error('**warning** request ' + str(future.request_id) +
+                          ' late ' + str(timeout) + ' sec')
+            return None
+
+    def wait_status_response(self, future, timeout=None):
+        # (True,msg) for a status 2000 response else (False,None)
+        try:
+            response = future.result(timeout)
+        except TimeoutError:
+            self.api.pending_requests.discard(future.request_id)
+            logging.error('**warning** request ' + str(future.request_id) +
+                          ' late ' + str(timeout) + ' sec')
+            return False, None
+        if response["status"] == 2000:
+            return True, response["msg"]
+        else:
+            return False, None
+
+    def get_order(self, buy_order_id, timeout=None):
+        # order_data["status"]
         # reject:you can not get this order
         # pending_new:this order is working now
         # filled:this order is ok now
         # new
-        self.api.order_data = None
-        self.api.get_order(buy_order_id)
-        while self.api.order_data == None:
-            pass
-        if self.api.order_data["status"] == 2000:
-            return True, self.api.order_data["msg"]
-        else:
-            return False, None
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_order, buy_order_id,
+            response_names=("order",)), timeout)
 
-    def get_pending(self, instrument_type):
-        self.api.deferred_orders = None
-        self.api.get_pending(instrument_type)
-        while self.api.deferred_orders == None:
-            pass
-        if self.api.deferred_orders["status"] == 2000:
-            return True, self.api.deferred_orders["msg"]
-        else:
-            return False, None
+    def get_pending(self, instrument_type, timeout=None):
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_pending, instrument_type,
+            response_names=("deferred-orders",)), timeout)
 
     # this function is heavy
-    def get_positions(self, instrument_type):
-        self.api.positions = None
-        self.api.get_positions(instrument_type)
-        while self.api.positions == None:
-            pass
-        if self.api.positions["status"] == 2000:
-            return True, self.api.positions["msg"]
-        else:
+    def get_positions(self, instrument_type, timeout=None):
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_positions, instrument_type,
+            response_names=("positions",)), timeout)
+
+    def get_position(self, buy_order_id, timeout=None):
+        check, order_data = self.get_order(buy_order_id, timeout)
+        if not check:
             return False, None
-
-    def get_position(self, buy_order_id):
-        self.api.position = None
-        check, order_data = self.get_order(buy_order_id)
         position_id = order_data["position_id"]
-        self.api.get_position(position_id)
-        while self.api.position == None:
-            pass
-        if self.api.position["status"] == 2000:
-            return True, self.api.position["msg"]
-        else:
-            return False, None
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_position, position_id,
+            response_names=("position",)), timeout)
 
     # this function is heavy
 
-    def get_digital_position_by_position_id(self, position_id):
-        self.api.position = None
-        self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
-        return self.api.position
-
-    def get_digital_position(self, order_id):
-        self.api.position = None
-        while self.get_async_order(order_id)["position-changed"] == {}:
-            pass
-        position_id = self.get_async_order(
-            order_id)["position-changed"]["msg"]["external_id"]
-        self.api.get_digital_position(position_id)
-        while self.api.position == None:
-            pass
-        return self.api.position
+    def get_digital_position_by_position_id(self, position_id, timeout=None):
+        return self.api.send_request(
+            self.api.get_digital_position, position_id,
+            response_names=("position",)).result(timeout)
 
-    def get_position_history(self, instrument_type):
-        self.api.position_history = None
-        self.api.get_position_history(instrument_type)
-        while self.api.position_history == None:
-            pass
+    def get_digital_position(self, order_id, timeout=None):
+        position_changed = self.api.outcomes.wait(
+            "position-changed", order_id, timeout)
+        if position_changed is None:
+            return None
+        position_id = position_changed["msg"]["external_id"]
+        return self.get_digital_position_by_position_id(position_id, timeout)
 
-        if self.api.position_history["status"] == 2000:
-            return True, self.api.position_history["msg"]
-        else:
-            return False, None
+    def get_position_history(self, instrument_type, timeout=None):
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_position_history, instrument_type,
+            response_names=("position-history",)), timeout)
 
-    def get_position_history_v2(self, instrument_type, limit, offset, start, end):
+    def get_position_history_v2(self, instrument_type, limit, offset, start, end, timeout=None):
         # instrument_type=crypto forex fx-option multi-option cfd digital-option turbo-option
-        self.api.position_history_v2 = None
-        self.api.get_position_history_v2(
-            instrument_type, limit, offset, start, end)
-        while self.api.position_history_v2 == None:
-            pass
-
-        if self.api.position_history_v2["status"] == 2000:
-            return True, self.api.position_history_v2["msg"]
-        else:
-            return False, None
-
-    def get_available_leverages(self, instrument_type, actives=""):
-        self.api.available_leverages = None
-        if actives == "":
-            self.api.get_available_leverages(instrument_type, "")
-        else:
-            self.api.get_available_leverages(
-                instrument_type, OP_code.ACTIVES[actives])
-        while self.api.available_leverages == None:
-            pass
-        if self.api.available_leverages["status"] == 2000:
-            return True, self.api.available_leverages["msg"]
-        else:
-            return False, None
-
-    def cancel_order(self, buy_order_id):
-        self.api.order_canceled = None
-        self.api.cancel_order(buy_order_id)
-        while self.api.order_canceled == None:
-            pass
-        if self.api.order_canceled["status"] == 2000:
-            return True
-        else:
-            return False
-
-    def close_position(self, position_id):
-        check, data = self.get_order(position_id)
-        if data["position_id"] != None:
-            self.api.close_position_data = None
-            self.api.close_position(data["position_id"])
-            while self.api.close_position_data == None:
-                pass
-            if self.api.close_position_data["status"] == 2000:
-                return True
-            else:
-                return False
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_position_history_v2,
+            instrument_type, limit, offset, start, end,
+            response_names=("history-positions",)), timeout)
+
+    def get_available_leverages(self, instrument_type, actives="", timeout=None):
+        if actives != "":
+            actives = OP_code.ACTIVES[actives]
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_available_leverages, instrument_type, actives,
+            response_names=("available-leverages",)), timeout)
+
+    def cancel_order(self, buy_order_id, timeout=None):
+        check, _ = self.wait_status_response(self.api.send_request(
+            self.api.cancel_order, buy_order_id,
+            response_names=("order-canceled",)), timeout)
+        return check
+
+    def close_position(self, position_id, timeout=None):
+        check, data = self.get_order(position_id, timeout)
+        if check and data["position_id"] != None:
+            check, _ = self.wait_status_response(self.api.send_request(
+                self.api.close_position, data["position_id"],
+                response_names=("position-closed",)), timeout)
+            return check
         else:
             return False
 
-    def close_position_v2(self, position_id):
-        while self.get_async_order(position_id) == None:
-            pass
-        position_changed = self.get_async_order(position_id)
-        self.api.close_position(position_changed["id"])
-        while self.api.close_position_data == None:
-            pass
-        if self.api.close_position_data["status"] == 2000:
-            return True
-        else:
+    def close_position_v2(self, position_id, timeout=None):
+        position_changed = self.api.outcomes.wait(
+            "position-changed", position_id, timeout)
+        if position_changed is None:
             return False
+        check, _ = self.wait_status_response(self.api.send_request(
+            self.api.close_position, position_changed["msg"]["id"],
+            response_names=("position-closed",)), timeout)
+        return check
 
-    def get_overnight_fee(self, instrument_type, active):
-        self.api.overnight_fee = None
-        self.api.get_overnight_fee(instrument_type, OP_code.ACTIVES[active])
-        while self.api.overnight_fee == None:
-            pass
-        if self.api.overnight_fee["status"] == 2000:
-            return True, self.api.overnight_fee["msg"]
-        else:
-            return False, None
+    def get_overnight_fee(self, instrument_type, active, timeout=None):
+        return self.wait_status_response(self.api.send_request(
+            self.api.get_overnight_fee, instrument_type,
+            OP_code.ACTIVES[active],
+            response_names=("overnight-fee",)), timeout)
 
     def get_option_open_by_other_pc(self):
         return self.api.socket_option_opened
@@ -1460,7 +1653,7 @@ class IQ_Option:
     # -----------------------------------------------------------------
 
     def opcode_to_name(self, opcode):
-        return list(OP_code.ACTIVES.keys())[list(OP_code.ACTIVES.values()).index(opcode)]
+        return OP_code.get_active_name(opcode)
 
     # name:
     # "live-deal-binary-option-placed"
@@ -1488,6 +1681,18 @@ class IQ_Option:
             time.sleep(1)
         """
 
+    def set_live_deal_cb_options(self, workers=2, maxsize=10000, overflow="drop_oldest", batch_interval=None):
+        # overflow: "block"/"drop_new"/"drop_oldest"
+        # batch_interval: seconds, cb gets a list of deals per flush
+        old_pool = self.api.live_deal_pool
+        self.api.live_deal_pool = CallbackPool(
+            workers=workers, maxsize=maxsize, overflow=overflow,
+            batch_interval=batch_interval)
+        old_pool.stop()
+
+    def get_live_deal_cb_stats(self):
+        return self.api.live_deal_pool.stats()
+
     def set_digital_live_deal_cb(self, cb):
         self.api.digital_live_deal_cb = cb
 
@@ -1504,13 +1709,12 @@ class IQ_Option:
         self.api.live_deal_data[name][active][_type] = deque(
             list(), buffersize)
 
-    def get_user_profile_client(self, user_id):
-        self.api.user_profile_client = None
-        self.api.Get_User_Profile_Client(user_id)
-        while self.api.user_profile_client == None:
-            pass
-
-        return self.api.user_profile_client
+    def get_user_profile_client(self, user_id, timeout=None):
+        # the profile msg, None if late
+        respond = self.wait_response(self.api.send_request(
+            self.api.Get_User_Profile_Client, user_id,
+            response_names=("user-profile-client",)), timeout)
+        return None if respond is None else respond["msg"]
 
     def request_leaderboard_userinfo_deals_client(self, user_id, country_id):
         self.api.leaderboard_userinfo_deals_client = None
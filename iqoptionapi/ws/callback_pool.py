@@ -0,0 +1,158 @@
+"""Module for IQ option bounded callback worker pool."""
+
+import logging
+import threading
+import time
+from collections import deque, OrderedDict
+
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_oldest")
+
+
+class CallbackPool(object):
+    """Fixed set of worker threads delivering callbacks off the socket thread.
+
+    Calls wait on a bounded queue. In batch mode a single flusher thread
+    gives each callback a list of all its data queued during one flush
+    interval instead of one call per item.
+    """
+
+    def __init__(self, workers=2, maxsize=10000, overflow="drop_oldest",
+                 batch_interval=None):
+        """
+        :param int workers: The number of worker threads, ignored in
+            batch mode which always uses one.
+        :param int maxsize: The max number of queued calls.
+        :param str overflow: What to do when the queue is full:
+            "block" the submitter, "drop_new" the new call or
+            "drop_oldest" queued call. The submitter is the websocket
+            thread, so "block" stalls the reading of every message until
+            a worker catches up.
+        :param batch_interval: (optional) Seconds between flushes, call
+            callback(list_of_data) per flush instead of callback(**data).
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("overflow must be one of " +
+                             str(OVERFLOW_POLICIES))
+        self.workers = workers
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.batch_interval = batch_interval
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.running = False
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        # one flusher in batch mode, a second one would take single items
+        # while the first waits for its batch to fill up
+        workers = 1 if self.batch_interval is not None else self.workers
+        for _ in range(workers):
+            thread = threading.Thread(target=self.__run)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=5):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, callback, data):
+        """Queue callback(**data), or callback([data, ...]) in batch mode.
+
+        :returns: False if the call was dropped.
+        """
+        if not self.running:
+            self.start()
+        with self.condition:
+            self.submitted += 1
+            if len(self.queue) >= self.maxsize:
+                if self.overflow == "drop_new":
+                    self.dropped += 1
+                    return False
+                elif self.overflow == "drop_oldest":
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self.queue) >= self.maxsize and self.running:
+                        self.condition.wait()
+            self.queue.append((callback, data))
+            if len(self.queue) > self.max_depth:
+                self.max_depth = len(self.queue)
+            self.condition.notify_all()
+        return True
+
+    def stats(self):
+        """:returns: dict of queue depth and delivery counters."""
+        with self.condition:
+            return {"queue_depth": len(self.queue),
+                    "max_queue_depth": self.max_depth,
+                    "submitted": self.submitted,
+                    "delivered": self.delivered,
+                    "dropped": self.dropped,
+                    "errors": self.errors}
+
+    def __call(self, callback, *args, **kwargs):
+        try:
+            callback(*args, **kwargs)
+            return True
+        except Exception as e:  # pylint: disable=broad-except
+            logger = logging.getLogger(__name__)
+            logger.error("live deal callback error: " + str(e))
+            return False
+
+    def __take(self):
+        # wait for work, None once stopped
+        with self.condition:
+            while not self.queue and self.running:
+                self.condition.wait()
+            if not self.queue:
+                return None
+            if self.batch_interval is None:
+                item = [self.queue.popleft()]
+            else:
+                # let the batch fill up, flush at once when stopped
+                deadline = time.time() + self.batch_interval
+                while self.running:
+                    wait = deadline - time.time()
+                    if wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                item = list(self.queue)
+                self.queue.clear()
+            self.condition.notify_all()
+            return item
+
+    def __run(self):
+        while True:
+            items = self.__take()
+            if items is None:
+                return
+            if self.batch_interval is None:
+                callback, data = items[0]
+                calls = [(callback, (), data)]
+            else:
+                batches = OrderedDict()
+                for callback, data in items:
+                    batches.setdefault(callback, []).append(data)
+                calls = [(callback, (batch,), {})
+                         for callback, batch in batches.items()]
+            for callback, args, kwargs in calls:
+                ok = self.__call(callback, *args, **kwargs)
+                with self.condition:
+                    if ok:
+                        self.delivered += len(args[0]) if args else 1
+                    else:
+                        self.errors += 1
@@ -1,5 +1,4 @@
 """Module for base IQ Option base websocket chanel."""
-import time
 
 class Base(object):
     """Class for base IQ Option websocket chanel."""
@@ -11,6 +10,8 @@ class Base(object):
             <iqoptionapi.api.IQOptionAPI>`.
         """
         self.api = api
+        # set by IQOptionAPI.send_request to correlate the response
+        self.request_id = ""
 
     def send_websocket_request(self, name, msg,request_id=""):
         """Send request to IQ Option server websocket.
@@ -21,5 +22,7 @@ class Base(object):
         :returns: The instance of :class:`requests.Response`.
         """
         if request_id == '':
-            request_id = int(str(time.time()).split('.')[1])
+            request_id = self.request_id
+        if request_id == '':
+            request_id = self.api.pending_requests.next_request_id()
         return self.api.send_websocket_request(name, msg,request_id)
@@ -3,8 +3,6 @@
 import datetime
 import time
 from iqoptionapi.ws.chanels.base import Base
-import iqoptionapi.global_value as global_value
-from random import randint
 # work for forex digit cfd(stock)
 
 
@@ -19,12 +17,12 @@ class Digital_options_place_digital_option(Base):
             "name": "digital-options.place-digital-option",
             "version": "1.0",
             "body": {
-                "user_balance_id": int(global_value.balance_id),
+                "user_balance_id": int(self.api.balance_id),
                 "instrument_id": str(instrument_id),
                 "amount": str(amount)
             }
         }
-        request_id = str(randint(0, 100000))
+        request_id = self.request_id or self.api.pending_requests.next_request_id()
         self.send_websocket_request(self.name, data, request_id)
         return request_id
 
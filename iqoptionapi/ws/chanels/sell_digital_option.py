@@ -1,6 +1,5 @@
  
 from iqoptionapi.ws.chanels.base import Base
-import time
 
 class Sell_Digital_Option(Base):
     name = "sendMessage"
@@ -26,5 +25,5 @@ class Sell_Digital_Option(Base):
                                 "position_id":position_ids
                                 }
                         }
-        request_id = int(str(time.time()).split('.')[1])
+        request_id = self.request_id or self.api.pending_requests.next_request_id()
         self.send_websocket_request(self.name, data, request_id)
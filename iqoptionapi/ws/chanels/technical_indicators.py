@@ -1,5 +1,4 @@
 import datetime
-import time
 from iqoptionapi.ws.chanels.base import Base
 
 
@@ -14,6 +13,6 @@ class Technical_indicators(Base):
                 "id": active
             }
         }
-        request_id = str(time.time()).split('.')[1]
+        request_id = self.request_id or self.api.pending_requests.next_request_id()
         self.send_websocket_request(self.name, data, request_id)
         return request_id
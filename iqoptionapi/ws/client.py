@@ -2,10 +2,20 @@
 
 import json
 import logging
+import re
+import time
 import websocket
 import iqoptionapi.constants as OP_code
-import iqoptionapi.global_value as global_value
-from threading import Thread
+
+# top level "name" when it is the first key, as the server sends it
+NAME_PEEK = re.compile(r'\{\s*"name"\s*:\s*"([^"\\]*)"')
+
+# live deal message name -> (active id key, type key) of its msg
+LIVE_DEAL_KEYS = {
+    "live-deal-binary-option-placed": ("active_id", "option_type"),
+    "live-deal-digital-option": ("instrument_active_id", "expiration_type"),
+    "live-deal": ("instrument_active_id", "instrument_type"),
+}
 
 
 class WebsocketClient(object):
@@ -17,27 +27,123 @@ class WebsocketClient(object):
             <iqoptionapi.api.IQOptionAPI>`.
         """
         self.api = api
+        # the writer of this connection, set by IQOptionAPI.start_websocket
+        self.writer = None
         self.wss = websocket.WebSocketApp(
             self.api.wss_url, on_message=self.on_message,
             on_error=self.on_error, on_close=self.on_close,
             on_open=self.on_open)
+        # message name -> [count, handler seconds]
+        self.message_stats = {}
+        # frames dropped by the name peek vs fully decoded
+        self.frame_stats = {"skipped_frames": 0, "skipped_bytes": 0,
+                            "decoded_frames": 0, "decoded_bytes": 0}
+        self.default_handlers = {
+            "timeSync": self.on_time_sync,
+            "candle-generated": self.on_candle_generated,
+            "options": self.on_options,
+            "candles-generated": self.on_candles_generated,
+            "commission-changed": self.on_commission_changed,
+            "heartbeat": self.on_heartbeat,
+            "balances": self.on_balances,
+            "profile": self.on_profile,
+            "balance-changed": self.on_balance_changed,
+            "candles": self.on_candles,
+            "buyComplete": self.on_buy_complete,
+            "option": self.on_option,
+            "listInfoData": self.on_list_info_data,
+            "socket-option-opened": self.on_socket_option_opened,
+            "api_option_init_all_result": self.on_api_option_init_all_result,
+            "initialization-data": self.on_initialization_data,
+            "underlying-list": self.on_underlying_list,
+            "instruments": self.on_instruments,
+            "financial-information": self.on_financial_information,
+            "position-changed": self.on_position_changed,
+            "option-opened": self.on_option_opened,
+            "option-closed": self.on_option_closed,
+            "top-assets-updated": self.on_top_assets_updated,
+            "strike-list": self.on_strike_list,
+            "api_game_betinfo_result": self.on_api_game_betinfo_result,
+            "traders-mood-changed": self.on_traders_mood_changed,
+            "order-placed-temp": self.on_order_placed_temp,
+            "order": self.on_order,
+            "positions": self.on_positions,
+            "position": self.on_position,
+            "deferred-orders": self.on_deferred_orders,
+            "technical-indicators": self.on_technical_indicators,
+            "position-history": self.on_position_history,
+            "history-positions": self.on_history_positions,
+            "available-leverages": self.on_available_leverages,
+            "order-canceled": self.on_order_canceled,
+            "position-closed": self.on_position_closed,
+            "overnight-fee": self.on_overnight_fee,
+            "api_game_getoptions_result": self.on_api_game_getoptions_result,
+            "sold-options": self.on_sold_options,
+            "tpsl-changed": self.on_tpsl_changed,
+            "auto-margin-call-changed": self.on_auto_margin_call_changed,
+            "digital-option-placed": self.on_digital_option_placed,
+            "result": self.on_result,
+            "instrument-quotes-generated": self.on_instrument_quotes_generated,
+            "training-balance-reset": self.on_training_balance_reset,
+            "socket-option-closed": self.on_socket_option_closed,
+            "live-deal-binary-option-placed": self.on_live_deal_binary_option_placed,
+            "live-deal-digital-option": self.on_live_deal_digital_option,
+            "leaderboard-deals-client": self.on_leaderboard_deals_client,
+            "live-deal": self.on_live_deal,
+            "user-profile-client": self.on_user_profile_client,
+            "leaderboard-userinfo-deals-client": self.on_leaderboard_userinfo_deals_client,
+            "users-availability": self.on_users_availability,
+        }
+        self.handlers = dict(self.default_handlers)
+        # handlers registered through the api survive a reconnect
+        self.handlers.update(self.api.message_handlers)
+
+    def register_handler(self, name, handler):
+        """Add or replace the handler of a websocket message.
+
+        :param str name: The websocket message name.
+        :param handler: Callable taking the decoded message dict.
+
+        :returns: The handler it replaced or None.
+        """
+        old_handler = self.handlers.get(name)
+        self.handlers[name] = handler
+        return old_handler
 
-    def dict_queue_add(self, dict, maxdict, key1, key2, key3, value):
-        if key3 in dict[key1][key2]:
-            dict[key1][key2][key3] = value
-        else:
-            while True:
-                try:
-                    dic_size = len(dict[key1][key2])
-                except:
-                    dic_size = 0
-                if dic_size < maxdict:
-                    dict[key1][key2][key3] = value
-                    break
-                else:
-                    # del mini key
-                    del dict[key1][key2][sorted(
-                        dict[key1][key2].keys(), reverse=False)[0]]
+    def unregister_handler(self, name):
+        """Remove the handler of a websocket message, built-in
+        messages fall back to their default handler.
+
+        :returns: The removed handler or None.
+        """
+        old_handler = self.handlers.pop(name, None)
+        if name in self.default_handlers:
+            self.handlers[name] = self.default_handlers[name]
+        return old_handler
+
+    def get_message_stats(self):
+        """Get per message name counters.
+
+        :returns: dict name:{"count":int,"time":seconds spent in handler}
+        """
+        return {name: {"count": stat[0], "time": stat[1]}
+                for name, stat in list(self.message_stats.items())}
+
+    def get_frame_stats(self):
+        """:returns: dict of frames and bytes skipped vs decoded."""
+        return dict(self.frame_stats)
+
+    def reset_message_stats(self):
+        self.message_stats = {}
+        self.frame_stats = {"skipped_frames": 0, "skipped_bytes": 0,
+                            "decoded_frames": 0, "decoded_bytes": 0}
+
+    def count_message(self, name, seconds):
+        stat = self.message_stats.get(name)
+        if stat is None:
+            stat = self.message_stats[name] = [0, 0.0]
+        stat[0] += 1
+        stat[1] += seconds
 
     def api_dict_clean(self, obj):
         if len(obj) > 5000:
@@ -45,377 +151,424 @@ class WebsocketClient(object):
                 del obj[k]
                 break
 
-    def on_message(self, message):  # pylint: disable=unused-argument
+    def on_message(self, wss, message=None):  # pylint: disable=unused-argument
         """Method to process websocket messages."""
-        global_value.ssl_Mutual_exclusion = True
+        # websocket-client>=0.58 passes the WebSocketApp as first argument
+        if message is None:
+            message = wss
+        message = str(message)
         logger = logging.getLogger(__name__)
-        logger.debug(message)
-
-        message = json.loads(str(message))
-
-        if message["name"] == "timeSync":
-            self.api.timesync.server_timestamp = message["msg"]
-         #######################################################
-        # ---------------------for_realtime_candle______________
-        #######################################################
-        elif message["name"] == "candle-generated":
-            Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(message["msg"]["active_id"])]
-
-            active = str(Active_name)
-            size = int(message["msg"]["size"])
-            from_ = int(message["msg"]["from"])
-            msg = message["msg"]
-            maxdict = self.api.real_time_candles_maxdict_table[Active_name][size]
-
-            self.dict_queue_add(self.api.real_time_candles,
-                                maxdict, active, size, from_, msg)
-            self.api.candle_generated_check[active][size] = True
-
-        elif message["name"] == "options":
-            self.api.get_options_v2_data = message
-        elif message["name"] == "candles-generated":
-            Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(message["msg"]["active_id"])]
-            active = str(Active_name)
-            for k, v in message["msg"]["candles"].items():
-                v["active_id"] = message["msg"]["active_id"]
-                v["at"] = message["msg"]["at"]
-                v["ask"] = message["msg"]["ask"]
-                v["bid"] = message["msg"]["bid"]
-                v["close"] = message["msg"]["value"]
-                v["size"] = int(k)
-                size = int(v["size"])
-                from_ = int(v["from"])
-                maxdict = self.api.real_time_candles_maxdict_table[Active_name][size]
-                msg = v
-                self.dict_queue_add(self.api.real_time_candles,
-                                    maxdict, active, size, from_, msg)
-
-            self.api.candle_generated_all_size_check[active] = True
-        elif message["name"] == "commission-changed":
-            instrument_type = message["msg"]["instrument_type"]
-            active_id = message["msg"]["active_id"]
-            Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(active_id)]
-            commission = message["msg"]["commission"]["value"]
-            self.api.subscribe_commission_changed_data[instrument_type][Active_name][self.api.timesync.server_timestamp] = int(
-                commission)
-
-        #######################################################
-        # ______________________________________________________
-        #######################################################
-        elif message["name"] == "heartbeat":
-            try:
-                self.api.heartbeat(message["msg"])
-            except:
-                pass
-        elif message["name"] == "balances":
-            self.api.balances_raw = message
-
-        elif message["name"] == "profile":
-            # --------------all-------------
-            self.api.profile.msg = message["msg"]
-            if self.api.profile.msg != False:
-                # ---------------------------
-                try:
-                    self.api.profile.balance = message["msg"]["balance"]
-                except:
-                    pass
-                # Set Default account
-                if global_value.balance_id == None:
-                    for balance in message["msg"]["balances"]:
-                        if balance["type"] == 4:
-                            global_value.balance_id = balance["id"]
-                            break
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(message)
+
+        # drop frames nobody listens to before paying for json.loads
+        peek = NAME_PEEK.match(message)
+        if peek is not None:
+            name = peek.group(1)
+            if (name not in self.handlers and
+                    name not in self.api.message_listeners and
+                    not self.api.pending_requests.wants(name)):
+                self.frame_stats["skipped_frames"] += 1
+                self.frame_stats["skipped_bytes"] += len(message)
+                self.count_message(name, 0.0)
+                return
+        self.frame_stats["decoded_frames"] += 1
+        self.frame_stats["decoded_bytes"] += len(message)
+
+        message = json.loads(message)
+        name = message.get("name")
+        handler = self.handlers.get(name)
+        start = time.perf_counter()
+        try:
+            if handler is not None:
+                # a bad frame must not reach websocket-client, which would
+                # report it through on_error as a connection error
                 try:
-                    self.api.profile.balance_id = message["msg"]["balance_id"]
-                except:
-                    pass
-
+                    handler(message)
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.exception("message handler error: " + str(e))
+            for listener in self.api.message_listeners.get(name, ()):
                 try:
-                    self.api.profile.balance_type = message["msg"]["balance_type"]
-                except:
-                    pass
+                    listener(message)
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error("message listener error: " + str(e))
+        finally:
+            self.count_message(name, time.perf_counter() - start)
+            if "request_id" in message:
+                self.api.pending_requests.resolve(message)
+
+    def on_time_sync(self, message):
+        self.api.timesync.server_timestamp = message["msg"]
+    #######################################################
+    # ---------------------for_realtime_candle______________
+    #######################################################
+
+    def on_candle_generated(self, message):
+        Active_name = OP_code.get_active_name(message["msg"]["active_id"])
+
+        active = str(Active_name)
+        size = int(message["msg"]["size"])
+        from_ = int(message["msg"]["from"])
+        msg = message["msg"]
+        maxdict = self.api.real_time_candles_maxdict_table[Active_name][size]
+        if not maxdict:
+            # no stream started for this active and size
+            return
+
+        self.api.real_time_candles.ring(
+            active, size, maxdict).add(from_, msg)
+        self.api.candle_generated_check[active][size] = True
+
+    def on_options(self, message):
+        self.api.get_options_v2_data = message
+
+    def on_candles_generated(self, message):
+        Active_name = OP_code.get_active_name(message["msg"]["active_id"])
+        active = str(Active_name)
+        for k, v in message["msg"]["candles"].items():
+            v["active_id"] = message["msg"]["active_id"]
+            v["at"] = message["msg"]["at"]
+            v["ask"] = message["msg"]["ask"]
+            v["bid"] = message["msg"]["bid"]
+            v["close"] = message["msg"]["value"]
+            v["size"] = int(k)
+            size = int(v["size"])
+            from_ = int(v["from"])
+            maxdict = self.api.real_time_candles_maxdict_table[Active_name][size]
+            if not maxdict:
+                continue
+            self.api.real_time_candles.ring(
+                active, size, maxdict).add(from_, v)
+
+        self.api.candle_generated_all_size_check[active] = True
+
+    def on_commission_changed(self, message):
+        instrument_type = message["msg"]["instrument_type"]
+        active_id = message["msg"]["active_id"]
+        Active_name = OP_code.get_active_name(active_id)
+        commission = message["msg"]["commission"]["value"]
+        self.api.subscribe_commission_changed_data[instrument_type][Active_name][self.api.timesync.server_timestamp] = int(
+            commission)
+
+    #######################################################
+    # ______________________________________________________
+    #######################################################
+    def on_heartbeat(self, message):
+        try:
+            self.api.heartbeat(message["msg"])
+        except:
+            pass
 
-                try:
-                    self.api.profile.balances = message["msg"]["balances"]
-                except:
-                    pass
+    def on_balances(self, message):
+        self.api.balances_raw = message
 
-        elif message['name'] == 'balance-changed':
-            balance = message['msg']['current_balance']
-            # if self.api.get_active_account_type() == balance['type']:
+    def on_profile(self, message):
+        # --------------all-------------
+        self.api.profile.msg = message["msg"]
+        if self.api.profile.msg != False:
+            # ---------------------------
             try:
-                self.api.profile.balance = balance["amount"]
+                self.api.profile.balance = message["msg"]["balance"]
             except:
                 pass
-
+            # Set Default account
+            if self.api.balance_id == None:
+                for balance in message["msg"]["balances"]:
+                    if balance["type"] == 4:
+                        self.api.balance_id = balance["id"]
+                        break
+            if self.api.balance_id != None:
+                self.api.balance_id_ready.set()
             try:
-                self.api.profile.balance_id = balance["id"]
+                self.api.profile.balance_id = message["msg"]["balance_id"]
             except:
                 pass
 
             try:
-                self.api.profile.balance_type = balance["type"]
+                self.api.profile.balance_type = message["msg"]["balance_type"]
             except:
                 pass
 
-        elif message["name"] == "candles":
-            try:
-                self.api.candles.candles_data = message["msg"]["candles"]
-            except:
-                pass
-        # Make sure ""self.api.buySuccessful"" more stable
-        # check buySuccessful have two fail action
-        # if "user not authorized" we get buyV2_result !!!need to reconnect!!!
-        # elif "we have user authoget_balancerized" we get buyComplete
-        # I Suggest if you get selget_balancef.api.buy_successful==False you need to reconnect iqoption server
-        elif message["name"] == "buyComplete":
             try:
-                self.api.buy_successful = message["msg"]["isSuccessful"]
-                self.api.buy_id = message["msg"]["result"]["id"]
+                self.api.profile.balances = message["msg"]["balances"]
             except:
                 pass
-        # *********************buyv3
-        # buy_multi_option
-        elif message["name"] == "option":
-            self.api.buy_multi_option[str(
-                message["request_id"])] = message["msg"]
-        # **********************************************************
-        elif message["name"] == "listInfoData":
-            for get_m in message["msg"]:
-                self.api.listinfodata.set(
-                    get_m["win"], get_m["game_state"], get_m["id"])
-        elif message["name"] == "socket-option-opened":
-            id = message["msg"]["id"]
-            self.api.socket_option_opened[id] = message
-
-        elif message["name"] == "api_option_init_all_result":
-            self.api.api_option_init_all_result = message["msg"]
-        elif message["name"] == "initialization-data":
-            self.api.api_option_init_all_result_v2 = message["msg"]
-        elif message["name"] == "underlying-list":
-            self.api.underlying_list_data = message["msg"]
-        elif message["name"] == "instruments":
-            self.api.instruments = message["msg"]
-        elif message["name"] == "financial-information":
-            self.api.financial_information = message
-        elif message["name"] == "position-changed":
-
-            if message["microserviceName"] == "portfolio" and (message["msg"]["source"] == "digital-options") or message["msg"]["source"] == "trading":
-                self.api.order_async[int(
-                    message["msg"]["raw_event"]["order_ids"][0])][message["name"]] = message
-            elif message["microserviceName"] == "portfolio" and message["msg"]["source"] == "binary-options":
-                self.api.order_async[int(
-                    message["msg"]["external_id"])][message["name"]] = message
-                # print(message)
-
-        elif message["name"] == "option-opened":
-            self.api.order_async[int(
-                message["msg"]["option_id"])][message["name"]] = message
 
-        elif message["name"] == "option-closed":
+    def on_balance_changed(self, message):
+        balance = message['msg']['current_balance']
+        # if self.api.get_active_account_type() == balance['type']:
+        try:
+            self.api.profile.balance = balance["amount"]
+        except:
+            pass
+
+        try:
+            self.api.profile.balance_id = balance["id"]
+        except:
+            pass
+
+        try:
+            self.api.profile.balance_type = balance["type"]
+        except:
+            pass
+
+    def on_candles(self, message):
+        try:
+            self.api.candles.candles_data = message["msg"]["candles"]
+        except:
+            pass
+
+    # Make sure ""self.api.buySuccessful"" more stable
+    # check buySuccessful have two fail action
+    # if "user not authorized" we get buyV2_result !!!need to reconnect!!!
+    # elif "we have user authoget_balancerized" we get buyComplete
+    # I Suggest if you get selget_balancef.api.buy_successful==False you need to reconnect iqoption server
+    def on_buy_complete(self, message):
+        try:
+            self.api.buy_successful = message["msg"]["isSuccessful"]
+            self.api.buy_id = message["msg"]["result"]["id"]
+        except:
+            pass
+
+    # *********************buyv3
+    # buy_multi_option
+    def on_option(self, message):
+        self.api.buy_multi_option[str(
+            message["request_id"])] = message["msg"]
+
+    # **********************************************************
+    def on_list_info_data(self, message):
+        for get_m in message["msg"]:
+            self.api.listinfodata.set(
+                get_m["win"], get_m["game_state"], get_m["id"])
+
+    def on_socket_option_opened(self, message):
+        id = message["msg"]["id"]
+        self.api.socket_option_opened[id] = message
+
+    def on_api_option_init_all_result(self, message):
+        self.api.api_option_init_all_result = message["msg"]
+
+    def on_initialization_data(self, message):
+        self.api.api_option_init_all_result_v2 = message["msg"]
+
+    def on_underlying_list(self, message):
+        self.api.underlying_list_data = message["msg"]
+
+    def on_instruments(self, message):
+        self.api.instruments = message["msg"]
 
+    def on_financial_information(self, message):
+        self.api.financial_information = message
+
+    def on_position_changed(self, message):
+        if message["microserviceName"] == "portfolio" and (message["msg"]["source"] == "digital-options") or message["msg"]["source"] == "trading":
             self.api.order_async[int(
-                message["msg"]["option_id"])][message["name"]] = message
-            if message["microserviceName"] == "binary-options":
-                self.api.order_binary[
-                    message["msg"]["option_id"]] = message['msg']
-
-        elif message["name"] == "top-assets-updated":
-            self.api.top_assets_updated_data[str(
-                message["msg"]["instrument_type"])] = message["msg"]["data"]
-        elif message["name"] == "strike-list":
-            self.api.strike_list = message
-        elif message["name"] == "api_game_betinfo_result":
-            try:
-                self.api.game_betinfo.isSuccessful = message["msg"]["isSuccessful"]
-                self.api.game_betinfo.dict = message["msg"]
-            except:
-                pass
-        elif message["name"] == "traders-mood-changed":
-            self.api.traders_mood[message["msg"]
-                                  ["asset_id"]] = message["msg"]["value"]
-        # ------for forex&cfd&crypto..
-        elif message["name"] == "order-placed-temp":
-            self.api.buy_order_id = message["msg"]["id"]
-        elif message["name"] == "order":
-            self.api.order_data = message
-        elif message["name"] == "positions":
-            self.api.positions = message
-        elif message["name"] == "position":
-            self.api.position = message
-        elif message["name"] == "deferred-orders":
-            self.api.deferred_orders = message
-
-        elif message["name"] == "technical-indicators":
-            if message["msg"].get("indicators") != None:
-                self.api_dict_clean(self.api.technical_indicators)
-                self.api.technical_indicators[message["request_id"]
-                                              ] = message["msg"]["indicators"]
-            else:
-                self.api.technical_indicators[message["request_id"]] = {
-                    "code": "no_technical_indicator_available",
-                    "message": message["msg"]["message"]
-                }
-        elif message["name"] == "position-history":
-            self.api.position_history = message
-        elif message["name"] == "history-positions":
-            self.api.position_history_v2 = message
-        elif message["name"] == "available-leverages":
-            self.api.available_leverages = message
-        elif message["name"] == "order-canceled":
-            self.api.order_canceled = message
-        elif message["name"] == "position-closed":
-            self.api.close_position_data = message
-            self.api.sold_digital_options_respond = message
-        elif message["name"] == "overnight-fee":
-            self.api.overnight_fee = message
-        elif message["name"] == "api_game_getoptions_result":
-            self.api.api_game_getoptions_result = message
-        elif message["name"] == "sold-options":
-            self.api.sold_options_respond = message
-        elif message["name"] == "tpsl-changed":
-            self.api.tpsl_changed_respond = message
-        elif message["name"] == "position-changed":
-            self.api.position_changed = message
-        elif message["name"] == "auto-margin-call-changed":
-            self.api.auto_margin_call_changed_respond = message
-        elif message["name"] == "digital-option-placed":
-            if message["msg"].get("id") != None:
-                self.api_dict_clean(self.api.digital_option_placed_id)
-                self.api.digital_option_placed_id[message["request_id"]
-                                                  ] = message["msg"]["id"]
-            else:
-                self.api.digital_option_placed_id[message["request_id"]] = {
-                    "code": "error_place_digital_order",
-                    "message": message["msg"]["message"]
-                }
+                message["msg"]["raw_event"]["order_ids"][0])][message["name"]] = message
+        elif message["microserviceName"] == "portfolio" and message["msg"]["source"] == "binary-options":
+            self.api.order_async[int(
+                message["msg"]["external_id"])][message["name"]] = message
+            # print(message)
+
+    def on_option_opened(self, message):
+        self.api.order_async[int(
+            message["msg"]["option_id"])][message["name"]] = message
+
+    def on_option_closed(self, message):
+        self.api.order_async[int(
+            message["msg"]["option_id"])][message["name"]] = message
+        if message["microserviceName"] == "binary-options":
+            self.api.order_binary[
+                message["msg"]["option_id"]] = message['msg']
+
+    def on_top_assets_updated(self, message):
+        self.api.top_assets_updated_data[str(
+            message["msg"]["instrument_type"])] = message["msg"]["data"]
+
+    def on_strike_list(self, message):
+        self.api.strike_list = message
+
+    def on_api_game_betinfo_result(self, message):
+        try:
+            self.api.game_betinfo.isSuccessful = message["msg"]["isSuccessful"]
+            self.api.game_betinfo.dict = message["msg"]
+        except:
+            pass
 
-        elif message["name"] == "result":
-            self.api.result = message["msg"]["success"]
-        elif message["name"] == "instrument-quotes-generated":
-
-            Active_name = list(OP_code.ACTIVES.keys())[list(
-                OP_code.ACTIVES.values()).index(message["msg"]["active"])]
-            period = message["msg"]["expiration"]["period"]
-            ans = {}
-            for data in message["msg"]["quotes"]:
-                # FROM IQ OPTION SOURCE CODE
-                # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.5.1/sources/com/iqoption/dto/entity/strike/Quote.java#L91
-                if data["price"]["ask"] == None:
-                    ProfitPercent = None
-                else:
-                    askPrice = (float)(data["price"]["ask"])
-                    ProfitPercent = ((100-askPrice)*100)/askPrice
-
-                for symble in data["symbols"]:
-                    try:
-                        """
-                        ID SAMPLE:doUSDJPY-OTC201811111204PT1MC11350481
-                        """
-
-                        """
-                        dict ID-prodit:{ID:profit}
-                        """
-
-                        ans[symble] = ProfitPercent
-                    except:
-                        pass
-            self.api.instrument_quites_generated_timestamp[Active_name][
-                period] = message["msg"]["expiration"]["timestamp"]
-            self.api.instrument_quites_generated_data[Active_name][period] = ans
-
-            self.api.instrument_quotes_generated_raw_data[Active_name][period] = message
-        elif message["name"] == "training-balance-reset":
-            self.api.training_balance_reset_request = message["msg"]["isSuccessful"]
-        elif message["name"] == "socket-option-closed":
-            id = message["msg"]["id"]
-            self.api.socket_option_closed[id] = message
-        elif message["name"] == "live-deal-binary-option-placed":
-            name = message["name"]
-            active_id = message["msg"]["active_id"]
-            active = list(OP_code.ACTIVES.keys())[
-                list(OP_code.ACTIVES.values()).index(active_id)]
-            _type = message["msg"]["option_type"]
-            try:
-                self.api.live_deal_data[name][active][_type].appendleft(
-                    message["msg"])
-                if hasattr(self.api.binary_live_deal_cb, '__call__'):
-                    cb_data = {
-                        "active": active,
-                        **message["msg"]
-                    }
-                    realbinary = Thread(target=self.api.binary_live_deal_cb,
-                                        kwargs=(cb_data))
-                    realbinary.daemon = True
-                    realbinary.start()
-            except:
-                pass
-        elif message["name"] == "live-deal-digital-option":
-            name = message["name"]
-            active_id = message["msg"]["instrument_active_id"]
-            active = list(OP_code.ACTIVES.keys())[
-                list(OP_code.ACTIVES.values()).index(active_id)]
-            _type = message["msg"]["expiration_type"]
-            try:
-                self.api.live_deal_data[name][active][_type].appendleft(
-                    message["msg"])
-                if hasattr(self.api.digital_live_deal_cb, '__call__'):
-                    cb_data = {
-                        "active": active,
-                        **message["msg"]
-                    }
-                    realdigital = Thread(target=self.api.digital_live_deal_cb,
-                                         kwargs=(cb_data))
-                    realdigital.daemon = True
-                    realdigital.start()
-            except:
-                pass
+    def on_traders_mood_changed(self, message):
+        self.api.traders_mood[message["msg"]
+                              ["asset_id"]] = message["msg"]["value"]
 
-        elif message["name"] == "leaderboard-deals-client":
-            self.api.leaderboard_deals_client = message["msg"]
-        elif message["name"] == "live-deal":
-            name = message["name"]
-            active_id = message["msg"]["instrument_active_id"]
-            active = list(OP_code.ACTIVES.keys())[
-                list(OP_code.ACTIVES.values()).index(active_id)]
-            _type = message["msg"]["instrument_type"]
-            try:
-                self.api.live_deal_data[name][active][_type].appendleft(
-                    message["msg"])
-            except:
-                pass
+    # ------for forex&cfd&crypto..
+    def on_order_placed_temp(self, message):
+        self.api.buy_order_id = message["msg"]["id"]
+
+    def on_order(self, message):
+        self.api.order_data = message
+
+    def on_positions(self, message):
+        self.api.positions = message
+
+    def on_position(self, message):
+        self.api.position = message
+
+    def on_deferred_orders(self, message):
+        self.api.deferred_orders = message
+
+    def on_technical_indicators(self, message):
+        if message["msg"].get("indicators") != None:
+            self.api_dict_clean(self.api.technical_indicators)
+            self.api.technical_indicators[message["request_id"]
+                                          ] = message["msg"]["indicators"]
+        else:
+            self.api.technical_indicators[message["request_id"]] = {
+                "code": "no_technical_indicator_available",
+                "message": message["msg"]["message"]
+            }
+
+    def on_position_history(self, message):
+        self.api.position_history = message
+
+    def on_history_positions(self, message):
+        self.api.position_history_v2 = message
+
+    def on_available_leverages(self, message):
+        self.api.available_leverages = message
+
+    def on_order_canceled(self, message):
+        self.api.order_canceled = message
+
+    def on_position_closed(self, message):
+        self.api.close_position_data = message
+        self.api.sold_digital_options_respond = message
+
+    def on_overnight_fee(self, message):
+        self.api.overnight_fee = message
+
+    def on_api_game_getoptions_result(self, message):
+        self.api.api_game_getoptions_result = message
+
+    def on_sold_options(self, message):
+        self.api.sold_options_respond = message
+
+    def on_tpsl_changed(self, message):
+        self.api.tpsl_changed_respond = message
+
+    def on_auto_margin_call_changed(self, message):
+        self.api.auto_margin_call_changed_respond = message
 
-        elif message["name"] == "user-profile-client":
-            self.api.user_profile_client = message["msg"]
-        elif message["name"] == "leaderboard-userinfo-deals-client":
-            self.api.leaderboard_userinfo_deals_client = message["msg"]
-        elif message["name"] == "users-availability":
-            self.api.users_availability = message["msg"]
+    def on_digital_option_placed(self, message):
+        if message["msg"].get("id") != None:
+            self.api_dict_clean(self.api.digital_option_placed_id)
+            self.api.digital_option_placed_id[message["request_id"]
+                                              ] = message["msg"]["id"]
         else:
+            self.api.digital_option_placed_id[message["request_id"]] = {
+                "code": "error_place_digital_order",
+                "message": message["msg"]["message"]
+            }
+
+    def on_result(self, message):
+        self.api.result = message["msg"]["success"]
+
+    def on_instrument_quotes_generated(self, message):
+        Active_name = OP_code.get_active_name(message["msg"]["active"])
+        period = message["msg"]["expiration"]["period"]
+        # only the changed symbols are written, see QuoteStore
+        book = self.api.quotes.update(Active_name, period, message["msg"])
+        self.api.instrument_quites_generated_timestamp[Active_name][
+            period] = book.expiration
+        """
+        dict ID-prodit:{ID:profit}, updated in place
+        """
+        self.api.instrument_quites_generated_data[Active_name][period] = book.profits
+
+    def on_training_balance_reset(self, message):
+        self.api.training_balance_reset_request = message["msg"]["isSuccessful"]
+
+    def on_socket_option_closed(self, message):
+        id = message["msg"]["id"]
+        self.api.socket_option_closed[id] = message
+
+    def on_live_deal_binary_option_placed(self, message):
+        name = message["name"]
+        active_id = message["msg"]["active_id"]
+        active = OP_code.get_active_name(active_id)
+        _type = message["msg"]["option_type"]
+        try:
+            self.api.live_deal_data[name][active][_type].appendleft(
+                message["msg"])
+            if callable(self.api.binary_live_deal_cb):
+                cb_data = {
+                    "active": active,
+                    **message["msg"]
+                }
+                self.api.live_deal_pool.submit(
+                    self.api.binary_live_deal_cb, cb_data)
+        except:
+            pass
+
+    def on_live_deal_digital_option(self, message):
+        name = message["name"]
+        active_id = message["msg"]["instrument_active_id"]
+        active = OP_code.get_active_name(active_id)
+        _type = message["msg"]["expiration_type"]
+        try:
+            self.api.live_deal_data[name][active][_type].appendleft(
+                message["msg"])
+            if callable(self.api.digital_live_deal_cb):
+                cb_data = {
+                    "active": active,
+                    **message["msg"]
+                }
+                self.api.live_deal_pool.submit(
+                    self.api.digital_live_deal_cb, cb_data)
+        except:
             pass
-        global_value.ssl_Mutual_exclusion = False
 
-    @staticmethod
-    def on_error(wss, error):  # pylint: disable=unused-argument
+    def on_leaderboard_deals_client(self, message):
+        self.api.leaderboard_deals_client = message["msg"]
+
+    def on_live_deal(self, message):
+        name = message["name"]
+        active_id = message["msg"]["instrument_active_id"]
+        active = OP_code.get_active_name(active_id)
+        _type = message["msg"]["instrument_type"]
+        try:
+            self.api.live_deal_data[name][active][_type].appendleft(
+                message["msg"])
+        except:
+            pass
+
+    def on_user_profile_client(self, message):
+        self.api.user_profile_client = message["msg"]
+
+    def on_leaderboard_userinfo_deals_client(self, message):
+        self.api.leaderboard_userinfo_deals_client = message["msg"]
+
+    def on_users_availability(self, message):
+        self.api.users_availability = message["msg"]
+
+    def on_error(self, wss, error):  # pylint: disable=unused-argument
         """Method to process websocket errors."""
         logger = logging.getLogger(__name__)
         logger.error(error)
-        global_value.websocket_error_reason = str(error)
-        global_value.check_websocket_if_error = True
+        self.api.websocket_error_reason = str(error)
+        self.api.check_websocket_if_error = True
 
-    @staticmethod
-    def on_open(wss):  # pylint: disable=unused-argument
+    def on_open(self, wss):  # pylint: disable=unused-argument
         """Method to process websocket open."""
         logger = logging.getLogger(__name__)
         logger.debug("Websocket client connected.")
-        global_value.check_websocket_if_connect = 1
+        self.api.check_websocket_if_connect = 1
 
-    @staticmethod
-    def on_close(wss):  # pylint: disable=unused-argument
+    def on_close(self, wss, *args):  # pylint: disable=unused-argument
         """Method to process websocket close."""
         logger = logging.getLogger(__name__)
         logger.debug("Websocket connection closed.")
-        global_value.check_websocket_if_connect = 0
+        self.api.check_websocket_if_connect = 0
+        if self.writer is not None:
+            # later sends raise, so callers reconnect instead of waiting
+            self.writer.stop(timeout=0)
+        self.api.pending_requests.fail_all(
+            websocket.WebSocketConnectionClosedException("websocket closed"))
@@ -0,0 +1,138 @@
+"""Module for IQ option market metadata cache."""
+
+import threading
+import time
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.ws.schedule import ScheduleIndex
+
+# commission-changed instrument_type -> option type of the init data
+INSTRUMENT_OPTIONS = {"turbo-option": "turbo", "binary-option": "binary",
+                      "digital-option": "digital"}
+
+
+class MarketData(object):
+    """TTL cache of init data, instruments and payouts.
+
+    Payloads fetched from the server are kept for ttl seconds and indexed
+    once into (option, name) keyed dicts, so open status and payout
+    lookups are dict reads. commission-changed and top-assets-updated
+    pushes update the payouts in place between reloads. The schedules of
+    the underlying-list and instruments payloads go to a
+    :class:`ScheduleIndex <iqoptionapi.ws.schedule.ScheduleIndex>`.
+    """
+
+    def __init__(self, api, ttl=60):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param ttl: Seconds a loaded payload is served from the cache,
+            0 disables caching.
+        """
+        self.ttl = ttl
+        # key -> (monotonic load time, payload)
+        self.payloads = {}
+        # (option, name) -> active dict of the init data
+        self.actives = {}
+        # (option, name) -> payout, e.g. 0.82
+        self.profits = {}
+        # (option, name) -> True/False for binary and turbo
+        self.opens = {}
+        self.schedules = ScheduleIndex()
+        self.lock = threading.Lock()
+        api.add_message_listener("commission-changed", self.on_commission_changed)
+        api.add_message_listener("top-assets-updated", self.on_top_assets_updated)
+
+    def get(self, key, loader):
+        """Get a payload, calling loader() only if it is missing or stale.
+
+        :param key: The cache key, e.g. "init" or ("instruments", "forex").
+        :param loader: Callable fetching the payload, None is not cached.
+        """
+        entry = self.payloads.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        payload = loader()
+        if payload is not None:
+            with self.lock:
+                self.payloads[key] = (time.monotonic(), payload)
+                if key == "init":
+                    self.__index_init(payload["result"])
+                elif key == "init_v2":
+                    self.__index_init(payload)
+                elif key == "underlying":
+                    self.schedules.update("digital", payload["underlying"],
+                                          "underlying")
+                elif isinstance(key, tuple) and key[0] == "instruments":
+                    self.schedules.update(key[1], payload["instruments"])
+        return payload
+
+    def fresh(self, key):
+        """:returns: True if key is cached and not stale."""
+        entry = self.payloads.get(key)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def invalidate(self, key=None):
+        """Drop one cached payload, or all of them if key is None."""
+        with self.lock:
+            if key is None:
+                self.payloads.clear()
+            else:
+                self.payloads.pop(key, None)
+
+    def __index_init(self, data):
+        # built aside and swapped in, so readers never see a partial index
+        # and actives missing from the reload are dropped
+        options = [option for option in ("binary", "turbo") if option in data]
+        actives = {key: value for key, value in self.actives.items()
+                   if key[0] not in options}
+        opens = {key: value for key, value in self.opens.items()
+                 if key[0] not in options}
+        profits = {key: value for key, value in self.profits.items()
+                   if key[0] not in options}
+        for option in options:
+            for active in data[option]["actives"].values():
+                name = str(active["name"]).split(".")[1]
+                actives[(option, name)] = active
+                opens[(option, name)] = (active["enabled"] == True and
+                                         active["is_suspended"] != True)
+                try:
+                    profits[(option, name)] = (
+                        100.0 - active["option"]["profit"]["commission"]) / 100.0
+                except (KeyError, TypeError):
+                    pass
+        self.actives, self.opens, self.profits = actives, opens, profits
+
+    def on_commission_changed(self, message):
+        msg = message["msg"]
+        instrument_type = msg["instrument_type"]
+        option = INSTRUMENT_OPTIONS.get(instrument_type, instrument_type)
+        try:
+            name = OP_code.get_active_name(msg["active_id"])
+        except ValueError:
+            return
+        self.profits[(option, name)] = (
+            100.0 - float(msg["commission"]["value"])) / 100.0
+
+    def on_top_assets_updated(self, message):
+        msg = message["msg"]
+        option = INSTRUMENT_OPTIONS.get(msg["instrument_type"],
+                                        msg["instrument_type"])
+        for asset in msg["data"]:
+            spot_profit = asset.get("spot_profit")
+            if not isinstance(spot_profit, dict) or "value" not in spot_profit:
+                continue
+            try:
+                name = OP_code.get_active_name(asset["active_id"])
+            except (KeyError, ValueError):
+                continue
+            self.profits[(option, name)] = float(spot_profit["value"]) / 100.0
+
+    def get_profit(self, name, option="turbo"):
+        """:returns: The payout of an active, e.g. 0.82, or None."""
+        return self.profits.get((option, name))
+
+    def is_open(self, name, option="turbo"):
+        """:returns: True/False for a binary or turbo active, None if
+            unknown."""
+        return self.opens.get((option, name))
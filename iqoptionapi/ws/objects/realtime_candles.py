@@ -0,0 +1,173 @@
+"""Module for IQ Option real time candles store."""
+
+import threading
+
+import numpy as np
+
+
+class CandleRing(object):
+    """Fixed capacity ring of real time candles of one active and size.
+
+    Every column is allocated twice its capacity and each write goes to
+    both halves, so the candles in time order are always one contiguous
+    slice and :meth:`view` can return numpy views without copying.
+    """
+
+    columns = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, capacity):
+        """
+        :param int capacity: The max number of candles kept.
+        """
+        self.capacity = int(capacity)
+        self.timestamp = np.zeros(2 * self.capacity, dtype=np.int64)
+        self.open = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.high = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.low = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.close = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.volume = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.messages = [None] * self.capacity
+        self.count = 0
+        self.end = 0  # next slot to write
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def __write(self, slot, from_, msg):
+        for idx in (slot, slot + self.capacity):
+            self.timestamp[idx] = from_
+            self.open[idx] = msg.get("open", np.nan)
+            self.high[idx] = msg.get("max", np.nan)
+            self.low[idx] = msg.get("min", np.nan)
+            self.close[idx] = msg.get("close", np.nan)
+            self.volume[idx] = msg.get("volume", 0)
+        self.messages[slot] = msg
+
+    def add(self, from_, msg):
+        """Insert or update the candle starting at from_.
+
+        :param int from_: The candle open timestamp.
+        :param dict msg: The candle as sent by the server.
+        """
+        with self.lock:
+            if self.count:
+                last = (self.end - 1) % self.capacity
+                last_from = self.timestamp[last]
+                if from_ == last_from:
+                    self.__write(last, from_, msg)
+                    return
+                if from_ < last_from:
+                    self.__insert_old(from_, msg)
+                    return
+            self.__write(self.end, from_, msg)
+            self.end = (self.end + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+
+    def __insert_old(self, from_, msg):
+        # out of order candle, rare: rebuild in time order. Like the old
+        # dict store a new candle evicts the oldest one when full.
+        candles = self.__items()
+        if from_ not in candles and len(candles) >= self.capacity:
+            del candles[min(candles)]
+        candles[from_] = msg
+        ordered = sorted(candles.items())
+        self.count = 0
+        self.end = 0
+        for key, value in ordered:
+            self.__write(self.end, key, value)
+            self.end = (self.end + 1) % self.capacity
+            self.count += 1
+
+    def __start(self):
+        return (self.end - self.count) % self.capacity
+
+    def __items(self):
+        start = self.__start()
+        candles = {}
+        for i in range(self.count):
+            slot = (start + i) % self.capacity
+            candles[int(self.timestamp[slot])] = self.messages[slot]
+        return candles
+
+    def view(self):
+        """Get the candles in time order as numpy views, not copies.
+
+        The views are only valid until the next candle is added: the ring
+        then overwrites or moves the slots they point at. Copy them
+        (``arr.copy()``) to keep them longer.
+
+        :returns: dict column name:numpy array.
+        """
+        with self.lock:
+            start = self.__start()
+            stop = start + self.count
+            return {name: getattr(self, name)[start:stop]
+                    for name in self.columns}
+
+    def to_dict(self):
+        """:returns: dict from:candle in time order, the legacy form."""
+        with self.lock:
+            return self.__items()
+
+    def resized(self, capacity):
+        """:returns: A new ring with the latest candles of this one."""
+        ring = CandleRing(capacity)
+        for from_, msg in self.to_dict().items():
+            ring.add(from_, msg)
+        return ring
+
+
+class RealtimeCandles(object):
+    """Real time candle rings keyed by active name and candle size."""
+
+    def __init__(self):
+        self.rings = {}
+        self.lock = threading.Lock()
+
+    def ring(self, active, size, capacity):
+        """Get the ring of active and size, created or resized to capacity.
+
+        :returns: The instance of :class:`CandleRing`.
+        """
+        key = (str(active), int(size))
+        ring = self.rings.get(key)
+        if ring is None or ring.capacity != int(capacity):
+            with self.lock:
+                ring = self.rings.get(key)
+                if ring is None:
+                    ring = CandleRing(capacity)
+                elif ring.capacity != int(capacity):
+                    ring = ring.resized(capacity)
+                self.rings[key] = ring
+        return ring
+
+    def get(self, active, size):
+        """:returns: The ring of active and size or None."""
+        return self.rings.get((str(active), int(size)))
+
+    def sizes(self, active):
+        return sorted(size for name, size in list(self.rings)
+                      if name == str(active))
+
+    def to_dict(self, active=None, size=None):
+        """Get candles in the legacy nested dict form.
+
+        :returns: {active:{size:{from:candle}}}, {size:{from:candle}} if
+            active is given or {from:candle} if size is given too.
+        """
+        if active is not None and size is not None:
+            ring = self.get(active, size)
+            if ring is None:
+                raise KeyError((active, size))
+            return ring.to_dict()
+        ans = {}
+        for (name, ring_size), ring in list(self.rings.items()):
+            if active is None or name == str(active):
+                ans.setdefault(name, {})[ring_size] = ring.to_dict()
+        if active is not None:
+            if str(active) not in ans:
+                raise KeyError(active)
+            return ans[str(active)]
+        return ans
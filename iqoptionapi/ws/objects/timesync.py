@@ -2,35 +2,162 @@
 
 import time
 import datetime
+import threading
+from collections import deque
 
 from iqoptionapi.ws.objects.base import Base
 
+# consecutive frames that must agree on a smaller offset before it is taken
+# as the server clock set back rather than late frames
+STEP_FRAMES = 3
+
 
 class TimeSync(Base):
-    """Class for IQ Option TimeSync websocket object."""
+    """Class for IQ Option TimeSync websocket object.
+
+    Every timeSync frame is paired with time.monotonic() when it arrives.
+    The server time is the local monotonic clock plus an offset, so it is
+    interpolated between frames instead of jumping once a second. The
+    offset is taken from the least delayed of the recent frames and
+    corrected for the drift between the two clocks.
+    """
 
-    def __init__(self):
+    def __init__(self, window=60):
+        """
+        :param int window: The number of recent frames the offset is
+            estimated from; the drift is fitted over the least delayed
+            frame of each of the last 30 windows.
+        """
         super(TimeSync, self).__init__()
         self.__name = "timeSync"
-        self.__server_timestamp = time.time()
         self.__expiration_time = 1
+        self.window = window
+        # (monotonic, server seconds - monotonic) of the recent frames
+        self.__samples = deque(maxlen=window)
+        # frames of the current window, least delayed frame per window
+        self.__block = []
+        self.__anchors = deque(maxlen=30)
+        # recent frames more than a second behind the estimate
+        self.__behind = deque(maxlen=STEP_FRAMES)
+        self.__offset = None
+        self.__drift = 0.0
+        self.__latency = 0.0
+        self.__updated = threading.Condition()
+        self.__count = 0
 
     @property
     def server_timestamp(self):
         """Property to get server timestamp.
 
-        :returns: The server timestamp.
+        :returns: The server timestamp, interpolated from the latest
+            frames; the local time before the first frame.
         """
-        while self.__server_timestamp==None:
-            time.sleep(0.2)
-            pass
-
-        return self.__server_timestamp / 1000
+        offset = self.__offset
+        if offset is None:
+            return time.time()
+        now = time.monotonic()
+        return now + offset + self.__drift * now
 
     @server_timestamp.setter
     def server_timestamp(self, timestamp):
-        """Method to set server timestamp."""
-        self.__server_timestamp = timestamp
+        """Method to set server timestamp.
+
+        :param timestamp: The server time in milliseconds, None forgets
+            the frames seen so far.
+        """
+        with self.__updated:
+            if timestamp is None:
+                self.__reset()
+                return
+            self.__add(time.monotonic(), timestamp / 1000.0)
+            self.__count += 1
+            self.__updated.notify_all()
+
+    def __reset(self):
+        self.__samples.clear()
+        self.__block = []
+        self.__anchors.clear()
+        self.__behind.clear()
+        self.__offset = None
+        self.__drift = 0.0
+        self.__latency = 0.0
+
+    def __add(self, now, server):
+        offset = server - now
+        frame = (now, offset)
+        samples = self.__samples
+        behind = self.__behind
+        if self.__offset is not None and \
+                offset < self.__offset + self.__drift * now - 1:
+            # a frame delayed by a stall, or the server clock set back. Late
+            # frames arriving together are a second apart in offset, only
+            # a step gives consecutive frames the same offset.
+            behind.append(frame)
+            offsets = [o for _, o in behind]
+            if len(behind) == STEP_FRAMES and max(offsets) - min(offsets) < 0.5:
+                # older frames are useless, start over from these
+                stepped = list(behind)[:-1]
+                self.__reset()
+                samples.extend(stepped)
+                self.__block.extend(stepped)
+        else:
+            behind.clear()
+        samples.append(frame)
+        self.__block.append(frame)
+        if len(self.__block) == self.window:
+            # the least delayed frame of each full window anchors the drift
+            self.__anchors.append(max(self.__block, key=lambda x: x[1]))
+            self.__block = []
+        drift = self.__drift
+        anchors = self.__anchors
+        if len(anchors) > 2:
+            # least squares slope of the anchors, seconds per second
+            mean_t = sum(t for t, _ in anchors) / len(anchors)
+            mean_o = sum(o for _, o in anchors) / len(anchors)
+            var = sum((t - mean_t) ** 2 for t, _ in anchors)
+            drift = sum((t - mean_t) * (o - mean_o) for t, o in anchors) / var
+            drift = max(-0.001, min(0.001, drift))
+        # a frame is only ever late, the largest offset is the least delayed
+        best = max(o - drift * t for t, o in samples)
+        self.__drift = drift
+        self.__offset = best
+        self.__latency = best + drift * now - offset
+
+    def wait(self, timeout=None):
+        """Wait for the next timeSync frame.
+
+        :returns: The server timestamp, None on timeout.
+        """
+        with self.__updated:
+            count = self.__count
+            if not self.__updated.wait_for(
+                    lambda: self.__count > count, timeout):
+                return None
+        return self.server_timestamp
+
+    def wait_first(self, timeout=None):
+        """Wait until a timeSync frame was seen since the last reset.
+
+        :returns: The server timestamp, None on timeout.
+        """
+        with self.__updated:
+            if not self.__updated.wait_for(
+                    lambda: self.__offset is not None, timeout):
+                return None
+        return self.server_timestamp
+
+    def stats(self):
+        """:returns: dict with the offset of the server clock to the local
+            one (time.time()) in seconds, the drift in seconds per second,
+            the delay of the latest frame compared to the least delayed
+            recent one in seconds, and the number of frames used.
+        """
+        offset = self.__offset
+        return {"offset": None if offset is None else
+                self.server_timestamp - time.time(),
+                "drift": self.__drift,
+                "latency": self.__latency,
+                "samples": len(self.__samples)}
 
     @property
     def server_datetime(self):
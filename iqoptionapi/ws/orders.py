@@ -0,0 +1,124 @@
+"""Module for IQ option pipelined order placement."""
+
+import threading
+import time
+from collections import deque
+
+
+class OrderHandle(object):
+    """One order sent through :class:`OrderPipeline`."""
+
+    def __init__(self, pipeline, future, slot):
+        self.pipeline = pipeline
+        self.future = future
+        self.request_id = future.request_id
+        self.slot = slot
+        self.sent_at = time.perf_counter()
+        # seconds from send to ack, None until acked
+        self.latency = None
+        self.__released = False
+        self.__lock = threading.Lock()
+
+    def release(self):
+        """Give the in-flight window slot back, once."""
+        with self.__lock:
+            if self.__released:
+                return
+            self.__released = True
+        self.slot.release()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """Wait for the ack of the order.
+
+        :returns: (True, option id), (False, error message) or
+            (False, None) on timeout or a lost connection.
+        """
+        if not self.future.wait(timeout):
+            self.pipeline.api.pending_requests.discard(self.request_id)
+            self.release()
+            return False, None
+        if self.future.exception is not None:
+            return False, None
+        msg = self.future.message["msg"]
+        if "message" in msg:
+            return False, msg["message"]
+        return True, msg["id"]
+
+
+class OrderPipeline(object):
+    """Sends orders without waiting for the previous ack.
+
+    Every order gets a unique request_id from :class:`PendingRequests
+    <iqoptionapi.ws.pending.PendingRequests>` and its ack is matched by it.
+    At most window orders are in flight, further sends block until an ack
+    frees a slot.
+    """
+
+    def __init__(self, api, window=32, response_names=("option",)):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param int window: The max number of orders waiting for an ack.
+        """
+        self.api = api
+        self.response_names = response_names
+        self.set_window(window)
+        # send to ack seconds of the latest orders
+        self.latencies = deque(maxlen=10000)
+        self.sent = 0
+        self.acked = 0
+
+    def set_window(self, window):
+        self.window = window
+        self.slots = threading.BoundedSemaphore(window)
+
+    def submit(self, channel, *args, timeout=None):
+        """Send an order chanel call, the request_id is passed as its last
+        argument, e.g. ``submit(api.buyv3, price, active, direction,
+        duration)``.
+
+        :param timeout: (optional) The max seconds to wait for a free slot,
+            the only keyword argument.
+
+        :returns: The instance of :class:`OrderHandle`, None if no slot got
+            free in time.
+        """
+        slot = self.slots
+        if not slot.acquire(timeout=timeout):
+            return None
+        future = self.api.pending_requests.create(names=self.response_names)
+        handle = OrderHandle(self, future, slot)
+        future.add_done_callback(lambda _: self.__acked(handle))
+        try:
+            channel(*(args + (future.request_id,)))
+        except:
+            self.api.pending_requests.discard(future.request_id)
+            handle.release()
+            raise
+        self.sent += 1
+        return handle
+
+    def __acked(self, handle):
+        handle.release()
+        # the handle has the reply, don't keep a copy in buy_multi_option
+        self.api.buy_multi_option.pop(handle.request_id, None)
+        if handle.future.exception is None:
+            handle.latency = time.perf_counter() - handle.sent_at
+            self.latencies.append(handle.latency)
+            self.acked += 1
+
+    def stats(self):
+        """:returns: dict of order counts and send to ack latency seconds."""
+        latencies = sorted(self.latencies)
+        ans = {"window": self.window, "sent": self.sent, "acked": self.acked}
+        if latencies:
+            ans.update({
+                "latency_mean": sum(latencies) / len(latencies),
+                "latency_p50": latencies[len(latencies) // 2],
+                "latency_p99": latencies[min(len(latencies) - 1,
+                                             len(latencies) * 99 // 100)],
+                "latency_max": latencies[-1]})
+        return ans
@@ -0,0 +1,146 @@
+"""Module for IQ option trade outcome tracker."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from iqoptionapi.ws.pending import RequestFuture
+
+
+def _list_info_data(message):
+    return [(item["id"], item) for item in message["msg"]]
+
+
+def _socket_option_closed(message):
+    return [(message["msg"]["id"], message)]
+
+
+def _option_closed(message):
+    if message.get("microserviceName") != "binary-options":
+        return []
+    return [(message["msg"]["option_id"], message["msg"])]
+
+
+def _position_changed(message):
+    msg = message["msg"]
+    if msg.get("source") == "binary-options":
+        return [(int(msg["external_id"]), message)]
+    if msg.get("source") in ("digital-options", "trading"):
+        return [(int(msg["raw_event"]["order_ids"][0]), message)]
+    return []
+
+
+# message name -> function giving the (order id, outcome) pairs of a message
+OUTCOME_MESSAGES = {
+    "listInfoData": _list_info_data,
+    "socket-option-closed": _socket_option_closed,
+    "option-closed": _option_closed,
+    "position-changed": _position_changed,
+}
+
+
+class OutcomeTracker(object):
+    """Futures of trade outcomes, resolved from the websocket thread.
+
+    It listens to the outcome messages once; waiting for an order costs a
+    blocked future instead of a spinning thread. The latest outcome of
+    each order is kept, so a future created after the message arrived is
+    done at once.
+    """
+
+    def __init__(self, api, maxsize=10000):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param int maxsize: The max number of latest outcomes kept.
+        """
+        self.maxsize = maxsize
+        # (name, order id) -> latest outcome
+        self.outcomes = OrderedDict()
+        # (name, order id) -> [(future, until)]
+        self.waiters = {}
+        self.lock = threading.Lock()
+        for name in OUTCOME_MESSAGES:
+            api.add_message_listener(name, self.on_message)
+
+    def on_message(self, message):
+        name = message["name"]
+        for order_id, outcome in OUTCOME_MESSAGES[name](message):
+            key = (name, order_id)
+            ready = []
+            with self.lock:
+                self.outcomes[key] = outcome
+                self.outcomes.move_to_end(key)
+                if len(self.outcomes) > self.maxsize:
+                    self.outcomes.popitem(last=False)
+                waiters = self.waiters.get(key)
+                if waiters:
+                    ready = [w for w in waiters
+                             if w[1] is None or w[1](outcome)]
+                    waiters[:] = [w for w in waiters if w not in ready]
+                    if not waiters:
+                        del self.waiters[key]
+            for future, _ in ready:
+                future.set_result(outcome)
+
+    def future(self, name, order_id, until=None):
+        """Get a future of the outcome of an order.
+
+        :param str name: The outcome message name, a key of
+            :data:`OUTCOME_MESSAGES`.
+        :param order_id: The option/order id.
+        :param until: (optional) Callable, the future is only done by an
+            outcome it returns True for.
+
+        :returns: The instance of :class:`RequestFuture
+            <iqoptionapi.ws.pending.RequestFuture>`, its result is the
+            outcome (message or message part).
+        """
+        key = (name, order_id)
+        future = RequestFuture(str(order_id), (name,))
+        with self.lock:
+            outcome = self.outcomes.get(key)
+            if outcome is None or (until is not None and not until(outcome)):
+                self.waiters.setdefault(key, []).append((future, until))
+                return future
+        future.set_result(outcome)
+        return future
+
+    def discard(self, name, order_id, future):
+        """Stop waiting on a future, e.g. after a timeout."""
+        key = (name, order_id)
+        with self.lock:
+            waiters = self.waiters.get(key, [])
+            waiters[:] = [w for w in waiters if w[0] is not future]
+            if not waiters:
+                self.waiters.pop(key, None)
+
+    def forget(self, name, order_id):
+        with self.lock:
+            self.outcomes.pop((name, order_id), None)
+
+    def wait(self, name, order_id, timeout=None, until=None):
+        """:returns: The outcome or None on timeout."""
+        future = self.future(name, order_id, until)
+        if not future.wait(timeout):
+            self.discard(name, order_id, future)
+            return None
+        return future.message
+
+    def wait_many(self, name, order_ids, timeout=None, until=None):
+        """Wait for the outcomes of many orders with one deadline.
+
+        :returns: dict order id:outcome, None for those not done in time.
+        """
+        futures = [(order_id, self.future(name, order_id, until))
+                   for order_id in order_ids]
+        deadline = None if timeout is None else time.time() + timeout
+        ans = {}
+        for order_id, future in futures:
+            wait = None if deadline is None else max(0, deadline - time.time())
+            if future.wait(wait):
+                ans[order_id] = future.message
+            else:
+                self.discard(name, order_id, future)
+                ans[order_id] = None
+        return ans
@@ -0,0 +1,160 @@
+"""Module for IQ option request_id keyed response futures."""
+
+import itertools
+import threading
+
+
+class RequestFuture(object):
+    """Response of one websocket request, filled by the reader thread."""
+
+    def __init__(self, request_id, names=None):
+        """
+        :param str request_id: The request_id sent with the request.
+        :param names: (optional) The response message names to accept,
+            None accepts any message echoing the request_id.
+        """
+        self.request_id = request_id
+        self.names = names
+        self.message = None
+        self.exception = None
+        self.callbacks = []
+        self.__event = threading.Event()
+        self.__lock = threading.Lock()
+
+    def done(self):
+        return self.__event.is_set()
+
+    def set_result(self, message):
+        self.__finish(message, None)
+
+    def set_exception(self, exception):
+        self.__finish(None, exception)
+
+    def __finish(self, message, exception):
+        with self.__lock:
+            if self.__event.is_set():
+                return
+            self.message = message
+            self.exception = exception
+            self.__event.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """Call callback(future) once done, at once if already done."""
+        with self.__lock:
+            if not self.__event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None):
+        """:returns: True if done before the timeout."""
+        return self.__event.wait(timeout)
+
+    def result(self, timeout=None):
+        """Wait for the response message.
+
+        :param timeout: (optional) The max seconds to wait.
+
+        :returns: The response message dict.
+        :raises TimeoutError: if no response arrived in time.
+        """
+        if not self.__event.wait(timeout):
+            raise TimeoutError(
+                "no response for request_id " + str(self.request_id))
+        if self.exception is not None:
+            raise self.exception
+        return self.message
+
+
+class PendingRequests(object):
+    """Futures of in-flight requests keyed by request_id."""
+
+    def __init__(self):
+        self.__counter = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.futures = {}
+        # response name -> pending futures accepting it, None for any
+        self.__wanted = {}
+
+    def next_request_id(self):
+        """:returns: A request_id unique for this connection."""
+        return str(next(self.__counter))
+
+    def create(self, request_id=None, names=None):
+        """Register a future before its request is sent.
+
+        :param request_id: (optional) The request_id, a new one if None.
+        :param names: (optional) The response message names to accept.
+
+        :returns: The instance of :class:`RequestFuture`.
+        """
+        if request_id is None:
+            request_id = self.next_request_id()
+        future = RequestFuture(str(request_id), names)
+        with self.__lock:
+            self.futures[future.request_id] = future
+            for name in (None,) if names is None else names:
+                self.__wanted[name] = self.__wanted.get(name, 0) + 1
+        return future
+
+    def __forget(self, future):
+        for name in (None,) if future.names is None else future.names:
+            if self.__wanted[name] <= 1:
+                del self.__wanted[name]
+            else:
+                self.__wanted[name] -= 1
+
+    def discard(self, request_id):
+        with self.__lock:
+            future = self.futures.pop(str(request_id), None)
+            if future is not None:
+                self.__forget(future)
+            return future
+
+    def resolve(self, message):
+        """Complete the future waiting for this message, if any.
+
+        :returns: True if a future took the message.
+        """
+        request_id = message.get("request_id")
+        if request_id is None or not self.futures:
+            return False
+        request_id = str(request_id)
+        with self.__lock:
+            future = self.futures.get(request_id)
+            if future is None or (future.names is not None and
+                                  message.get("name") not in future.names):
+                return False
+            del self.futures[request_id]
+            self.__forget(future)
+        future.set_result(message)
+        return True
+
+    def fail(self, request_id, exception):
+        """Fail the future of one request, e.g. when its frame was not
+        written.
+
+        :returns: True if a future was pending.
+        """
+        future = self.discard(request_id)
+        if future is None:
+            return False
+        future.set_exception(exception)
+        return True
+
+    def wants(self, name):
+        """:returns: True if a pending future may accept a message name."""
+        return None in self.__wanted or name in self.__wanted
+
+    def fail_all(self, exception):
+        """Fail every pending future, e.g. when the connection is lost."""
+        with self.__lock:
+            futures = list(self.futures.values())
+            self.futures.clear()
+            self.__wanted.clear()
+        for future in futures:
+            future.set_exception(exception)
@@ -0,0 +1,169 @@
+"""Module for IQ option digital positions mark-to-market."""
+
+import logging
+import threading
+
+import numpy as np
+
+import iqoptionapi.constants as OP_code
+
+
+def parse_position(msg):
+    """The fields of a digital position-changed msg the sell-back value
+    needs, see :meth:`DigitalPortfolio.values`."""
+    instrument_id = msg["instrument_id"]
+    raw_event = msg["raw_event"]
+    extra_data = raw_event["extra_data"]
+    # doEURUSD201911040628PT1MPSPT
+    start_duration = instrument_id.find("PT") + 2
+    end_duration = start_duration + instrument_id[start_duration:].find("M")
+    return {
+        "active": raw_event["instrument_underlying"],
+        "period": int(instrument_id[start_duration:end_duration]) * 60,
+        "call": "MCSPT" in instrument_id,
+        "amount": max(raw_event["buy_amount"], raw_event["sell_amount"]),
+        "count": raw_event["count"],
+        "strike": raw_event["instrument_strike_value"] / 1000000.0,
+        "lower": extra_data["lower_instrument_strike"] / 1000000.0,
+        "upper": extra_data["upper_instrument_strike"] / 1000000.0,
+        "lower_id": extra_data["lower_instrument_id"],
+        "upper_id": extra_data["upper_instrument_id"],
+        "rate": raw_event["currency_rate"],
+    }
+
+
+def sell_back_values(strike, lower, upper, f, f2, call, rate, count, amount):
+    """Sell-back profit of digital spot positions, all args numpy arrays.
+
+    f and f2 are the bids of the lower and upper strike instruments, nan
+    if unknown; the result is nan where the lower bid is missing.
+    """
+    # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.5.1/sources/com/iqoption/dto/entity/position/Position.java#L493
+    with np.errstate(divide="ignore", invalid="ignore"):
+        width = upper - lower
+        outside = (lower > strike) | (strike > upper)
+        k = np.where(outside,
+                     np.where(call, upper - strike, strike - upper) / np.abs(width),
+                     np.where(call, strike, (upper - strike) / width))
+        g = np.where(outside, np.abs(f2 - f),
+                     np.where(call, f + ((strike - lower) / width) * (f2 - f),
+                              f - f2))
+        # without the upper bid the lower one is used as is
+        price = np.where((lower != strike) & ~np.isnan(f2), f2 + k * g, f)
+        # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.27.0/sources/com/iqoption/dto/entity/position/Position.java#L603
+        return (price / rate) * count - amount
+
+
+class DigitalPortfolio(object):
+    """Open digital spot positions as arrays, valued in one pass.
+
+    Positions come from the digital position-changed messages; the bids
+    are read from the :class:`QuoteStore
+    <iqoptionapi.ws.quotes.QuoteStore>`. Callbacks get the values of all
+    positions after every quotes frame of an active they hold.
+    """
+
+    def __init__(self, api):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        """
+        self.api = api
+        # order id -> parse_position dict
+        self.positions = {}
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.__arrays = None
+        self.__dirty = True
+        api.add_message_listener("position-changed", self.on_position_changed)
+        api.add_message_listener("instrument-quotes-generated",
+                                 self.on_instrument_quotes_generated)
+
+    def on_position_changed(self, message):
+        msg = message["msg"]
+        if msg.get("source") != "digital-options" or \
+                msg.get("instrument_type") not in (None, "digital-option"):
+            return
+        order_id = int(msg["raw_event"]["order_ids"][0])
+        with self.lock:
+            if msg.get("status") == "closed":
+                self.positions.pop(order_id, None)
+            else:
+                try:
+                    self.positions[order_id] = parse_position(msg)
+                except (KeyError, TypeError, ValueError):
+                    return
+            self.__dirty = True
+
+    def on_instrument_quotes_generated(self, message):
+        if not self.callbacks or not self.positions:
+            return
+        msg = message["msg"]
+        try:
+            key = (OP_code.get_active_name(msg["active"]),
+                   msg["expiration"]["period"])
+        except ValueError:
+            return
+        if key not in self.__build()["books"]:
+            return
+        values = self.values()
+        for callback in self.callbacks:
+            try:
+                callback(values)
+            except Exception:
+                logging.exception("portfolio callback error")
+
+    def __build(self):
+        with self.lock:
+            if not self.__dirty:
+                return self.__arrays
+            ids = list(self.positions)
+            rows = [self.positions[order_id] for order_id in ids]
+            keys = [(row["active"], row["period"]) for row in rows]
+            arrays = {"ids": ids, "rows": rows, "keys": keys,
+                      "books": set(keys)}
+            for name in ("strike", "lower", "upper", "rate", "count", "amount"):
+                arrays[name] = np.array([row[name] for row in rows], dtype=float)
+            arrays["call"] = np.array([row["call"] for row in rows], dtype=bool)
+            # keep the last known bids of the positions still open
+            old = self.__arrays or {"ids": []}
+            index = dict((order_id, i) for i, order_id in enumerate(old["ids"]))
+            for name in ("f", "f2"):
+                arrays[name] = np.array(
+                    [old[name][index[order_id]] if order_id in index else np.nan
+                     for order_id in ids], dtype=float)
+            self.__arrays = arrays
+            self.__dirty = False
+            return arrays
+
+    def values(self):
+        """Sell-back profit of every open position.
+
+        :returns: dict order id:profit, None where no bid was seen yet.
+        """
+        arrays = self.__build()
+        ids, rows = arrays["ids"], arrays["rows"]
+        if not ids:
+            return {}
+        books = [self.api.quotes.books.get(key) for key in arrays["keys"]]
+        # None -> nan, then the last known bid where this one is missing
+        f = np.array([None if book is None else book.bids.get(row["lower_id"])
+                      for book, row in zip(books, rows)], dtype=float)
+        f2 = np.array([None if book is None else book.bids.get(row["upper_id"])
+                       for book, row in zip(books, rows)], dtype=float)
+        f = np.where(np.isnan(f), arrays["f"], f)
+        f2 = np.where(np.isnan(f2), arrays["f2"], f2)
+        arrays["f"], arrays["f2"] = f, f2
+        ans = sell_back_values(arrays["strike"], arrays["lower"],
+                               arrays["upper"], f, f2, arrays["call"],
+                               arrays["rate"], arrays["count"],
+                               arrays["amount"])
+        return {order_id: (None if value != value else value)
+                for order_id, value in zip(ids, ans.tolist())}
+
+    def add_callback(self, callback):
+        """Call callback(values) after every quotes frame."""
+        self.callbacks = self.callbacks + [callback]
+
+    def remove_callback(self, callback):
+        self.callbacks = [cb for cb in self.callbacks if cb != callback]
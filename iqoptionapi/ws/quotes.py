@@ -0,0 +1,145 @@
+"""Module for IQ option digital instrument quotes store."""
+
+import logging
+import threading
+
+
+def ask_profit(ask):
+    """Profit percent of a digital instrument from its ask price."""
+    # FROM IQ OPTION SOURCE CODE
+    # https://github.com/Lu-Yi-Hsun/Decompiler-IQ-Option/blob/master/Source%20Code/5.5.1/sources/com/iqoption/dto/entity/strike/Quote.java#L91
+    if ask is None:
+        return None
+    ask = float(ask)
+    return ((100 - ask) * 100) / ask
+
+
+class QuoteBook(object):
+    """Latest quotes of one (active, period), indexed by symbol.
+
+    A frame only writes the symbols whose price changed; the dicts are
+    updated in place, so references to them stay current.
+    """
+
+    def __init__(self):
+        self.expiration = None
+        # symbol -> bid, ask, profit percent
+        self.bids = {}
+        self.asks = {}
+        self.profits = {}
+        # symbol -> [callback]
+        self.interests = {}
+
+    def update(self, msg):
+        """Apply one instrument-quotes-generated msg.
+
+        The frame holds every symbol of the expiration, those missing from
+        it are dropped.
+
+        :returns: The symbols whose bid or ask changed.
+        """
+        bids, asks, profits = self.bids, self.asks, self.profits
+        expiration = msg["expiration"]["timestamp"]
+        if expiration != self.expiration:
+            # the symbols of the old expiration are gone
+            self.expiration = expiration
+            bids.clear()
+            asks.clear()
+            profits.clear()
+        changed = []
+        seen = set()
+        for data in msg["quotes"]:
+            price = data["price"]
+            bid, ask = price.get("bid"), price.get("ask")
+            for symbol in data["symbols"]:
+                seen.add(symbol)
+                if symbol in asks and asks[symbol] == ask and \
+                        bids[symbol] == bid:
+                    continue
+                if symbol not in asks or asks[symbol] != ask:
+                    profits[symbol] = ask_profit(ask)
+                bids[symbol] = bid
+                asks[symbol] = ask
+                changed.append(symbol)
+        if len(asks) > len(seen):
+            # symbols missing from the frame were delisted
+            for symbol in [symbol for symbol in asks if symbol not in seen]:
+                del bids[symbol], asks[symbol], profits[symbol]
+        return changed
+
+    def quote(self, symbol):
+        """:returns: dict {"bid", "ask", "profit"}, None if unknown."""
+        if symbol not in self.asks:
+            return None
+        return {"bid": self.bids[symbol], "ask": self.asks[symbol],
+                "profit": self.profits[symbol]}
+
+
+class QuoteStore(object):
+    """Quote books of the subscribed digital instruments.
+
+    Callers can register interest in symbols; their callback runs with
+    (symbol, quote) only when one of those symbols changes.
+    """
+
+    def __init__(self):
+        # (active, period seconds) -> QuoteBook
+        self.books = {}
+        self.lock = threading.Lock()
+
+    def book(self, active, period):
+        """:returns: The :class:`QuoteBook` of (active, period), created
+            empty if missing."""
+        key = (active, period)
+        book = self.books.get(key)
+        if book is None:
+            with self.lock:
+                book = self.books.setdefault(key, QuoteBook())
+        return book
+
+    def update(self, active, period, msg):
+        """Apply an instrument-quotes-generated msg and notify interests.
+
+        :returns: The :class:`QuoteBook` of (active, period).
+        """
+        book = self.book(active, period)
+        changed = book.update(msg)
+        if book.interests:
+            for symbol in changed:
+                for callback in book.interests.get(symbol, ()):
+                    try:
+                        callback(symbol, book.quote(symbol))
+                    except Exception:
+                        logging.exception("quote callback error")
+        return book
+
+    def add_interest(self, active, period, symbols, callback):
+        """Call callback(symbol, quote) whenever one of symbols changes."""
+        book = self.book(active, period)
+        with self.lock:
+            for symbol in symbols:
+                book.interests[symbol] = book.interests.get(
+                    symbol, []) + [callback]
+
+    def remove_interest(self, active, period, symbols, callback):
+        book = self.book(active, period)
+        with self.lock:
+            for symbol in symbols:
+                callbacks = [cb for cb in book.interests.get(symbol, [])
+                             if cb != callback]
+                if callbacks:
+                    book.interests[symbol] = callbacks
+                else:
+                    book.interests.pop(symbol, None)
+
+    def get(self, active, period, symbol):
+        """:returns: dict {"bid", "ask", "profit"} of a symbol, None if
+            unknown."""
+        book = self.books.get((active, period))
+        return None if book is None else book.quote(symbol)
+
+    def forget(self, active):
+        """Drop the books of an active, e.g. on unsubscribe."""
+        with self.lock:
+            for key in [key for key in self.books if key[0] == active]:
+                del self.books[key]
@@ -0,0 +1,97 @@
+"""Module for IQ option trading schedule index."""
+
+import time
+from bisect import bisect_left, bisect_right
+
+
+class ScheduleIndex(object):
+    """Trading sessions of every instrument as sorted interval lists.
+
+    Built once from the "schedule" lists of the underlying-list and
+    instruments payloads; open/closed and next open/close queries are a
+    binary search instead of a walk over every session.
+    """
+
+    def __init__(self):
+        # (option, name) -> (sorted session opens, matching closes)
+        self.sessions = {}
+
+    def update(self, option, items, name_key="name"):
+        """Index the schedules of one payload, replacing the sessions
+        indexed before for option.
+
+        :param str option: e.g. "digital", "forex", "cfd", "crypto".
+        :param items: list of dicts with a name_key and a "schedule" list
+            of {"open": timestamp, "close": timestamp}.
+        """
+        sessions = {}
+        for item in items:
+            spans = sorted((s["open"], s["close"]) for s in item["schedule"])
+            # merge overlapping sessions so the closes stay sorted too
+            merged = []
+            for start, end in spans:
+                if merged and start < merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            sessions[(option, item[name_key])] = (
+                [span[0] for span in merged], [span[1] for span in merged])
+        sessions.update((key, value) for key, value in self.sessions.items()
+                        if key[0] != option)
+        # swap in one assignment, readers never see a half built index
+        self.sessions = sessions
+
+    def __session(self, option, name, at):
+        # index of the last session opened before at, or -1
+        starts, ends = self.sessions[(option, name)]
+        return bisect_left(starts, at) - 1, starts, ends
+
+    def is_open(self, option, name, at=None):
+        """:returns: True if a session is open at the timestamp (now by
+            default), None if the instrument is unknown."""
+        if (option, name) not in self.sessions:
+            return None
+        if at is None:
+            at = time.time()
+        idx, starts, ends = self.__session(option, name, at)
+        return idx >= 0 and at < ends[idx]
+
+    def next_open(self, option, name, at=None):
+        """:returns: The open timestamp of the first session starting after
+            at, or None."""
+        if (option, name) not in self.sessions:
+            return None
+        if at is None:
+            at = time.time()
+        starts, _ = self.sessions[(option, name)]
+        idx = bisect_right(starts, at)
+        return starts[idx] if idx < len(starts) else None
+
+    def next_close(self, option, name, at=None):
+        """:returns: The close timestamp of the session open at at, else of
+            the next one, or None."""
+        if (option, name) not in self.sessions:
+            return None
+        if at is None:
+            at = time.time()
+        idx, starts, ends = self.__session(option, name, at)
+        if idx >= 0 and at < ends[idx]:
+            return ends[idx]
+        return ends[idx + 1] if idx + 1 < len(ends) else None
+
+    def open_map(self, option=None, at=None):
+        """Open status of every indexed instrument at one timestamp.
+
+        :param option: (optional) Only instruments of this option type.
+
+        :returns: dict (option, name):bool.
+        """
+        if at is None:
+            at = time.time()
+        ans = {}
+        for key, (starts, ends) in list(self.sessions.items()):
+            if option is not None and key[0] != option:
+                continue
+            idx = bisect_left(starts, at) - 1
+            ans[key] = idx >= 0 and at < ends[idx]
+        return ans
@@ -0,0 +1,176 @@
+"""Module for IQ option digital strike-list cache."""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import iqoptionapi.constants as OP_code
+
+
+class StrikeTable(object):
+    """Strikes of one (active, duration, expiration) sorted by price."""
+
+    def __init__(self, message):
+        """
+        :param message: The strike-list message.
+        """
+        msg = message["msg"]
+        self.expiration = msg["expiration"]
+        rows = sorted((float(data["value"]) / 1000000.0, data["call"]["id"],
+                       data["put"]["id"]) for data in msg["strike"])
+        self.prices = [row[0] for row in rows]
+        self.calls = [row[1] for row in rows]
+        self.puts = [row[2] for row in rows]
+        # price strings of the legacy strike list dicts, formatted once
+        self.keys = ["%.6f" % price for price in self.prices]
+
+    def __len__(self):
+        return len(self.prices)
+
+    def nearest(self, price):
+        """:returns: The index of the strike closest to price, -1 if
+            empty."""
+        idx = bisect_left(self.prices, price)
+        if idx == len(self.prices):
+            return idx - 1
+        if idx > 0 and price - self.prices[idx - 1] <= self.prices[idx] - price:
+            return idx - 1
+        return idx
+
+    def between(self, low, high):
+        """:returns: The range of indexes of strikes with low <= price <=
+            high."""
+        return range(bisect_left(self.prices, low),
+                     bisect_right(self.prices, high))
+
+    def row(self, idx, profits=None):
+        """:param profits: (optional) dict instrument id:profit.
+
+        :returns: dict {"price", "call":{"id", "profit"}, "put":{...}}.
+        """
+        profits = profits or {}
+        call, put = self.calls[idx], self.puts[idx]
+        return {"price": self.prices[idx],
+                "call": {"id": call, "profit": profits.get(call)},
+                "put": {"id": put, "profit": profits.get(put)}}
+
+    def to_dict(self, profits=None):
+        """The strike list in the legacy format.
+
+        :param profits: (optional) dict instrument id:profit, strikes
+            without a profit for both sides are left out.
+
+        :returns: dict price string:{"call":id, "put":id} without profits,
+            price string:{"call":{"id", "profit"}, "put":{...}} with them.
+        """
+        if profits is None:
+            return {key: {"call": call, "put": put} for key, call, put
+                    in zip(self.keys, self.calls, self.puts)}
+        ans = {}
+        for key, call, put in zip(self.keys, self.calls, self.puts):
+            if call in profits and put in profits:
+                ans[key] = {"call": {"profit": profits[call], "id": call},
+                            "put": {"profit": profits[put], "id": put}}
+        return ans
+
+
+class StrikeCache(object):
+    """Strike tables by (active, duration, expiration).
+
+    A strike list only changes with the expiration, so it is fetched once
+    per expiration. It also tracks the latest instrument-quotes-generated
+    expiration of each (active, duration), so callers can wait for quotes
+    instead of polling. The raw quotes messages are only kept for the
+    (active, duration) someone asked for, see :meth:`wait_raw_quotes`.
+    """
+
+    def __init__(self, api, maxsize=64):
+        """
+        :param api: The instance of :class:`IQOptionAPI
+            <iqoptionapi.api.IQOptionAPI>`.
+        :param int maxsize: The max number of strike tables kept.
+        """
+        self.maxsize = maxsize
+        # (active, duration, expiration) -> StrikeTable
+        self.tables = OrderedDict()
+        # (active, duration) -> (quotes count, expiration of the latest)
+        self.quotes = {}
+        # (active, duration) -> latest raw message, once asked for
+        self.raw = {}
+        self.condition = threading.Condition()
+        api.add_message_listener("instrument-quotes-generated",
+                                 self.on_instrument_quotes_generated)
+
+    def on_instrument_quotes_generated(self, message):
+        msg = message["msg"]
+        try:
+            active = OP_code.get_active_name(msg["active"])
+        except ValueError:
+            return
+        key = (active, msg["expiration"]["period"] // 60)
+        with self.condition:
+            count = self.quotes.get(key, (0, None))[0]
+            self.quotes[key] = (count + 1, msg["expiration"]["timestamp"])
+            if key in self.raw:
+                self.raw[key] = message
+            self.condition.notify_all()
+
+    def wait_quotes(self, active, duration, timeout=None, seen=0):
+        """Wait for quotes of (active, duration).
+
+        :param seen: (optional) Wait for more than this many quotes, e.g.
+            the count a previous call returned.
+
+        :returns: (quotes count, expiration of the latest quotes), None on
+            timeout.
+        """
+        key = (active, duration)
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: self.quotes.get(key, (0, None))[0] > seen,
+                    timeout):
+                return None
+            return self.quotes[key]
+
+    def wait_raw_quotes(self, active, duration, timeout=None):
+        """Wait for a raw instrument-quotes-generated message.
+
+        From the first call on the latest message of (active, duration) is
+        kept, so the first call waits for the next frame and later calls
+        return the latest one.
+
+        :returns: The message, None on timeout.
+        """
+        key = (active, duration)
+        with self.condition:
+            self.raw.setdefault(key, None)
+            if not self.condition.wait_for(
+                    lambda: self.raw.get(key) is not None, timeout):
+                return None
+            return self.raw[key]
+
+    def forget(self, active):
+        """Drop the quotes state of an active, e.g. on unsubscribe."""
+        with self.condition:
+            for key in [key for key in self.quotes if key[0] == active]:
+                del self.quotes[key]
+            for key in [key for key in self.raw if key[0] == active]:
+                del self.raw[key]
+
+    def add(self, active, duration, message):
+        """Index a strike-list message.
+
+        :returns: The instance of :class:`StrikeTable`.
+        """
+        table = StrikeTable(message)
+        key = (active, duration, table.expiration)
+        with self.condition:
+            self.tables[key] = table
+            self.tables.move_to_end(key)
+            if len(self.tables) > self.maxsize:
+                self.tables.popitem(last=False)
+        return table
+
+    def get(self, active, duration, expiration):
+        """:returns: The cached :class:`StrikeTable` or None."""
+        return self.tables.get((active, duration, expiration))
@@ -0,0 +1,183 @@
+"""Module for IQ option websocket writer thread."""
+
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+from websocket import WebSocketConnectionClosedException
+
+_STOP = object()
+
+
+class SendHandle(object):
+    """Completion handle of one queued websocket frame."""
+
+    def __init__(self, data):
+        self.data = data
+        self.exception = None
+        self.callbacks = []
+        self.__event = threading.Event()
+        self.__lock = threading.Lock()
+
+    def set_done(self, exception=None):
+        with self.__lock:
+            if self.__event.is_set():
+                return
+            self.exception = exception
+            self.__event.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """Call callback(handle) once written or failed, at once if done."""
+        with self.__lock:
+            if not self.__event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback(self)
+
+    def done(self):
+        """:returns: True once the frame was written or failed."""
+        return self.__event.is_set()
+
+    def wait(self, timeout=None):
+        """Wait until the frame was written.
+
+        :param timeout: (optional) The max seconds to wait.
+
+        :returns: True if the frame was written, False on timeout or error.
+        """
+        return self.__event.wait(timeout) and self.exception is None
+
+
+class WebsocketWriter(object):
+    """Single thread that owns all writes to the websocket.
+
+    Callers put frames on a bounded queue and get a :class:`SendHandle`
+    back, so any number of threads can send without racing the socket.
+    Once a write finds the socket closed the writer stops: the frames
+    still queued fail and :meth:`send` raises.
+    """
+
+    def __init__(self, send, maxsize=1024, coalesce=False, batch_size=64):
+        """
+        :param send: Callable writing one text frame to the socket.
+        :param int maxsize: The max number of frames waiting to be sent,
+            senders block while the queue is full.
+        :param bool coalesce: If True identical frames waiting in the same
+            batch are written once and all their handles are completed.
+        :param int batch_size: The max number of frames drained per wakeup.
+        """
+        self.__send = send
+        self.queue = queue.Queue(maxsize)
+        self.coalesce = coalesce
+        self.batch_size = batch_size
+        self.thread = None
+        self.running = False
+        self.sent_frames = 0
+        self.coalesced_frames = 0
+        # set by the writer thread once it stopped reading the queue
+        self.__drained = False
+        self.__drain_lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        self.__drained = False
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.queue.put_nowait(_STOP)
+        except queue.Full:
+            # the writer checks running after every batch
+            pass
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def send(self, data, timeout=None):
+        """Queue a text frame.
+
+        :param str data: The frame to write.
+        :param timeout: (optional) The max seconds to block on a full queue.
+
+        :returns: The instance of :class:`SendHandle`.
+        """
+        if not self.running:
+            raise WebSocketConnectionClosedException(
+                "websocket writer is stopped")
+        handle = SendHandle(data)
+        self.queue.put(handle, timeout=timeout)
+        if not self.running:
+            # stopped while queueing: the writer fails what it still
+            # reads, only once it is gone may this thread drain the queue
+            with self.__drain_lock:
+                if self.__drained:
+                    self.__fail_queued()
+        return handle
+
+    def __next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def __write(self, data, handles):
+        logger = logging.getLogger(__name__)
+        try:
+            self.__send(data)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(e)
+            if isinstance(e, (WebSocketConnectionClosedException, OSError)):
+                self.running = False
+            for handle in handles:
+                handle.set_done(e)
+            return
+        logger.debug(data)
+        self.sent_frames += 1
+        for handle in handles:
+            handle.set_done()
+
+    def __run(self):
+        stop = False
+        while not stop:
+            batch = self.__next_batch()
+            if batch[-1] is _STOP:
+                batch.pop()
+                stop = True
+            if self.coalesce:
+                frames = OrderedDict()
+                for handle in batch:
+                    frames.setdefault(handle.data, []).append(handle)
+                self.coalesced_frames += len(batch) - len(frames)
+                for data, handles in frames.items():
+                    self.__write(data, handles)
+            else:
+                for handle in batch:
+                    self.__write(handle.data, [handle])
+            if not self.running:
+                stop = True
+        with self.__drain_lock:
+            self.__drained = True
+            self.__fail_queued()
+
+    def __fail_queued(self):
+        # fail whatever was queued after stop
+        while True:
+            try:
+                handle = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if handle is not _STOP:
+                handle.set_done(WebSocketConnectionClosedException(
+                    "websocket writer is stopped"))
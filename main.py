@@ -85,20 +85,24 @@ class TradingSignalBot:
         signals = []
         min_confidence = self.config.get('min_confidence', 0.7)
         
-        for asset in self.assets:
-            for timeframe in self.timeframes:
-                try:
-                    signal = self.signal_generator.analyze_asset(asset, timeframe)
-                    
-                    if signal and signal.confidence >= min_confidence:
-                        signals.append(signal)
-                        
-                except Exception as e:
-                    self.logger.error(f"Error analyzing {asset} M{timeframe}: {e}")
-                    continue
+        # One read transaction for the whole scan instead of a query per
+        # series, so every series comes from the same snapshot
+        pairs = [(asset, timeframe) for asset in self.assets for timeframe in self.timeframes]
+        frames = self.db.get_latest_prices_many_df(pairs, 250)
+        
+        for asset, timeframe in pairs:
+            try:
+                df = frames[(asset, timeframe)]
+                if df.empty:
+                    self.logger.warning(f"No data available for {asset} M{timeframe}")
+                signal = self.signal_generator.analyze_asset(asset, timeframe, df)
                 
-                # Small delay to avoid overwhelming the system
-                time.sleep(0.1)
+                if signal and signal.confidence >= min_confidence:
+                    signals.append(signal)
+                    
+            except Exception as e:
+                self.logger.error(f"Error analyzing {asset} M{timeframe}: {e}")
+                continue
         
         # Sort by confidence (highest first)
         signals.sort(key=lambda x: x.confidence, reverse=True)
@@ -39,16 +39,12 @@ class SignalGenerator:
     def get_price_data(self, asset: str, timeframe: int, limit: int = 150) -> pd.DataFrame:
         """Get price data as DataFrame for analysis"""
         try:
-            data = self.db.get_latest_prices(asset, timeframe, limit)
-            if not data:
+            # columnar read, already sorted by timestamp
+            df = self.db.get_latest_prices_df(asset, timeframe, limit)
+            if df.empty:
                 self.logger.warning(f"No data available for {asset} M{timeframe}")
                 return pd.DataFrame()
             
-            df = pd.DataFrame(data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-            df.set_index('timestamp', inplace=True)
-            df.sort_index(inplace=True)
-            
             return df
             
         except Exception as e:
@@ -322,11 +318,16 @@ class SignalGenerator:
         
         return signal
     
-    def analyze_asset(self, asset: str, timeframe: int) -> Optional[TradingSignal]:
-        """Analyze asset and generate signal for next candle"""
+    def analyze_asset(self, asset: str, timeframe: int, df: Optional[pd.DataFrame] = None) -> Optional[TradingSignal]:
+        """Analyze asset and generate signal for next candle
+        
+        df: price data already read (e.g. by get_latest_prices_many_df),
+        fetched here if None
+        """
         try:
             # Get price data
-            df = self.get_price_data(asset, timeframe, 250)
+            if df is None:
+                df = self.get_price_data(asset, timeframe, 250)
             if df.empty:
                 return None
             # 🛑 Skip M5 signal generation
@@ -0,0 +1,110 @@
+"""Benchmark of the price database, alone and with reader processes:
+
+    python tests/bench_database.py
+    python tests/bench_database.py --baseline 67af22b~1
+
+--baseline also runs the database.py of a git revision, e.g. the one
+before the shared WAL connections, on a database file of its own.
+"""
+
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CANDLE = {"open": 1.0, "max": 1.0, "min": 1.0, "close": 1.0}
+
+
+def load(path):
+    spec = importlib.util.spec_from_file_location(
+        "database_" + str(abs(hash(path))), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reader(module_path, db_path, stop, out):
+    logging.disable(logging.CRITICAL)
+    db = load(module_path).PriceDatabase(db_path)
+    reads = empty = 0
+    begin = time.perf_counter()
+    while not stop.is_set():
+        if not db.get_latest_prices("EURUSD", 1, 100):
+            empty += 1
+        reads += 1
+    out.put((reads / (time.perf_counter() - begin), empty))
+
+
+def save(db, i):
+    return db.save_price_data("EURUSD", dict(CANDLE, time=i * 60), 1)
+
+
+def run(module_path, inserts=3000, reads=2000, readers=2):
+    db_path = os.path.join(tempfile.mkdtemp(), "price_data.db")
+    db = load(module_path).PriceDatabase(db_path)
+    result = {}
+
+    begin = time.perf_counter()
+    for i in range(inserts):
+        save(db, i)
+    result["inserts/s, alone"] = inserts / (time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    for _ in range(reads):
+        db.get_latest_prices("EURUSD", 1, 100)
+    result["reads/s, alone"] = reads / (time.perf_counter() - begin)
+
+    stop = multiprocessing.Event()
+    out = multiprocessing.Queue()
+    processes = [multiprocessing.Process(
+        target=reader, args=(module_path, db_path, stop, out))
+        for _ in range(readers)]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)
+    failed = 0
+    begin = time.perf_counter()
+    for i in range(inserts, inserts + reads):
+        if not save(db, i):
+            failed += 1
+    result["inserts/s, %d reader processes" % readers] = \
+        reads / (time.perf_counter() - begin)
+    stop.set()
+    results = [out.get() for _ in processes]
+    for process in processes:
+        process.join()
+    result["reads/s of those readers (sum)"] = sum(r[0] for r in results)
+    result["failed writes"] = failed
+    result["empty reads"] = sum(r[1] for r in results)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", help="git revision to compare with")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    runs = [("current", os.path.join(ROOT, "database.py"))]
+    if args.baseline:
+        path = os.path.join(tempfile.mkdtemp(), "database.py")
+        with open(path, "wb") as f:
+            f.write(subprocess.check_output(
+                ["git", "show", args.baseline + ":database.py"], cwd=ROOT))
+        runs.insert(0, (args.baseline, path))
+
+    results = [(name, run(path)) for name, path in runs]
+    print("%-36s" % "" + "".join("%12s" % name for name, _ in results))
+    for key in results[0][1]:
+        print("%-36s" % key +
+              "".join("%12.0f" % result[key] for _, result in results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
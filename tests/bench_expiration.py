@@ -0,0 +1,33 @@
+"""Microbenchmark of the expiration slots:
+
+    PYTHONPATH=. python tests/bench_expiration.py
+"""
+
+import time
+import timeit
+
+from iqoptionapi import expiration
+
+
+def per_call(statement, number):
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+def main():
+    timestamp = time.time()
+    loop = per_call(lambda: expiration._stepped_slots(timestamp, 50), 200)
+
+    def uncached():
+        expiration._minute_slots.cache_clear()
+        expiration._expiration_slots(timestamp)
+    arithmetic = per_call(uncached, 2000)
+    cached = per_call(lambda: expiration._expiration_slots(timestamp), 20000)
+    remaining = per_call(lambda: expiration.get_remaning_time(timestamp), 20000)
+    print("stepping loop      %8.1f us" % (loop * 1e6))
+    print("arithmetic         %8.1f us" % (arithmetic * 1e6))
+    print("arithmetic cached  %8.1f us" % (cached * 1e6))
+    print("get_remaning_time  %8.1f us" % (remaining * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""The asyncio front end against the stand-in server."""
+
+import asyncio
+import logging
+import time
+import unittest
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.async_api import AsyncIQOption
+from iqoptionapi.local_server import LocalServer
+
+ACTIVE = "EURUSD"
+
+
+class AsyncIQOptionTest(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("websocket").setLevel(logging.CRITICAL)
+        cls.server = LocalServer(actives=OP_code.ACTIVES[ACTIVE], tick_rate=20,
+                                 option_duration=0.3, seed=2).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    async def asyncSetUp(self):
+        self.iq = AsyncIQOption("user", "password", host=self.server.host)
+        check, reason = await self.iq.connect()
+        self.assertTrue(check, reason)
+
+    async def asyncTearDown(self):
+        await self.iq.close()
+
+    async def test_get_candles(self):
+        now = time.time()
+        results = await asyncio.gather(*[
+            self.iq.get_candles(ACTIVE, 60, count, now, timeout=5)
+            for count in range(1, 21)])
+        for count, candles in enumerate(results, 1):
+            self.assertEqual(len(candles), count)
+            self.assertLess(candles[-1]["to"], now + 60)
+        self.assertEqual(self.iq.api.pending_requests.futures, {})
+
+    async def test_buy_and_check_win(self):
+        check, option_id = await self.iq.buy(2, ACTIVE, "call", 1)
+        self.assertTrue(check, option_id)
+        win, profit = await self.iq.check_win_v4(option_id, timeout=5)
+        expected = {"win": round(2 * self.server.profit, 6), "loose": -2,
+                    "equal": 0}
+        self.assertIn(win, expected)
+        self.assertAlmostEqual(profit, expected[win])
+        self.assertEqual(self.iq.api.buy_multi_option, {})
+
+    async def test_check_win_timeout(self):
+        self.assertEqual(await self.iq.check_win_v4(-1, timeout=0.1),
+                         (None, None))
+
+    async def test_stream_unsubscribes_when_closed(self):
+        self.assertTrue(await self.iq.start_candles_stream(ACTIVE, 1, 10))
+        listeners = self.iq.api.message_listeners
+        before = len(listeners.get("candle-generated", ()))
+
+        stream = self.iq.candles(ACTIVE, 1)
+        candle = await asyncio.wait_for(stream.__anext__(), 5)
+        self.assertEqual(candle["active_id"], OP_code.ACTIVES[ACTIVE])
+        self.assertIn("candle-generated", self.iq.subscribers)
+        self.assertEqual(len(listeners.get("candle-generated", ())),
+                         before + 1)
+
+        await stream.aclose()
+        self.assertNotIn("candle-generated", self.iq.subscribers)
+        self.assertEqual(len(listeners.get("candle-generated", ())), before)
+        self.assertTrue(self.iq.get_realtime_candles(ACTIVE, 1))
+
+    async def test_cancelled_stream_unsubscribes(self):
+        async def consume():
+            async for _ in self.iq.messages("timeSync"):
+                pass
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.1)
+        self.assertIn("timeSync", self.iq.subscribers)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertNotIn("timeSync", self.iq.subscribers)
+
+
+if __name__ == "__main__":
+    unittest.main()
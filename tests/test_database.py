@@ -0,0 +1,103 @@
+"""PriceDatabase on the shared writer and per-thread reader connections."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from database import PriceDatabase
+
+
+def candle(timestamp, close=1.0):
+    return {"time": timestamp, "open": 1.0, "max": close, "min": 1.0,
+            "close": close, "volume": 1}
+
+
+class PriceDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = PriceDatabase(os.path.join(self.dir, "price_data.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.dir)
+
+    def count(self):
+        return len(self.db.get_latest_prices("EURUSD", 1, 1000))
+
+    def test_reads_during_a_write(self):
+        self.db.save_price_data("EURUSD", candle(60), 1)
+        in_write = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with self.db._db.write():
+                self.db.save_price_data("EURUSD", candle(120), 1)
+                in_write.set()
+                release.wait(5)
+        thread = threading.Thread(target=writer)
+        thread.start()
+        self.assertTrue(in_write.wait(5))
+        try:
+            # WAL: readers neither block nor see the open transaction
+            counts = []
+            readers = [threading.Thread(target=lambda: counts.append(self.count()))
+                       for _ in range(4)]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join(2)
+                self.assertFalse(reader.is_alive())
+            self.assertEqual(counts, [1] * 4)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.count(), 2)
+
+    def test_nested_write(self):
+        with self.db._db.write():
+            self.assertTrue(self.db.save_price_data("EURUSD", candle(60), 1))
+            with self.db._db.write() as conn:
+                self.assertTrue(conn.in_transaction)
+            self.db.save_candles_bulk("EURUSD", 1, [
+                {"from": 120, "open": 1, "max": 1, "min": 1, "close": 1,
+                 "volume": 1}])
+        self.assertEqual(self.count(), 2)
+
+    def test_nested_write_rolls_back_with_the_outer(self):
+        with self.assertRaises(RuntimeError):
+            with self.db._db.write():
+                # save_price_data opens its own write() inside this one
+                self.assertTrue(self.db.save_price_data("EURUSD", candle(60), 1))
+                raise RuntimeError
+        self.assertEqual(self.count(), 0)
+        self.assertFalse(self.db._db._writer.in_transaction)
+
+    def test_nested_snapshot(self):
+        self.db.save_price_data("EURUSD", candle(60), 1)
+        with self.db._db.snapshot() as conn:
+            before = self.db.get_latest_prices_many([("EURUSD", 1)], 10)
+            # a write after the snapshot started is not seen inside it
+            self.db.save_price_data("EURUSD", candle(120), 1)
+            with self.db._db.snapshot():
+                inner = self.db.get_latest_prices_many([("EURUSD", 1)], 10)
+            self.assertTrue(conn.in_transaction)
+        self.assertEqual(len(before[("EURUSD", 1)]), 1)
+        self.assertEqual(inner, before)
+        self.assertEqual(self.count(), 2)
+
+    def test_many_series_match_single_reads(self):
+        pairs = [("EURUSD", 1), ("EURUSD", 5), ("GBPUSD", 1), ("NONE", 1)]
+        for asset, timeframe in pairs[:-1]:
+            for i in range(5):
+                self.db.save_price_data(asset, candle(i * 60, close=i), timeframe)
+        many = self.db.get_latest_prices_many(pairs, 3)
+        for asset, timeframe in pairs:
+            self.assertEqual(many[(asset, timeframe)],
+                             self.db.get_latest_prices(asset, timeframe, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
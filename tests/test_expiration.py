@@ -0,0 +1,73 @@
+"""The arithmetic expiration slots against the minute stepping loop."""
+
+import os
+import random
+import time
+import unittest
+
+from iqoptionapi import expiration
+
+TIMEZONES = ("UTC", "America/New_York", "Europe/London", "Asia/Kolkata",
+             "Asia/Kathmandu", "Australia/Lord_Howe", "America/Sao_Paulo")
+
+
+def near_offset_change(timestamp):
+    # mktime is ambiguous, and the old loop not even repeatable, in the
+    # local hours a DST change repeats
+    return len(set(time.localtime(timestamp + h * 1800).tm_gmtoff
+                   for h in range(-4, 5))) > 1
+
+
+@unittest.skipUnless(hasattr(time, "tzset"), "needs time.tzset")
+class ExpirationSlotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tz = os.environ.get("TZ")
+
+    def tearDown(self):
+        if self.tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = self.tz
+        time.tzset()
+        expiration._minute_slots.cache_clear()
+
+    def test_random_timestamps(self):
+        rng = random.Random(7)
+        checked = 0
+        for tz in TIMEZONES:
+            os.environ["TZ"] = tz
+            time.tzset()
+            expiration._minute_slots.cache_clear()
+            for _ in range(200):
+                timestamp = rng.uniform(1.5e9, 1.9e9)
+                if rng.random() < 0.3:
+                    timestamp = float(int(timestamp))
+                if near_offset_change(timestamp):
+                    continue
+                checked += 1
+                self.assertEqual(expiration._expiration_slots(timestamp),
+                                 expiration._stepped_slots(timestamp, 50),
+                                 (tz, timestamp))
+        self.assertGreater(checked, 1000)
+
+    def test_minute_edges(self):
+        # the 30 s rule picks the next or the one after next minute
+        os.environ["TZ"] = "Asia/Kolkata"
+        time.tzset()
+        minute = time.mktime((2024, 5, 6, 10, 7, 0, 0, 0, -1))
+        for second in (0, 0.5, 29, 29.999, 30, 30.001, 59, 59.999):
+            timestamp = minute + second
+            self.assertEqual(expiration._expiration_slots(timestamp),
+                             expiration._stepped_slots(timestamp, 50),
+                             second)
+
+    def test_cached_slots_are_not_shared(self):
+        timestamp = 1.7e9
+        slots = expiration._expiration_slots(timestamp)
+        slots.append(0)
+        self.assertEqual(len(expiration._expiration_slots(timestamp)), 55)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Several IQ_Option clients in one process against the stand-in server."""
+
+import logging
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.local_server import LocalServer
+from iqoptionapi.stable_api import IQ_Option
+
+ACTIVES = ("EURUSD", "EURGBP", "GBPJPY")
+MODES = ("REAL", "PRACTICE", "PRACTICE")
+
+
+class MultipleClientsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("websocket").setLevel(logging.CRITICAL)
+        active_ids = sorted(OP_code.ACTIVES[name] for name in ACTIVES)
+        cls.server = LocalServer(actives=max(active_ids), tick_rate=20,
+                                 option_duration=0.3, seed=1).start()
+        cls.clients = [IQ_Option("user%d" % i, "password",
+                                 host=cls.server.host)
+                       for i in range(len(ACTIVES))]
+        cls.pool = ThreadPoolExecutor(len(cls.clients))
+        connected = list(cls.pool.map(lambda iq: iq.connect(), cls.clients))
+        assert all(check for check, _ in connected), connected
+        list(cls.pool.map(lambda args: args[0].change_balance(args[1]),
+                          zip(cls.clients, MODES)))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+        for iq in cls.clients:
+            iq.api.close()
+        cls.server.stop()
+
+    def each(self, call):
+        # call(index, client) on every client at once
+        return list(self.pool.map(lambda i: call(i, self.clients[i]),
+                                  range(len(self.clients))))
+
+    def test_sessions_are_separate(self):
+        ssids = [iq.api.SSID for iq in self.clients]
+        self.assertEqual(len(set(ssids)), len(ssids))
+        self.assertEqual(len(set(id(iq.api.timesync) for iq in self.clients)),
+                         len(self.clients))
+
+    def test_balances(self):
+        self.assertEqual([iq.api.balance_id for iq in self.clients],
+                         [1, 2, 2])
+        self.assertEqual(self.each(lambda i, iq: iq.get_balance_mode()),
+                         list(MODES))
+        self.assertEqual(self.each(lambda i, iq: iq.get_balance()),
+                         [0, 10000, 10000])
+
+    def test_candles(self):
+        now = time.time()
+
+        def candles(i, iq):
+            return [iq.get_candles(ACTIVES[i], 60, 10 * (i + 1), now, timeout=5)
+                    for _ in range(20)]
+        for i, results in enumerate(self.each(candles)):
+            for result in results:
+                self.assertEqual(len(result), 10 * (i + 1))
+                self.assertLess(result[-1]["to"], now + 60)
+
+    def test_order_results(self):
+        def trade(i, iq):
+            check, option_id = iq.buy(i + 1, ACTIVES[i], "call", 1)
+            self.assertTrue(check, option_id)
+            return option_id, iq.check_win_v4(option_id, timeout=5)
+        results = self.each(trade)
+        option_ids = [option_id for option_id, _ in results]
+        self.assertEqual(len(set(option_ids)), len(option_ids))
+        for i, (option_id, (win, profit)) in enumerate(results):
+            amount = i + 1
+            expected = {"win": round(amount * self.server.profit, 6),
+                        "loose": -amount, "equal": 0}
+            self.assertIn(win, expected)
+            self.assertAlmostEqual(profit, expected[win])
+            # every client only saw its own option
+            opened = self.clients[i].api.socket_option_opened
+            self.assertIn(option_id, opened)
+            for other in option_ids:
+                if other != option_id:
+                    self.assertNotIn(other, opened)
+
+    def test_digital_orders(self):
+        def trade(i, iq):
+            return iq.buy_digital_spot(ACTIVES[i], i + 1, "call", 1, timeout=5)
+        results = self.each(trade)
+        self.assertTrue(all(check for check, _ in results), results)
+        order_ids = [order_id for _, order_id in results]
+        self.assertEqual(len(set(order_ids)), len(order_ids))
+
+    def test_unanswered_request_times_out(self):
+        # the stand-in server has no sold-options reply
+        iq = self.clients[0]
+        begin = time.time()
+        self.assertIsNone(iq.sell_option([1], timeout=0.3))
+        self.assertLess(time.time() - begin, 2)
+        self.assertEqual(iq.api.pending_requests.futures, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""The market metadata cache and its init data index."""
+
+import unittest
+
+from iqoptionapi.ws.market_data import MarketData
+
+
+class FakeAPI(object):
+
+    def add_message_listener(self, name, listener):
+        pass
+
+
+def init(names, commission=20):
+    return {"result": {"turbo": {"actives": {
+        str(i): {"name": "front." + name, "enabled": True,
+                 "is_suspended": False,
+                 "option": {"profit": {"commission": commission}}}
+        for i, name in enumerate(names)}}}}
+
+
+class MarketDataTest(unittest.TestCase):
+
+    def test_reload_drops_delisted_actives(self):
+        market = MarketData(FakeAPI())
+        market.profits[("digital", "EURUSD")] = 0.9
+        market.get("init", lambda: init(["EURUSD", "GBPUSD"]))
+        self.assertTrue(market.is_open("GBPUSD"))
+        self.assertAlmostEqual(market.get_profit("GBPUSD"), 0.8)
+        opens = market.opens
+
+        market.invalidate()
+        market.get("init", lambda: init(["EURUSD"], commission=10))
+        self.assertIsNone(market.is_open("GBPUSD"))
+        self.assertIsNone(market.get_profit("GBPUSD"))
+        self.assertAlmostEqual(market.get_profit("EURUSD"), 0.9)
+        # options missing from the init data are kept
+        self.assertEqual(market.get_profit("EURUSD", "digital"), 0.9)
+        # the old index was swapped out, not changed
+        self.assertIn(("turbo", "GBPUSD"), opens)
+
+    def test_cached_payload_is_not_reloaded(self):
+        market = MarketData(FakeAPI())
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return init(["EURUSD"])
+        market.get("init", loader)
+        market.get("init", loader)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
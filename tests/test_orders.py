@@ -0,0 +1,54 @@
+"""The pipelined order placement window."""
+
+import unittest
+
+from iqoptionapi.ws.orders import OrderPipeline
+from iqoptionapi.ws.pending import PendingRequests
+
+
+class FakeAPI(object):
+
+    def __init__(self):
+        self.pending_requests = PendingRequests()
+        self.buy_multi_option = {}
+        self.sent = []
+
+    def channel(self, *args):
+        self.sent.append(args)
+
+
+class OrderPipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeAPI()
+        self.pipeline = OrderPipeline(self.api, window=2)
+
+    def ack(self, handle, option_id):
+        self.api.pending_requests.resolve(
+            {"name": "option", "request_id": handle.request_id,
+             "msg": {"id": option_id}})
+
+    def test_request_id_is_the_last_argument(self):
+        handle = self.pipeline.submit(self.api.channel, 1.0, 76)
+        self.assertEqual(self.api.sent, [(1.0, 76, handle.request_id)])
+        self.ack(handle, 7)
+        self.assertEqual(handle.result(1), (True, 7))
+        self.assertEqual(self.pipeline.stats()["acked"], 1)
+
+    def test_full_window_times_out(self):
+        handles = [self.pipeline.submit(self.api.channel, i) for i in range(2)]
+        self.assertIsNone(self.pipeline.submit(self.api.channel, 2,
+                                               timeout=0.05))
+        self.ack(handles[0], 1)
+        self.assertIsNotNone(self.pipeline.submit(self.api.channel, 2,
+                                                  timeout=0.05))
+
+    def test_unexpected_keyword_arguments_raise(self):
+        with self.assertRaises(TypeError):
+            self.pipeline.submit(self.api.channel, 1, expiration=60)
+        self.assertEqual(self.api.sent, [])
+        self.assertEqual(self.api.pending_requests.futures, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Digital quote books and the raw quotes kept by the strike cache."""
+
+import threading
+import unittest
+
+import iqoptionapi.constants as OP_code
+from iqoptionapi.ws.quotes import QuoteBook, ask_profit
+from iqoptionapi.ws.strikes import StrikeCache
+
+
+def frame(expiration, prices, active="EURUSD", period=60):
+    # prices: symbol -> (bid, ask)
+    return {"active": OP_code.ACTIVES[active],
+            "expiration": {"timestamp": expiration, "period": period},
+            "quotes": [{"symbols": [symbol],
+                        "price": {"bid": bid, "ask": ask}}
+                       for symbol, (bid, ask) in prices.items()]}
+
+
+class FakeAPI(object):
+
+    def add_message_listener(self, name, listener):
+        self.listener = listener
+
+
+class QuoteBookTest(unittest.TestCase):
+
+    def test_only_changes_are_reported(self):
+        book = QuoteBook()
+        self.assertEqual(sorted(book.update(frame(60, {"a": (1, 2), "b": (3, 4)}))),
+                         ["a", "b"])
+        self.assertEqual(book.update(frame(60, {"a": (1, 2), "b": (3, 5)})),
+                         ["b"])
+        self.assertEqual(book.quote("b"),
+                         {"bid": 3, "ask": 5, "profit": ask_profit(5)})
+
+    def test_missing_symbols_are_dropped(self):
+        book = QuoteBook()
+        profits = book.profits
+        book.update(frame(60, {"a": (1, 2), "b": (3, 4)}))
+        self.assertEqual(book.update(frame(60, {"a": (1, 2)})), [])
+        self.assertIsNone(book.quote("b"))
+        self.assertEqual(list(book.bids), ["a"])
+        self.assertEqual(list(profits), ["a"])
+
+    def test_new_expiration_clears(self):
+        book = QuoteBook()
+        book.update(frame(60, {"a": (1, 2)}))
+        self.assertEqual(book.update(frame(120, {"c": (1, 2)})), ["c"])
+        self.assertIsNone(book.quote("a"))
+        self.assertEqual(book.expiration, 120)
+
+
+class RawQuotesTest(unittest.TestCase):
+
+    def test_raw_quotes_are_kept_on_demand(self):
+        api = FakeAPI()
+        strikes = StrikeCache(api)
+        first = {"msg": frame(60, {"a": (1, 2)})}
+        api.listener(first)
+        self.assertEqual(strikes.raw, {})
+        self.assertEqual(strikes.wait_quotes("EURUSD", 1, 0), (1, 60))
+        self.assertIsNone(strikes.wait_raw_quotes("EURUSD", 1, 0))
+
+        second = {"msg": frame(60, {"a": (1, 3)})}
+        timer = threading.Timer(0.05, api.listener, (second,))
+        timer.start()
+        self.assertIs(strikes.wait_raw_quotes("EURUSD", 1, 2), second)
+        self.assertIs(strikes.wait_raw_quotes("EURUSD", 1, 0), second)
+        strikes.forget("EURUSD")
+        self.assertEqual(strikes.raw, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
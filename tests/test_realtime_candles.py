@@ -0,0 +1,105 @@
+"""Real time candle rings and get_realtime_candles."""
+
+import unittest
+
+from iqoptionapi.stable_api import IQ_Option
+from iqoptionapi.ws.objects.realtime_candles import CandleRing, RealtimeCandles
+
+
+def candle(from_, close=1.0):
+    return {"from": from_, "open": 1.0, "max": close, "min": 1.0,
+            "close": close, "volume": 2}
+
+
+class FakeAPI(object):
+
+    def __init__(self):
+        self.real_time_candles = RealtimeCandles()
+
+
+class CandleRingTest(unittest.TestCase):
+
+    def fill(self, ring, froms):
+        for from_ in froms:
+            ring.add(from_, candle(from_, close=from_))
+
+    def test_wraparound(self):
+        ring = CandleRing(4)
+        self.fill(ring, range(0, 600, 60))
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(list(ring.to_dict()), [360, 420, 480, 540])
+        view = ring.view()
+        self.assertEqual(view["timestamp"].tolist(), [360, 420, 480, 540])
+        self.assertEqual(view["close"].tolist(), [360, 420, 480, 540])
+        self.assertEqual(view["volume"].tolist(), [2] * 4)
+        # the ordered candles are one slice of the doubled columns
+        self.assertIsNotNone(view["close"].base)
+
+    def test_update_of_the_latest_candle(self):
+        ring = CandleRing(4)
+        self.fill(ring, [0, 60])
+        ring.add(60, candle(60, close=5))
+        self.assertEqual(len(ring), 2)
+        self.assertEqual(ring.view()["close"].tolist(), [0, 5])
+
+    def test_out_of_order(self):
+        ring = CandleRing(4)
+        self.fill(ring, [0, 120, 180])
+        ring.add(60, candle(60, close=60))
+        self.assertEqual(list(ring.to_dict()), [0, 60, 120, 180])
+        self.assertEqual(ring.view()["timestamp"].tolist(), [0, 60, 120, 180])
+        # full: an older candle evicts the oldest one
+        ring.add(30, candle(30, close=30))
+        self.assertEqual(list(ring.to_dict()), [30, 60, 120, 180])
+        # new candles go on after the rebuild
+        self.fill(ring, [240])
+        self.assertEqual(ring.view()["timestamp"].tolist(),
+                         [60, 120, 180, 240])
+
+    def test_duplicate_old_candle(self):
+        ring = CandleRing(3)
+        self.fill(ring, [0, 60, 120])
+        ring.add(0, candle(0, close=9))
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.to_dict()[0]["close"], 9)
+        self.assertEqual(ring.view()["close"].tolist(), [9, 60, 120])
+
+    def test_resized_keeps_the_latest(self):
+        ring = CandleRing(4)
+        self.fill(ring, range(0, 240, 60))
+        self.assertEqual(list(ring.resized(2).to_dict()), [120, 180])
+        self.assertEqual(list(ring.resized(8).to_dict()), [0, 60, 120, 180])
+
+
+class GetRealtimeCandlesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.iq = IQ_Option("user", "password")
+        self.iq.api = FakeAPI()
+        self.ring = self.iq.api.real_time_candles.ring("EURUSD", 60, 3)
+        for from_ in (0, 60):
+            self.ring.add(from_, candle(from_))
+
+    def test_snapshot_is_a_copy(self):
+        snapshot = self.iq.get_realtime_candles("EURUSD", 60)
+        self.ring.add(120, candle(120))
+        self.ring.add(180, candle(180))
+        self.assertEqual(list(snapshot), [0, 60])
+        self.assertEqual(list(self.iq.get_realtime_candles("EURUSD", 60)),
+                         [60, 120, 180])
+        everything = self.iq.get_realtime_candles("EURUSD", "all")
+        self.assertEqual(list(everything[60]), [60, 120, 180])
+
+    def test_view(self):
+        view = self.iq.get_realtime_candles("EURUSD", 60, view=True)
+        self.assertEqual(view["timestamp"].tolist(), [0, 60])
+        self.assertEqual(
+            self.iq.get_realtime_candles("EURUSD", "all", view=True)[60][
+                "timestamp"].tolist(), [0, 60])
+
+    def test_unknown(self):
+        self.assertFalse(self.iq.get_realtime_candles("EURGBP", 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
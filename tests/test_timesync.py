@@ -0,0 +1,119 @@
+"""The server clock model of TimeSync, on a patched monotonic clock."""
+
+import random
+import threading
+import unittest
+from unittest import mock
+
+from iqoptionapi.ws.objects.timesync import STEP_FRAMES, TimeSync
+
+OFFSET = 1000.0  # server seconds - monotonic seconds
+
+
+class TimeSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 50.0
+        patcher = mock.patch("time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sync = TimeSync(window=10)
+        self.random = random.Random(1)
+
+    def frame(self, server, arrival):
+        """A frame sent at server seconds arriving at monotonic arrival."""
+        self.now = arrival
+        self.sync.server_timestamp = server * 1000
+
+    def steady(self, frames, offset=OFFSET, ppm=0.0):
+        # one frame a second, up to 50 ms late
+        start = self.now
+        for i in range(1, frames + 1):
+            sent = start + i
+            self.frame(sent * (1 + ppm * 1e-6) + offset,
+                       sent + self.random.uniform(0, 0.05))
+        self.now = start + frames
+
+    def assertServerTime(self, expected, delta=0.05):
+        # the estimate is the least delayed frame, at most 50 ms behind
+        self.assertAlmostEqual(self.sync.server_timestamp, expected,
+                               delta=delta)
+
+    def test_interpolates_between_frames(self):
+        self.steady(30)
+        self.assertServerTime(self.now + OFFSET)
+        self.now += 0.5
+        self.assertServerTime(self.now + OFFSET)
+        self.assertEqual(self.sync.stats()["samples"], 10)
+
+    def test_late_frames_after_a_stall(self):
+        self.steady(30)
+        stalled = self.now
+        # 4 frames queued during a 5 s stall, delivered together
+        for i in range(1, 5):
+            before = self.sync.server_timestamp
+            self.frame(stalled + i + OFFSET, stalled + 5)
+            self.assertGreaterEqual(self.sync.server_timestamp, before)
+            self.assertServerTime(self.now + OFFSET)
+        self.assertGreater(self.sync.stats()["latency"], 0.9)
+        self.now = stalled + 5
+        self.steady(5)
+        self.assertServerTime(self.now + OFFSET)
+        self.assertEqual(self.sync.stats()["samples"], 10)
+
+    def test_backward_step(self):
+        self.steady(30)
+        start = self.now
+        for i in range(1, STEP_FRAMES + 1):
+            self.frame(start + i + OFFSET - 10, start + i + 0.01)
+            if i < STEP_FRAMES:
+                # could still be late frames, keep the old offset
+                self.assertServerTime(self.now + OFFSET)
+        self.assertServerTime(self.now + OFFSET - 10)
+        self.assertEqual(self.sync.stats()["samples"], STEP_FRAMES)
+        self.steady(20, offset=OFFSET - 10)
+        self.assertServerTime(self.now + OFFSET - 10)
+
+    def test_forward_step_is_taken_at_once(self):
+        self.steady(30)
+        self.frame(self.now + 1 + OFFSET + 10, self.now + 1)
+        self.assertServerTime(self.now + OFFSET + 10)
+
+    def test_drift(self):
+        ppm = 500.0
+        self.steady(10)
+        self.assertEqual(self.sync.stats()["drift"], 0.0)
+        self.steady(600, ppm=ppm)
+        self.assertAlmostEqual(self.sync.stats()["drift"] * 1e6, ppm, delta=20)
+        # 100 s without frames: the clocks drift apart by 50 ms meanwhile,
+        # the fitted drift keeps the estimate on the server clock
+        self.now += 100
+        self.assertServerTime(self.now * (1 + ppm * 1e-6) + OFFSET,
+                              delta=0.01)
+
+    def test_reset(self):
+        self.steady(10)
+        self.sync.server_timestamp = None
+        self.assertIsNone(self.sync.stats()["offset"])
+        self.assertEqual(self.sync.stats()["samples"], 0)
+        self.steady(3, offset=OFFSET + 5)
+        self.assertServerTime(self.now + OFFSET + 5)
+
+    def test_wait_timeouts(self):
+        self.assertIsNone(self.sync.wait_first(0.05))
+        self.assertIsNone(self.sync.wait(0.05))
+        timer = threading.Timer(0.05, self.frame, (self.now + 1 + OFFSET,
+                                                    self.now + 1))
+        timer.start()
+        self.assertIsNotNone(self.sync.wait(2))
+        timer.join()
+        # a frame was seen, wait_first returns at once; wait needs a new one
+        self.assertServerTime(self.now + OFFSET)
+        self.assertEqual(self.sync.wait_first(0), self.sync.server_timestamp)
+        self.assertIsNone(self.sync.wait(0.05))
+        self.sync.server_timestamp = None
+        self.assertIsNone(self.sync.wait_first(0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
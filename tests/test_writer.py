@@ -0,0 +1,67 @@
+"""The websocket writer thread: stop, failures and racing senders."""
+
+import threading
+import time
+import unittest
+
+from websocket import WebSocketConnectionClosedException
+
+from iqoptionapi.ws.writer import WebsocketWriter
+
+
+class WebsocketWriterTest(unittest.TestCase):
+
+    def test_frames_are_written_in_order(self):
+        written = []
+        writer = WebsocketWriter(written.append)
+        writer.start()
+        handles = [writer.send(str(i)) for i in range(100)]
+        self.assertTrue(all(handle.wait(1) for handle in handles))
+        writer.stop()
+        self.assertEqual(written, [str(i) for i in range(100)])
+
+    def test_closed_socket_stops_the_writer(self):
+        def send(data):
+            raise WebSocketConnectionClosedException("gone")
+        writer = WebsocketWriter(send)
+        writer.start()
+        handle = writer.send("x")
+        self.assertFalse(handle.wait(1))
+        self.assertIsInstance(handle.exception,
+                              WebSocketConnectionClosedException)
+        writer.thread.join(1)
+        self.assertFalse(writer.thread.is_alive())
+        self.assertRaises(WebSocketConnectionClosedException,
+                          writer.send, "y")
+
+    def test_send_racing_stop(self):
+        for _ in range(200):
+            writer = WebsocketWriter(lambda data: None, maxsize=8)
+            writer.start()
+            handles = []
+            started = threading.Event()
+
+            def sender():
+                started.set()
+                try:
+                    while True:
+                        handles.append(writer.send("x"))
+                except WebSocketConnectionClosedException:
+                    pass
+            senders = [threading.Thread(target=sender) for _ in range(3)]
+            for thread in senders:
+                thread.start()
+            started.wait()
+            begin = time.time()
+            writer.stop(timeout=2)
+            self.assertLess(time.time() - begin, 1)
+            self.assertFalse(writer.thread.is_alive())
+            for thread in senders:
+                thread.join(2)
+                self.assertFalse(thread.is_alive())
+            # every frame was either written or failed
+            self.assertTrue(all(handle.done() for handle in handles))
+
+
+if __name__ == "__main__":
+    unittest.main()